@@ -1,27 +1,57 @@
-import pandas as pd
 import streamlit as st
-from utils.data_manager import DataManager
+from utils.data_manager import DataManager, storage_setting
 from utils.login_manager import LoginManager
 
 st.set_page_config(page_title="BMI Rechner", page_icon=":material/monitor_weight:")
 
-data_manager = DataManager(fs_protocol='webdav', fs_root_folder="BMLD_App_DB")
+# Records are stored as data.csv, or as data.parquet with data_format = "parquet" in the [storage]
+# section of secrets.toml (convert the existing files first: python -m tools.migrate_to_parquet)
+data_file, parquet_schema = 'data.csv', None
+if storage_setting('data_format', 'csv') == 'parquet':
+    from utils.data_schema import BMI_DATA_SCHEMA as parquet_schema  # imports pyarrow
+    data_file = 'data.parquet'
+data_manager = DataManager(fs_protocol='webdav', fs_root_folder="BMLD_App_DB", append_log=True, write_behind=True,
+                           instrument=True, minimize_round_trips=True, compression='gzip',
+                           parquet_schema=parquet_schema, data_file=data_file,
+                           mirror_folder=storage_setting('mirror_folder'),
+                           prefetch={data_file: {'parse_dates': ['timestamp']}, 'rollups.json': {}})
+data_manager.begin_rerun()
 login_manager = LoginManager(data_manager)
 login_manager.login_register()  # handles login navigation + stops if not logged in
 
 # ---- Only reached when logged in ----
 
-if 'data_df' not in st.session_state:
-    st.session_state['data_df'] = data_manager.load_user_data(
-        'data.csv',
-        initial_value=pd.DataFrame(),
-        parse_dates=['timestamp']
-    )
+# Imported here, so the login page loads without pandas/numpy (see README: Startup budget)
+import pandas as pd
+from utils.io_metrics import can_view_metrics
+from utils.session_data import get_shared_user_data
+
+# The user's data is shared read-only by all of their sessions (e.g. browser tabs)
+shared_data = get_shared_user_data()
+username = st.session_state['username']
+data_version, data_df, rollups = shared_data.current(username)
+if data_version is None:
+    data_df = data_manager.load_user_data(data_manager.data_file, initial_value=pd.DataFrame(),
+                                          parse_dates=['timestamp'])
+    rollups = data_manager.load_rollups(data_df)
+    data_version, data_df = shared_data.publish(username, data_df, rollups)
+data_manager.discard_prefetch()  # unused, e.g. if another tab of the user had loaded the data
+if st.session_state.get('data_version') != data_version:
+    # Adopt the current version, e.g. after a record was added in another tab
+    st.session_state['data_df'] = data_df
+    st.session_state['data_version'] = data_version  # identifies data_df in caches
+    st.session_state['data_lease'] = shared_data.lease(username, data_version)
+    st.session_state['rollups'] = rollups
 
 pg_home    = st.Page("views/home.py",        title="Home",        icon=":material/home:",           default=True)
 pg_rechner = st.Page("views/bmi_rechner.py", title="BMI Rechner", icon=":material/monitor_weight:")
 pg_daten   = st.Page("views/bmi_daten.py",   title="BMI Daten",   icon=":material/table:")
 pg_grafik  = st.Page("views/bmi_grafik.py",  title="BMI Grafik",  icon=":material/show_chart:")
+pg_import  = st.Page("views/bmi_import.py",  title="BMI Import",  icon=":material/upload_file:")
+pg_io      = st.Page("views/io_debug.py",    title="I/O Debug",   icon=":material/monitoring:")
 
-pg = st.navigation([pg_home, pg_rechner, pg_daten, pg_grafik])
+pages = [pg_home, pg_rechner, pg_daten, pg_grafik, pg_import]
+if can_view_metrics(username):
+    pages.append(pg_io)  # process-wide metrics: admins only
+pg = st.navigation(pages)
 pg.run()
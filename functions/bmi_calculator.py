@@ -1,3 +1,7 @@
+import numpy as np
+import pandas as pd
+
+
 def calculate_bmi(height, weight):
     """
     Calculate BMI and return a dictionary with the inputs, BMI value, and category.
@@ -31,3 +35,79 @@ def calculate_bmi(height, weight):
     }
 
     return result_dict
+
+
+# Category boundaries and labels used by calculate_bmi, in ascending order
+BMI_BINS = (18.5, 25, 30)
+BMI_CATEGORIES = ('Untergewicht', 'Normalgewicht', 'Übergewicht', 'Adipositas')
+
+
+def calculate_bmi_batch(height, weight=None, errors='raise'):
+    """
+    Calculate BMI and category for many height/weight pairs at once.
+
+    Vectorized counterpart of calculate_bmi: the results are identical to calling
+    calculate_bmi row by row.
+
+    Args:
+        height (array-like or pd.DataFrame): Heights in meters, or a DataFrame with
+            'height' and 'weight' columns (its index is kept).
+        weight (array-like, optional): Weights in kilograms. Omit if height is a DataFrame.
+        errors (str): 'raise' to raise on invalid rows, 'coerce' to set bmi and category
+            of invalid rows to NaN and describe the problem in an 'error' column.
+
+    Returns:
+        pd.DataFrame: Columns height, weight, bmi and category (categorical).
+
+    Raises:
+        ValueError: If rows have non-positive or missing values and errors='raise'.
+    """
+    if errors not in ('raise', 'coerce'):
+        raise ValueError("errors must be 'raise' or 'coerce'")
+    if isinstance(height, pd.DataFrame):
+        index = height.index
+        height, weight = height['height'], height['weight']
+    else:
+        index = None
+    h = pd.to_numeric(pd.Series(np.asarray(height)), errors='coerce').to_numpy(dtype=np.float64)
+    w = pd.to_numeric(pd.Series(np.asarray(weight)), errors='coerce').to_numpy(dtype=np.float64)
+    if h.shape != w.shape:
+        raise ValueError("Height and weight must have the same length.")
+
+    invalid = ~((h > 0) & (w > 0))
+    if errors == 'raise' and invalid.any():
+        rows = np.flatnonzero(invalid)
+        shown = ', '.join(str(r) for r in rows[:10]) + (', ...' if len(rows) > 10 else '')
+        raise ValueError(f"Height and weight must be positive values ({len(rows)} invalid rows: {shown}).")
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        bmi = w / (h ** 2)
+    bmi[invalid] = np.nan
+
+    codes = np.searchsorted(BMI_BINS, bmi, side='right')
+    codes[invalid] = -1
+
+    result = pd.DataFrame({
+        'height': h,
+        'weight': w,
+        'bmi': _round_like_python(bmi, 1),
+        'category': pd.Categorical.from_codes(codes, categories=BMI_CATEGORIES),
+    }, index=index)
+    if errors == 'coerce':
+        result['error'] = np.where(invalid, "Height and weight must be positive values.", None)
+    return result
+
+
+def _round_like_python(values, ndigits):
+    """
+    Round an array exactly like the built-in round().
+
+    np.round scales, rounds and unscales, which can differ from round() for values
+    within rounding error of a tie. Those few values are rounded with round().
+    """
+    rounded = np.round(values, ndigits)
+    scaled = values * 10 ** ndigits
+    near_tie = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    for i in np.flatnonzero(near_tie):
+        rounded[i] = round(float(values[i]), ndigits)
+    return rounded
@@ -0,0 +1,285 @@
+import csv
+import io
+import json
+import numpy as np
+import pandas as pd
+from functions.bmi_calculator import BMI_CATEGORIES, calculate_bmi_batch
+
+# Rows parsed and validated at a time; bounds the memory used while reading an upload
+CHUNK_SIZE = 5000
+# Accepted column names (lower case) per record column
+COLUMN_ALIASES = {
+    'timestamp': ('timestamp', 'datum', 'date', 'zeit', 'time'),
+    'height': ('height', 'groesse', 'grösse', 'größe'),
+    'weight': ('weight', 'gewicht'),
+}
+# Heights above this value are taken to be in centimeters
+MAX_HEIGHT_M = 3.0
+# Longest JSON array element read; larger ones (or garbage without a valid element) are rejected
+MAX_RECORD_CHARS = 1 << 20
+
+
+def read_chunks(file, file_format, chunk_size=CHUNK_SIZE):
+    """
+    Read an uploaded CSV or JSON file as a sequence of DataFrames of at most chunk_size rows.
+
+    CSV files may be separated by commas or semicolons. Semicolon-separated files
+    use decimal commas (as exported by a Swiss or German Excel); the decimal
+    separator is stored in each chunk's attrs['decimal']. JSON files may contain
+    an array of objects or one object per line (JSON Lines). Arrays are decoded
+    one object at a time, so no format is ever parsed as a whole.
+
+    Args:
+        file: A binary or text file object (e.g. a Streamlit UploadedFile).
+        file_format (str): 'csv', 'json' or 'jsonl'.
+        chunk_size (int): Maximum rows per chunk.
+
+    Yields:
+        pd.DataFrame: The rows of the next chunk, with the columns as in the file.
+
+    Raises:
+        ValueError: If the format is unknown or the file is not valid JSON.
+    """
+    if isinstance(file, io.TextIOBase):
+        yield from _read_text_chunks(file, file_format, chunk_size)
+        return
+    text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+    try:
+        yield from _read_text_chunks(text, file_format, chunk_size)
+    finally:
+        text.detach()  # leave the caller's file open
+
+
+def _read_text_chunks(text, file_format, chunk_size):
+    """Implements read_chunks() on a text stream."""
+    if file_format == 'csv':
+        header = text.readline()
+        if not header.strip():
+            return
+        sep = ';' if header.count(';') > header.count(',') else ','
+        names = next(csv.reader([header], delimiter=sep))
+        decimal = ',' if sep == ';' else '.'
+        # Read as strings: timestamps stay untouched, numbers are converted by BulkImport
+        for chunk in pd.read_csv(text, sep=sep, names=names, header=None, chunksize=chunk_size,
+                                 dtype=str, decimal=decimal):
+            chunk.attrs['decimal'] = decimal
+            yield chunk
+    elif file_format in ('json', 'jsonl'):
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+        if first == '[':
+            yield from _read_json_array(text, chunk_size)
+        elif first:
+            records = []
+            for line in _prepend(first, text):
+                if line.strip():
+                    records.append(json.loads(line))
+                if len(records) == chunk_size:
+                    yield pd.DataFrame(records)
+                    records = []
+            if records:
+                yield pd.DataFrame(records)
+    else:
+        raise ValueError(f"Unsupported import format: {file_format}")
+
+
+def _prepend(first, text):
+    """Yields the lines of text, with first prepended to the first line."""
+    lines = iter(text)
+    yield first + next(lines, '')
+    yield from lines
+
+
+def _read_json_array(text, chunk_size, read_size=1 << 16, max_record_chars=MAX_RECORD_CHARS):
+    """
+    Decodes the objects of a JSON array (after its opening bracket) incrementally.
+
+    An element that cannot be decoded is retried with more input, up to
+    max_record_chars characters, so invalid input is rejected without being
+    read into memory as a whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, records = '', 0, []
+    while True:
+        # Skip separators, reading more input when the buffer is used up
+        while True:
+            while pos < len(buffer) and (buffer[pos].isspace() or buffer[pos] == ','):
+                pos += 1
+            if pos < len(buffer):
+                break
+            buffer, pos = text.read(read_size), 0
+            if not buffer:
+                raise ValueError("Invalid JSON: unterminated array")
+        if buffer[pos] == ']':
+            break
+        try:
+            record, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if len(buffer) - pos > max_record_chars:
+                raise ValueError("Invalid JSON: could not decode record "
+                                 f"(or a record is longer than {max_record_chars} characters)") from None
+            more = text.read(read_size)
+            if not more:
+                raise ValueError("Invalid JSON: could not decode record") from None
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        records.append(record)
+        if len(records) == chunk_size:
+            yield pd.DataFrame(records)
+            records = []
+    if records:
+        yield pd.DataFrame(records)
+
+
+def _parse_timestamps(values):
+    """Parses timestamps to timezone-naive Swiss time (like the app's own records)."""
+    try:
+        times = pd.to_datetime(values, errors='coerce', format='mixed')
+    except ValueError:  # mixed UTC offsets
+        times = pd.to_datetime(values, errors='coerce', format='mixed', utc=True)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert('Europe/Zurich').dt.tz_localize(None)
+    return times.to_numpy(dtype='datetime64[ns]')
+
+
+def _to_numbers(values, decimal='.'):
+    """
+    Converts values to floats, with decimal as the decimal separator of strings.
+
+    Returns:
+        tuple: The floats (NaN where missing or invalid) and a mask of the values
+            that are present but not numbers.
+    """
+    values = pd.Series(values).reset_index(drop=True)
+    if decimal != '.' and not pd.api.types.is_numeric_dtype(values):
+        values = values.str.replace(decimal, '.', regex=False).where(values.map(type) == str, values)
+    numbers = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64)
+    present = values.notna() & (values.astype(str).str.strip() != '')
+    return numbers, present.to_numpy() & np.isnan(numbers)
+
+
+def _not_in(times, existing):
+    """
+    Mask of the times not contained in the sorted existing times.
+
+    Each time is looked up by binary search (np.searchsorted), so n times cost
+    O(n log m) against m existing times instead of comparing every pair.
+    """
+    if len(existing) == 0:
+        return np.ones(len(times), dtype=bool)
+    pos = np.searchsorted(existing, times)
+    found = existing[np.minimum(pos, len(existing) - 1)] == times
+    return ~((pos < len(existing)) & found)
+
+
+class BulkImport:
+    """
+    Validates and deduplicates historical measurements chunk by chunk.
+
+    Each chunk is validated and its BMI and category computed in one vectorized
+    call (calculate_bmi_batch). Rows whose timestamp already exists are dropped by
+    binary search in the sorted existing timestamps. Only the accepted records are
+    kept, in compact column arrays; the raw chunks are discarded after each step.
+
+    Attributes:
+        n_rows (int): Rows read so far.
+        n_invalid (int): Rows rejected by validation.
+        n_duplicates (int): Rows whose timestamp already exists (in the data or the upload).
+        errors (list): The first max_errors problems as (row number, message) tuples.
+    """
+
+    def __init__(self, existing_timestamps, max_errors=20):
+        """
+        Initialize an import.
+
+        Args:
+            existing_timestamps (array-like): Timestamps of the user's current records.
+            max_errors (int): Number of row problems to keep for the report.
+        """
+        times = pd.to_datetime(pd.Series(existing_timestamps), errors='coerce').to_numpy(dtype='datetime64[ns]')
+        self._existing = np.sort(times[~np.isnat(times)])
+        self._columns = {'timestamp': [], 'height': [], 'weight': [], 'bmi': [], 'category': []}
+        self.max_errors = max_errors
+        self.n_rows = 0
+        self.n_invalid = 0
+        self.n_duplicates = 0
+        self.errors = []
+
+    @staticmethod
+    def _find_columns(chunk):
+        """Maps record columns to the chunk's columns (see COLUMN_ALIASES)."""
+        by_name = {str(c).strip().lower(): c for c in chunk.columns}
+        found = {}
+        for column, aliases in COLUMN_ALIASES.items():
+            match = next((by_name[a] for a in aliases if a in by_name), None)
+            if match is None:
+                raise ValueError(f"Missing column '{column}' (accepted names: {', '.join(aliases)})")
+            found[column] = match
+        return found
+
+    def add_chunk(self, chunk):
+        """
+        Validate a chunk and keep its new records.
+
+        Args:
+            chunk (pd.DataFrame): Rows with timestamp, height (m or cm) and weight (kg) columns.
+                Strings use chunk.attrs['decimal'] as the decimal separator (default '.').
+
+        Raises:
+            ValueError: If a required column is missing.
+        """
+        columns = self._find_columns(chunk)
+        first_row = self.n_rows + 1
+        self.n_rows += len(chunk)
+
+        times = _parse_timestamps(chunk[columns['timestamp']])
+        decimal = chunk.attrs.get('decimal', '.')
+        height, height_nan = _to_numbers(chunk[columns['height']], decimal)
+        weight, weight_nan = _to_numbers(chunk[columns['weight']], decimal)
+        height = np.where(height > MAX_HEIGHT_M, height / 100, height)
+        result = calculate_bmi_batch(height, weight, errors='coerce')
+
+        error = result['error'].to_numpy(dtype=object, copy=True)
+        error[weight_nan] = "Weight is not a number."
+        error[height_nan] = "Height is not a number."
+        error[np.isnat(times)] = "Invalid or missing timestamp."
+        invalid = pd.notna(error)
+        self.n_invalid += int(invalid.sum())
+        for row in np.flatnonzero(invalid)[:self.max_errors - len(self.errors)]:
+            self.errors.append((first_row + int(row), error[row]))
+
+        valid = np.flatnonzero(~invalid)
+        order = valid[np.argsort(times[valid], kind='stable')]
+        new = order[_not_in(times[order], self._existing)]
+        self.n_duplicates += len(order) - len(new)
+
+        self._columns['timestamp'].append(times[new])
+        for name in ('height', 'weight', 'bmi'):
+            self._columns[name].append(result[name].to_numpy()[new])
+        self._columns['category'].append(result['category'].cat.codes.to_numpy()[new])
+
+    def finish(self):
+        """
+        Returns the accepted records, sorted by timestamp.
+
+        Rows repeating a timestamp of an earlier row of the upload are dropped here
+        (one sort over the accepted rows) and counted as duplicates.
+
+        Returns:
+            pd.DataFrame: Columns timestamp, height, weight, bmi and category.
+        """
+        arrays = {name: np.concatenate(parts) if parts else np.empty(0)
+                  for name, parts in self._columns.items()}
+        times = arrays['timestamp'].astype('datetime64[ns]')
+        order = np.argsort(times, kind='stable')
+        keep = order[np.concatenate(([True], times[order][1:] != times[order][:-1]))] if len(order) else order
+        self.n_duplicates += len(order) - len(keep)
+        category = pd.Categorical.from_codes(arrays['category'][keep].astype(np.int8), categories=BMI_CATEGORIES)
+        return pd.DataFrame({'timestamp': times[keep], 'height': arrays['height'][keep],
+                             'weight': arrays['weight'][keep], 'bmi': arrays['bmi'][keep], 'category': category})
+
+    @property
+    def n_imported(self):
+        """int: Rows accepted so far (before dropping duplicates within the upload)."""
+        return sum(len(part) for part in self._columns['timestamp'])
@@ -0,0 +1,102 @@
+import numpy as np
+import pandas as pd
+
+
+class DataView:
+    """
+    A read-only, timestamp-sorted view of a DataFrame for filtering and paging.
+
+    The frame is sorted once. Date ranges are then found by binary search on the
+    sorted timestamps, and category filters by binary search on per-category
+    position arrays, so a query costs O(log n + k) for k matching rows instead of
+    a scan over the whole frame. Only the requested page is materialized.
+
+    Attributes:
+        time_column (str): The timestamp column.
+        category_column (str): The category column (may be missing from the frame).
+    """
+
+    def __init__(self, df, time_column='timestamp', category_column='category'):
+        """
+        Sort the frame and build the indexes.
+
+        Args:
+            df (pd.DataFrame): The data. Rows without timestamp are sorted last.
+            time_column (str): The timestamp column.
+            category_column (str): The category column.
+        """
+        self.time_column = time_column
+        self.category_column = category_column
+        times = pd.to_datetime(df[time_column], errors='coerce').to_numpy(dtype='datetime64[ns]')
+        order = np.argsort(times, kind='stable')  # NaT sorts last
+        self._df = df.iloc[order]
+        self._times = times[order]
+        self._n_valid = len(self._times) - int(np.isnat(self._times).sum())
+        self._by_category = {}
+        if category_column in df.columns:
+            codes, uniques = pd.factorize(self._df[category_column], sort=True)
+            positions = np.argsort(codes, kind='stable')
+            bounds = np.searchsorted(codes[positions], np.arange(len(uniques) + 1))
+            self._by_category = {str(u): positions[bounds[i]:bounds[i + 1]] for i, u in enumerate(uniques)}
+
+    def __len__(self):
+        return len(self._df)
+
+    @property
+    def categories(self):
+        """list: The categories present in the data (sorted, or in category order for categoricals)."""
+        return list(self._by_category)
+
+    def time_range(self):
+        """Returns the (first, last) timestamp, or (None, None) without valid timestamps."""
+        if self._n_valid == 0:
+            return None, None
+        return pd.Timestamp(self._times[0]), pd.Timestamp(self._times[self._n_valid - 1])
+
+    def select(self, start=None, end=None, categories=None):
+        """
+        Find the rows within a time range and categories.
+
+        Args:
+            start (datetime-like, optional): Inclusive lower bound.
+            end (datetime-like, optional): Exclusive upper bound.
+            categories (list, optional): Categories to keep; None keeps all.
+
+        Returns:
+            np.ndarray: Positions of the matching rows in ascending time order.
+        """
+        valid = self._times[:self._n_valid]
+        lo = 0 if start is None else int(np.searchsorted(valid, np.datetime64(pd.Timestamp(start), 'ns')))
+        if end is not None:
+            hi = int(np.searchsorted(valid, np.datetime64(pd.Timestamp(end), 'ns')))
+        else:
+            # Rows without timestamp only match without a time range
+            hi = len(self._times) if start is None else self._n_valid
+        if categories is None:
+            return np.arange(lo, hi)
+        parts = []
+        for category in categories:
+            positions = self._by_category.get(str(category))
+            if positions is not None:
+                parts.append(positions[np.searchsorted(positions, lo):np.searchsorted(positions, hi)])
+        return np.sort(np.concatenate(parts)) if parts else np.arange(0)
+
+    def page(self, positions, page, page_size, newest_first=True):
+        """
+        Materialize one page of selected rows.
+
+        Args:
+            positions (np.ndarray): Result of select().
+            page (int): Page number, starting at 1.
+            page_size (int): Rows per page.
+            newest_first (bool): Page through the rows in descending time order.
+
+        Returns:
+            pd.DataFrame: The rows of the page.
+        """
+        start = (page - 1) * page_size
+        if newest_first:
+            selected = positions[::-1][start:start + page_size]
+        else:
+            selected = positions[start:start + page_size]
+        return self._df.iloc[selected]
@@ -0,0 +1,59 @@
+import numpy as np
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Select points of a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    LTTB keeps the visual shape of a line chart (peaks, dips, trends) with a
+    fixed number of points. The first and last points are always kept.
+
+    Args:
+        x (np.ndarray): Sorted x values (e.g. timestamps as int64).
+        y (np.ndarray): y values, same length as x, without NaN.
+        n_out (int): Number of points to keep.
+
+    Returns:
+        np.ndarray: Indices of the selected points in ascending order.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket boundaries for the n - 2 inner points
+    edges = np.floor(np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64) + 1
+    edges[-1] = n - 1
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_start, next_end = edges[i + 1], edges[i + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[n - 1], y[n - 1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def downsample_series(series, n_out):
+    """
+    Downsample a time-indexed pandas Series to at most n_out points with LTTB.
+
+    Args:
+        series (pd.Series): Series with a sorted DatetimeIndex.
+        n_out (int): Point budget.
+
+    Returns:
+        pd.Series: The selected points (the series itself if it fits the budget).
+    """
+    series = series.dropna()
+    if len(series) <= n_out:
+        return series
+    return series.iloc[lttb_indices(series.index.asi8, series.to_numpy(), n_out)]
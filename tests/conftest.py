@@ -0,0 +1,32 @@
+import posixpath
+import pytest
+from fsspec.implementations.local import LocalFileSystem
+from utils.data_handler import DataHandler
+
+
+class LocalDataManager:
+    """The part of DataManager used by CredentialStore, on a local folder."""
+
+    def __init__(self, root):
+        self.fs = LocalFileSystem()
+        self.fs_root_folder = root
+
+    def _get_data_handler(self, subfolder=None, default_compression=None):
+        root_path = self.fs_root_folder if subfolder is None else posixpath.join(self.fs_root_folder, subfolder)
+        return DataHandler(self.fs, root_path, default_compression=default_compression)
+
+    def load_app_data(self, file_name, initial_value=None, **load_args):
+        return self._get_data_handler().load(file_name, initial_value, **load_args)
+
+    def save_app_data(self, data, file_name):
+        self._get_data_handler().save(file_name, data)
+
+
+@pytest.fixture
+def local_fs():
+    return LocalFileSystem()
+
+
+@pytest.fixture
+def data_manager(tmp_path):
+    return LocalDataManager(tmp_path.as_posix())
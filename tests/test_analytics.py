@@ -0,0 +1,87 @@
+import posixpath
+import numpy as np
+import pandas as pd
+import pytest
+from utils.analytics import BMI_HISTOGRAM_EDGES, CohortSummary, _folder_token, summarize_user_folders
+from utils.data_handler import DataHandler
+
+
+def records(bmis, months=('2024-01-15', '2024-02-15')):
+    times = [pd.Timestamp(months[i % len(months)]) for i in range(len(bmis))]
+    categories = [None if np.isnan(b) else 'Normalgewicht' if b < 25 else 'Übergewicht' for b in bmis]
+    return pd.DataFrame({'timestamp': times, 'bmi': bmis, 'category': categories})
+
+
+@pytest.fixture
+def root(tmp_path):
+    return tmp_path.as_posix()
+
+
+def save(local_fs, root, folder, df, **options):
+    DataHandler(local_fs, posixpath.join(root, folder), **options).save('data.csv', df)
+
+
+def test_summary_from_frame_merge_and_round_trip():
+    a = CohortSummary.from_frame(records([22.0, 26.0]))
+    b = CohortSummary.from_frame(records([24.0, float('nan')]))
+    total = CohortSummary().merge(a).merge(b)
+
+    assert (total.n_users, total.n_records) == (2, 3)
+    assert total.category_counts == {'Normalgewicht': 2, 'Übergewicht': 1}
+    assert total.bmi_counts.sum() == 3
+    assert total.bmi_distribution()[['22', '24', '26']].tolist() == [1, 1, 1]
+    trend = total.monthly_trend()
+    assert trend.loc['2024-01', 'mean_bmi'] == 23.0 and trend.loc['2024-02', 'count'] == 1
+
+    restored = CohortSummary.from_dict(total.to_dict())
+    assert restored.to_dict() == total.to_dict()
+
+
+def test_summary_histogram_underflow_and_overflow():
+    summary = CohortSummary.from_frame(records([5.0, 10.0, 59.9, 60.0, 80.0]))
+    assert len(summary.bmi_counts) == len(BMI_HISTOGRAM_EDGES) + 1
+    assert summary.bmi_counts[0] == 1 and summary.bmi_counts[-1] == 2
+    assert CohortSummary.from_frame(pd.DataFrame()).n_users == 0
+
+
+def test_folder_token_covers_data_file_variants_and_segments(local_fs, root):
+    save(local_fs, root, 'user_data_anna', records([22.0]))
+    folder = posixpath.join(root, 'user_data_anna')
+    dh = DataHandler(local_fs, folder, append_log=True)
+    dh.append('data.csv', records([23.0]))
+    dh.save('settings.json', {'unit': 'kg'})
+
+    names = [entry[0] for entry in _folder_token(local_fs, folder, 'data.csv')]
+    assert names[0] == 'data.csv' and len(names) == 2
+    assert names[1].startswith('data.csv.segments/')
+    assert _folder_token(local_fs, posixpath.join(root, 'user_data_missing'), 'data.csv') == []
+
+
+def test_summarize_rereads_only_changed_folders(local_fs, root):
+    save(local_fs, root, 'user_data_anna', records([22.0, 26.0]))
+    save(local_fs, root, 'user_data_ben', records([24.0]), default_compression='gzip')
+    local_fs.mkdirs(posixpath.join(root, 'user_data_empty'))
+    local_fs.mkdirs(posixpath.join(root, 'other'))
+
+    total, index, n_read = summarize_user_folders(local_fs, root, 'data.csv', {}, compression='gzip')
+    assert n_read == 2 and sorted(index) == ['user_data_anna', 'user_data_ben']
+    assert (total.n_users, total.n_records) == (2, 3)
+
+    total, index, n_read = summarize_user_folders(local_fs, root, 'data.csv', index, compression='gzip')
+    assert n_read == 0 and total.n_records == 3
+
+    save(local_fs, root, 'user_data_ben', records([24.0, 31.0]), default_compression='gzip')
+    total, index, n_read = summarize_user_folders(local_fs, root, 'data.csv', index, compression='gzip')
+    assert n_read == 1 and total.n_records == 4
+    assert total.category_counts == {'Normalgewicht': 2, 'Übergewicht': 2}
+
+
+def test_summarize_skips_unreadable_folders_until_fixed(local_fs, root):
+    save(local_fs, root, 'user_data_anna', records([22.0]))
+    local_fs.mkdirs(posixpath.join(root, 'user_data_broken'))
+    local_fs.pipe_file(posixpath.join(root, 'user_data_broken', 'data.csv'), b'\x00\xff garbage')
+
+    total, index, n_read = summarize_user_folders(local_fs, root, 'data.csv', {})
+    assert n_read == 2 and list(index) == ['user_data_anna']
+    assert total.n_records == 1
+    assert np.array_equal(total.bmi_counts, CohortSummary.from_frame(records([22.0])).bmi_counts)
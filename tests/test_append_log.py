@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from utils.data_handler import DataHandler
+
+
+def record(weight):
+    return {'weight': weight, 'height': 1.75}
+
+
+@pytest.fixture
+def dh(local_fs, tmp_path):
+    return DataHandler(local_fs, tmp_path.as_posix(), append_log=True, compact_threshold=3)
+
+
+def segment_names(tmp_path):
+    folder = tmp_path / 'data.csv.segments'
+    return sorted(p.name for p in folder.iterdir()) if folder.exists() else []
+
+
+def test_append_writes_segments_and_load_merges(dh, tmp_path):
+    dh.save('data.csv', pd.DataFrame([record(70.0)]))
+    dh.append('data.csv', record(71.0))
+    dh.append('data.csv', pd.DataFrame([record(72.0)]))
+
+    assert len(segment_names(tmp_path)) == 2
+    assert (tmp_path / 'data.csv').exists()
+    assert dh.load('data.csv')['weight'].tolist() == [70.0, 71.0, 72.0]
+
+
+def test_append_without_base_file(dh):
+    dh.append('data.csv', record(70.0))
+    assert dh.load('data.csv')['weight'].tolist() == [70.0]
+
+
+def test_threshold_compacts_in_order(dh, tmp_path):
+    for weight in (70.0, 71.0, 72.0):
+        dh.append('data.csv', record(weight))
+
+    assert segment_names(tmp_path) == []
+    assert pd.read_csv(tmp_path / 'data.csv')['weight'].tolist() == [70.0, 71.0, 72.0]
+
+
+def test_save_supersedes_segments(dh, tmp_path):
+    dh.append('data.csv', record(70.0))
+    dh.save('data.csv', pd.DataFrame([record(80.0)]))
+
+    assert segment_names(tmp_path) == []
+    assert dh.load('data.csv')['weight'].tolist() == [80.0]
+
+
+def test_save_keeps_segments_appended_while_it_runs(dh, tmp_path, monkeypatch):
+    dh.append('data.csv', record(70.0))
+    write_file = dh._write_file
+
+    def write_and_append(*args):
+        write_file(*args)
+        monkeypatch.setattr(dh, '_write_file', write_file)
+        dh.append('data.csv', record(90.0))  # e.g. another session
+    monkeypatch.setattr(dh, '_write_file', write_and_append)
+
+    dh.save('data.csv', pd.DataFrame([record(80.0)]))
+    assert len(segment_names(tmp_path)) == 1
+    assert dh.load('data.csv')['weight'].tolist() == [80.0, 90.0]
+
+
+def test_compact_keeps_segments_appended_while_it_runs(dh, tmp_path, monkeypatch):
+    dh.compact_threshold = 10
+    dh.append('data.csv', record(70.0))
+    dh.append('data.csv', record(71.0))
+    write_frame = dh._write_frame
+
+    def write_and_append(*args):
+        write_frame(*args)
+        monkeypatch.setattr(dh, '_write_frame', write_frame)
+        dh.append('data.csv', record(72.0))
+    monkeypatch.setattr(dh, '_write_frame', write_and_append)
+
+    dh.compact('data.csv')
+    assert len(segment_names(tmp_path)) == 1
+    assert dh.load('data.csv')['weight'].tolist() == [70.0, 71.0, 72.0]
+
+
+def test_compact_leaves_file_if_segment_was_folded_in_meanwhile(dh, tmp_path, monkeypatch):
+    dh.append('data.csv', record(70.0))
+    dh.append('data.csv', record(71.0))
+    list_segments = dh._list_segments
+
+    def list_then_compact_elsewhere(relative_path):
+        segments = list_segments(relative_path)
+        monkeypatch.setattr(dh, '_list_segments', list_segments)
+        dh.compact(relative_path)  # e.g. another process
+        return segments
+    monkeypatch.setattr(dh, '_list_segments', list_then_compact_elsewhere)
+
+    dh.compact('data.csv')
+    assert segment_names(tmp_path) == []
+    assert dh.load('data.csv')['weight'].tolist() == [70.0, 71.0]
+
+
+def test_append_rejects_other_formats(dh):
+    with pytest.raises(ValueError):
+        dh.append('settings.json', record(70.0))
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+from functions.bmi_calculator import calculate_bmi, calculate_bmi_batch
+
+
+def test_batch_matches_scalar():
+    rng = np.random.default_rng(0)
+    height = rng.uniform(1.4, 2.1, 5000).round(2)
+    weight = rng.uniform(35, 160, 5000).round(1)
+    batch = calculate_bmi_batch(height, weight)
+    scalar = pd.DataFrame([calculate_bmi(h, w) for h, w in zip(height.tolist(), weight.tolist())])
+
+    assert batch['bmi'].tolist() == scalar['bmi'].tolist()
+    assert batch['category'].astype(str).tolist() == scalar['category'].tolist()
+
+
+@pytest.mark.parametrize('bmi, category', [(18.49, 'Untergewicht'), (18.5, 'Normalgewicht'),
+                                           (24.99, 'Normalgewicht'), (25.0, 'Übergewicht'),
+                                           (29.99, 'Übergewicht'), (30.0, 'Adipositas')])
+def test_category_edges(bmi, category):
+    result = calculate_bmi_batch([1.0], [bmi])
+    assert result['category'][0] == calculate_bmi(1.0, bmi)['category'] == category
+
+
+def test_rounding_matches_builtin_round():
+    # Values within rounding error of a tie, where np.round and round() can differ
+    weight = [22.25, 22.35, 0.45, 1.05, 28.95, 115.8 / 4]
+    assert calculate_bmi_batch(np.ones(6), weight)['bmi'].tolist() == [round(w, 1) for w in weight]
+
+
+def test_invalid_rows():
+    height = [1.75, 0, -1.8, None, 'abc', 1.8]
+    weight = [70, 70, 70, 70, 70, float('nan')]
+    with pytest.raises(ValueError, match='5 invalid rows: 1, 2, 3, 4, 5'):
+        calculate_bmi_batch(height, weight)
+
+    result = calculate_bmi_batch(height, weight, errors='coerce')
+    assert result['bmi'].iloc[0] == calculate_bmi(1.75, 70)['bmi']
+    assert result['bmi'].iloc[1:].isna().all() and result['category'].iloc[1:].isna().all()
+    assert pd.isna(result['error'].iloc[0])
+    assert (result['error'].iloc[1:] == "Height and weight must be positive values.").all()
+    for h, w in [(0, 70), (-1.8, 70)]:
+        with pytest.raises(ValueError, match='must be positive'):
+            calculate_bmi(h, w)
+
+
+def test_dataframe_input_keeps_index():
+    df = pd.DataFrame({'height': [1.75, 1.6], 'weight': [70, 80]}, index=[10, 20])
+    result = calculate_bmi_batch(df)
+    assert result.index.tolist() == [10, 20]
+    assert result['bmi'].tolist() == [calculate_bmi(1.75, 70)['bmi'], calculate_bmi(1.6, 80)['bmi']]
@@ -0,0 +1,81 @@
+import io
+import pytest
+import pandas as pd
+from functions.bulk_import import BulkImport, _read_json_array, read_chunks
+
+
+def import_file(content, file_format='csv', existing=(), chunk_size=5000):
+    importer = BulkImport(list(existing))
+    for chunk in read_chunks(io.BytesIO(content.encode('utf-8')), file_format, chunk_size=chunk_size):
+        importer.add_chunk(chunk)
+    return importer, importer.finish()
+
+
+def test_semicolon_csv_uses_decimal_commas():
+    importer, records = import_file('Datum;Grösse;Gewicht\n'
+                                    '2024-01-01 08:00;1,75;70,5\n'
+                                    '2024-01-02 08:00;175;71\n')
+    assert importer.n_invalid == 0
+    assert records['height'].tolist() == [1.75, 1.75]
+    assert records['weight'].tolist() == [70.5, 71.0]
+    assert records['bmi'].tolist() == [23.0, 23.2]
+
+
+def test_comma_csv_uses_decimal_points():
+    importer, records = import_file('timestamp,height,weight\n'
+                                    '2024-01-01 08:00,1.75,70.5\n'
+                                    '2024-01-02 08:00,"1,75",70\n')
+    assert records['weight'].tolist() == [70.5]
+    assert importer.errors == [(2, "Height is not a number.")]
+
+
+def test_invalid_values_are_reported_per_row():
+    importer, records = import_file('timestamp;height;weight\n'
+                                    '2024-01-01 08:00;1,75;siebzig\n'
+                                    '2024-01-02 08:00;-1,75;70\n'
+                                    '2024-01-03 08:00;1,75;\n'
+                                    'gestern;1,75;70\n', chunk_size=2)
+    assert len(records) == 0 and importer.n_invalid == 4
+    assert importer.errors == [(1, "Weight is not a number."),
+                               (2, "Height and weight must be positive values."),
+                               (3, "Height and weight must be positive values."),
+                               (4, "Invalid or missing timestamp.")]
+
+
+def test_duplicates_are_dropped():
+    importer, records = import_file('timestamp,height,weight\n'
+                                    '2024-01-01 08:00,1.75,70\n'
+                                    '2024-01-02 08:00,1.75,71\n'
+                                    '2024-01-02 08:00,1.75,72\n',
+                                    existing=[pd.Timestamp('2024-01-01 08:00')])
+    assert records['weight'].tolist() == [71.0]
+    assert importer.n_duplicates == 2
+
+
+def test_json_array_is_read_in_chunks():
+    content = '[' + ', '.join(f'{{"timestamp": "2024-01-{day:02d}", "height": 1.75, "weight": {60 + day}}}'
+                              for day in range(1, 8)) + ']'
+    chunks = list(read_chunks(io.StringIO(content), 'json', chunk_size=3))
+    assert [len(chunk) for chunk in chunks] == [3, 3, 1]
+    assert pd.concat(chunks)['weight'].tolist() == [61, 62, 63, 64, 65, 66, 67]
+
+
+def test_truncated_json_array_is_rejected():
+    with pytest.raises(ValueError, match='unterminated array'):
+        list(read_chunks(io.StringIO('[{"weight": 70}, {"weight": 71}'), 'json'))
+    with pytest.raises(ValueError, match='could not decode'):
+        list(read_chunks(io.StringIO('[{"weight": 70}, {"weight": 7'), 'json'))
+
+
+def test_garbage_in_json_array_is_rejected_without_reading_it_all():
+    class Garbage(io.StringIO):
+        reads = 0
+
+        def read(self, size=-1):
+            self.reads += 1
+            return super().read(size)
+
+    garbage = Garbage('[' + 'x' * 10_000_000)
+    with pytest.raises(ValueError, match='could not decode'):
+        list(_read_json_array(garbage, 10, read_size=1024, max_record_chars=4096))
+    assert garbage.reads < 10
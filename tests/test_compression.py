@@ -0,0 +1,124 @@
+import pandas as pd
+import pytest
+from utils.data_handler import COMPRESSION_EXTENSIONS, DataHandler, split_extension
+from utils.io_metrics import InstrumentedFileSystem, IOMetrics
+
+SUFFIXES = {codec: ext for ext, codec in COMPRESSION_EXTENSIONS.items()}
+
+
+def frame():
+    return pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01 08:00', '2024-01-02 08:00']),
+                         'weight': [70.5, 71.0], 'category': ['Normalgewicht', 'Normalgewicht']})
+
+
+@pytest.fixture(params=sorted(SUFFIXES))
+def codec(request):
+    if request.param == 'zstd':
+        pytest.importorskip('zstandard')
+    return request.param
+
+
+def handler(local_fs, tmp_path, **kwargs):
+    return DataHandler(local_fs, tmp_path.as_posix(), **kwargs)
+
+
+@pytest.mark.parametrize('name, expected', [
+    ('data.csv', ('.csv', None)),
+    ('data.csv.gz', ('.csv', 'gzip')),
+    ('folder/data.JSON.XZ', ('.json', 'xz')),
+    ('data.parquet', ('.parquet', None)),
+])
+def test_split_extension(name, expected):
+    assert split_extension(name) == expected
+
+
+def test_default_compression_round_trip(local_fs, tmp_path, codec):
+    dh = handler(local_fs, tmp_path, default_compression=codec)
+    suffix = SUFFIXES[codec]
+    dh.save('data.csv', frame())
+    dh.save('settings.json', {'unit': 'kg'})
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.csv' + suffix, 'settings.json' + suffix]
+    pd.testing.assert_frame_equal(dh.load('data.csv', parse_dates=['timestamp']), frame())
+    assert dh.load('settings.json') == {'unit': 'kg'}
+
+
+def test_explicit_suffix_is_compressed_without_default(local_fs, tmp_path, codec):
+    suffix = SUFFIXES[codec]
+    dh = handler(local_fs, tmp_path)
+    dh.save('notes.txt' + suffix, 'Hallo')
+    assert (tmp_path / ('notes.txt' + suffix)).read_bytes() != b'Hallo'
+    assert dh.load('notes.txt' + suffix) == 'Hallo'
+
+
+def test_plain_file_is_read_and_replaced_on_save(local_fs, tmp_path):
+    handler(local_fs, tmp_path).save('data.csv', frame())
+    dh = handler(local_fs, tmp_path, default_compression='gzip')
+    pd.testing.assert_frame_equal(dh.load('data.csv', parse_dates=['timestamp']), frame())
+
+    dh.save('data.csv', frame().iloc[:1])
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.csv.gz']
+    assert len(dh.load('data.csv')) == 1
+
+
+def test_append_log_segments_are_compressed(local_fs, tmp_path, codec):
+    suffix = SUFFIXES[codec]
+    dh = handler(local_fs, tmp_path, append_log=True, compact_threshold=3, default_compression=codec)
+    dh.save('data.csv', frame().iloc[:1])
+    dh.append('data.csv', frame().iloc[1:])
+
+    segments = list((tmp_path / 'data.csv.segments').iterdir())
+    assert [p.name.endswith('.csv' + suffix) for p in segments] == [True]
+    pd.testing.assert_frame_equal(dh.load('data.csv', parse_dates=['timestamp']), frame())
+
+    dh.append('data.csv', frame())
+    dh.append('data.csv', frame())  # third segment: folded into the base file
+    assert not list((tmp_path / 'data.csv.segments').iterdir())
+    assert len(dh.load('data.csv')) == 6
+
+
+def test_parquet_is_not_compressed_twice(local_fs, tmp_path):
+    dh = handler(local_fs, tmp_path, default_compression='gzip')
+    dh.save('data.parquet', frame())
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.parquet']
+    with pytest.raises(ValueError):
+        dh.save('data.parquet.gz', frame())
+
+
+def test_unsupported_compression(local_fs, tmp_path):
+    with pytest.raises(ValueError):
+        handler(local_fs, tmp_path, default_compression='lz4')
+
+
+def counted_handler(local_fs, tmp_path, plain_files):
+    metrics = IOMetrics()
+    fs = InstrumentedFileSystem(local_fs, metrics, scope=('session', 1))
+    dh = handler(fs, tmp_path, minimize_round_trips=True, default_compression='gzip', plain_files=plain_files)
+    return dh, lambda: sum(row['count'] for row in metrics.totals())
+
+
+def test_plain_variant_is_not_requested_without_reason(local_fs, tmp_path):
+    plain_files = {}
+    dh, requests = counted_handler(local_fs, tmp_path, plain_files)
+    dh.save('rollups.json', {'daily': {}})
+    assert requests() == 1  # no removal of a plain rollups.json that never existed
+
+    assert dh.load('missing.json', initial_value={}) == {}
+    assert requests() == 3  # both variants once
+    dh, requests = counted_handler(local_fs, tmp_path, plain_files)
+    assert dh.load('missing.json', initial_value={}) == {}
+    assert dh.load('rollups.json') == {'daily': {}}
+    assert requests() == 2
+
+
+def test_plain_variant_found_by_load_is_removed_once(local_fs, tmp_path):
+    handler(local_fs, tmp_path).save('data.csv', frame())
+    dh, requests = counted_handler(local_fs, tmp_path, {})
+    assert len(dh.load('data.csv')) == 2
+    dh.save('data.csv', frame())
+    assert requests() == 4  # gz miss, plain read, write, removal
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['data.csv.gz']
+
+    dh.save('data.csv', frame())
+    assert len(dh.load('data.csv')) == 2
+    assert requests() == 6
@@ -0,0 +1,102 @@
+import pytest
+from utils.credential_store import CredentialConflictError, CredentialStore
+
+
+def credentials(email, password='$2b$12$hash'):
+    return {'email': email, 'name': email.split('@')[0], 'password': password}
+
+
+@pytest.fixture
+def store(data_manager):
+    return CredentialStore(data_manager, n_buckets=4)
+
+
+def test_shard_name_is_stable_and_case_insensitive(store):
+    assert store.shard_name('Anna') == store.shard_name('anna')
+    assert store.shard_name('anna') in {f'{i:03d}.yaml' for i in range(4)}
+
+
+def test_put_and_get(store):
+    store.put('anna', credentials('anna@example.com'))
+    assert store.get('anna') == credentials('anna@example.com')
+    assert store.get('bert') is None
+
+
+def test_load_all_merges_shards(store):
+    users = [f'user{i}' for i in range(10)]
+    for username in users:
+        store.put(username, credentials(f'{username}@example.com'))
+    assert len({store.shard_name(u) for u in users}) > 1
+    assert sorted(store.load_all()['usernames']) == sorted(users)
+
+
+def test_put_keeps_other_users_of_the_shard(store):
+    store.put('anna', credentials('anna@example.com'))
+    other = next(f'user{i}' for i in range(100) if store.shard_name(f'user{i}') == store.shard_name('anna'))
+    store.put(other, credentials('other@example.com'))
+    assert store.get('anna') is not None
+    assert store.get(other) is not None
+
+
+@pytest.mark.parametrize('other', [
+    credentials('mallory@example.com', password='$2b$12$second'),
+    credentials('anna@example.com', password='$2b$12$second'),   # same email
+    credentials('mallory@example.com', password='$2b$12$first'),  # same password hash
+])
+def test_put_rejects_existing_username(store, other):
+    store.put('anna', credentials('anna@example.com', password='$2b$12$first'))
+    with pytest.raises(CredentialConflictError):
+        store.put('anna', other)
+    assert store.get('anna') == credentials('anna@example.com', password='$2b$12$first')
+
+
+def test_put_repeated_with_same_credentials(store):
+    store.put('anna', credentials('anna@example.com'))
+    store.put('anna', credentials('anna@example.com'))
+    assert store.get('anna') == credentials('anna@example.com')
+
+
+def test_put_overwrite_replaces_entry(store):
+    store.put('anna', credentials('anna@example.com', password='$2b$10$old'))
+    store.put('anna', credentials('anna@example.com', password='$2b$12$new'), overwrite=True)
+    assert store.get('anna')['password'] == '$2b$12$new'
+
+
+def test_put_retries_after_concurrent_write(store, data_manager, monkeypatch):
+    store.put('anna', credentials('anna@example.com'))
+    write_if_match = CredentialStore._write_if_match
+    calls = []
+
+    def concurrent_write_first(self, dh, name, shard, token):
+        calls.append(token)
+        if len(calls) == 1:
+            # Another session registers a user in the same shard in the meantime
+            dh.save(name, {'usernames': {'anna': credentials('anna@example.com'),
+                                         'bert': credentials('bert@example.com')}})
+        return write_if_match(self, dh, name, shard, token)
+
+    monkeypatch.setattr(CredentialStore, '_write_if_match', concurrent_write_first)
+    monkeypatch.setattr('utils.credential_store.time.sleep', lambda seconds: None)
+    same_shard = next(f'user{i}' for i in range(100) if store.shard_name(f'user{i}') == store.shard_name('anna'))
+    store.put(same_shard, credentials('new@example.com'))
+
+    assert len(calls) == 2
+    assert calls[0] != calls[1]
+    shard = data_manager._get_data_handler('credentials').load(store.shard_name('anna'))
+    assert sorted(shard['usernames']) == sorted(['anna', 'bert', same_shard])
+
+
+def test_put_gives_up_after_max_attempts(store, monkeypatch):
+    monkeypatch.setattr(CredentialStore, '_write_if_match', lambda self, dh, name, shard, token: False)
+    monkeypatch.setattr('utils.credential_store.time.sleep', lambda seconds: None)
+    with pytest.raises(CredentialConflictError):
+        store.put('anna', credentials('anna@example.com'), max_attempts=3)
+
+
+def test_migrate_legacy_file(store, data_manager):
+    legacy = {'usernames': {'anna': credentials('anna@example.com'), 'bert': credentials('bert@example.com')}}
+    data_manager.save_app_data(legacy, 'credentials.yaml')
+
+    assert store.load_all() == legacy
+    assert store.get('bert') == legacy['usernames']['bert']
+    assert data_manager.load_app_data('credentials.yaml') == legacy
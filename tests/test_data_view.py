@@ -0,0 +1,28 @@
+import pandas as pd
+from functions.data_view import DataView
+
+
+def make_view():
+    df = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-03', None, '2024-01-01', '2024-01-02']),
+                       'category': ['Normalgewicht', 'Übergewicht', 'Übergewicht', 'Normalgewicht'],
+                       'bmi': [22.0, 26.0, 25.5, 21.0]})
+    return DataView(df)
+
+
+def test_time_range_ignores_missing_timestamps():
+    assert make_view().time_range() == (pd.Timestamp('2024-01-01'), pd.Timestamp('2024-01-03'))
+
+
+def test_select_without_range_keeps_rows_without_timestamp():
+    view = make_view()
+    rows = view.page(view.select(), 1, 10, newest_first=False)
+    assert rows['bmi'].tolist() == [25.5, 21.0, 22.0, 26.0]
+
+
+def test_select_range_and_categories():
+    view = make_view()
+    rows = view.page(view.select('2024-01-02', '2024-01-04'), 1, 10, newest_first=False)
+    assert rows['bmi'].tolist() == [21.0, 22.0]
+    rows = view.page(view.select(categories=['Übergewicht']), 1, 10, newest_first=False)
+    assert rows['bmi'].tolist() == [25.5, 26.0]
+    assert len(view.select('2024-01-01', categories=['Übergewicht'])) == 1
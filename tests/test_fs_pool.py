@@ -0,0 +1,96 @@
+import pytest
+from utils.fs_pool import FilesystemPool, is_offline_error
+
+
+class FakeFilesystem:
+    def __init__(self, failure=None):
+        self.failure = failure
+        self.checks = 0
+        self.closed = False
+
+    def info(self, path):
+        self.checks += 1
+        if self.failure is not None:
+            raise self.failure
+        raise FileNotFoundError(path)  # a missing health check path is fine
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = FilesystemPool('file', health_check_interval=60.0)
+    pool.created = []
+
+    def create():
+        fs = FakeFilesystem(pool.next_failure)
+        pool.created.append(fs)
+        return fs
+    pool.next_failure = None
+    monkeypatch.setattr(pool, '_create', create)
+    monkeypatch.setattr(pool, '_close', lambda fs: setattr(fs, 'closed', True))
+    return pool
+
+
+def test_filesystem_is_shared_and_checked_per_interval(pool, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('utils.fs_pool.time.monotonic', lambda: clock[0])
+    fs = pool.get()
+    assert pool.get() is fs and fs.checks == 1
+
+    clock[0] += 61
+    assert pool.get() is fs and fs.checks == 2
+    assert len(pool.created) == 1
+
+
+def test_broken_connection_is_replaced(pool, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('utils.fs_pool.time.monotonic', lambda: clock[0])
+    broken = pool.get()
+    pool.known_dirs.add('root/user_data_anna')
+    broken.failure = ConnectionError('reset')
+
+    clock[0] += 61
+    fs = pool.get()
+    assert fs is not broken and broken.closed
+    assert pool.get() is fs and not pool.known_dirs
+
+
+def test_other_errors_are_raised_without_replacing(pool, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr('utils.fs_pool.time.monotonic', lambda: clock[0])
+    fs = pool.get()
+    fs.failure = PermissionError('rejected credentials')
+
+    clock[0] += 61
+    with pytest.raises(PermissionError):
+        pool.get()
+    assert len(pool.created) == 1
+
+
+def test_failed_first_check_is_retried_on_the_next_call(pool):
+    pool.next_failure = ConnectionError('unreachable')
+    with pytest.raises(ConnectionError):
+        pool.get()
+    assert pool._fs is None
+
+    pool.next_failure = None
+    fs = pool.get()
+    assert fs is pool.created[-1] and len(pool.created) == 2
+
+
+def test_replace_keeps_a_filesystem_another_session_replaced(pool):
+    broken = pool.get()
+    replaced = pool._replace(broken)
+    assert pool._replace(broken) is replaced
+    assert len(pool.created) == 2
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+@pytest.mark.parametrize('error, offline', [(ConnectionError(), True), (TimeoutError(), True),
+                                            (StatusError(503), True), (StatusError(404), False),
+                                            (FileNotFoundError(), False), (PermissionError(), False)])
+def test_is_offline_error(error, offline):
+    assert is_offline_error(error) is offline
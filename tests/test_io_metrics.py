@@ -0,0 +1,56 @@
+import io
+from tools.latency_fs import LatencyFileSystem
+from utils.io_metrics import InstrumentedFileSystem, IOMetrics, MeteredFile
+
+
+def test_metered_file_counts_reads_writes_and_closes_once():
+    transfers, closed = [], []
+    f = MeteredFile(io.BytesIO(b'line 1\nline 2\n' + b'x' * 10), transfers.append, closed.append)
+    assert f.read(4) == b'line'
+    buffer = bytearray(3)
+    assert f.readinto(buffer) == 3
+    assert list(f) == [b'line 2\n', b'x' * 10]
+    f.close()
+    f.close()
+    assert transfers == [4, 3, 7, 10]
+    assert f.transferred == 24
+    assert closed == [24]
+
+
+def test_metered_file_counts_reads_through_text_wrapper():
+    f = MeteredFile(io.BytesIO('Größe\n'.encode('utf-8')))
+    assert io.TextIOWrapper(f, encoding='utf-8').read() == 'Größe\n'
+    assert f.transferred == 8
+
+
+def test_metered_file_counts_text_as_utf8():
+    f = MeteredFile(io.StringIO())
+    f.write('Größe')
+    assert f.transferred == 7
+
+
+def test_instrumented_filesystem_records_bytes(local_fs, tmp_path):
+    metrics = IOMetrics()
+    fs = InstrumentedFileSystem(local_fs, metrics, scope=('session', 1))
+    path = (tmp_path / 'data.bin').as_posix()
+    with fs.open(path, 'wb') as f:
+        f.write(b'abcdef')
+    with fs.open(path, 'rb') as f:
+        f.readinto(bytearray(4))
+    fs.info(path)
+
+    rows = {row['op']: row for row in metrics.totals()}
+    assert rows['write']['bytes_written'] == 6
+    assert rows['read']['bytes_read'] == 4
+    assert rows['info']['count'] == 1
+
+
+def test_latency_filesystem_counts_round_trips_and_bytes(local_fs, tmp_path):
+    fs = LatencyFileSystem(local_fs, latency=0)
+    path = (tmp_path / 'data.bin').as_posix()
+    with fs.open(path, 'wb') as f:
+        f.write(b'abcdef')
+    with fs.open(path, 'rb') as f:
+        f.readinto(bytearray(6))
+    fs.exists(path)
+    assert fs.counters() == {'round_trips': 3, 'bytes_read': 6, 'bytes_written': 6}
@@ -0,0 +1,107 @@
+import pytest
+from utils.load_cache import LoadCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('utils.load_cache.time.monotonic', lambda: now[0])
+    return now
+
+
+def test_make_key_ignores_argument_order():
+    assert LoadCache.make_key('a.csv', {'x': 1, 'y': 2}) == LoadCache.make_key('a.csv', {'y': 2, 'x': 1})
+    assert LoadCache.make_key('a.csv', {}) != LoadCache.make_key('a.csv', {'x': 1})
+
+
+def test_make_token_uses_etag_mtime_and_size():
+    assert LoadCache.make_token({'etag': '"e1"', 'modified': 't', 'size': 3}) == ('"e1"', 't', 3)
+    assert LoadCache.make_token({'mtime': 5.0, 'size': 3}) == (None, 5.0, 3)
+
+
+def test_get_valid_requires_matching_token():
+    cache = LoadCache()
+    cache.put('k', 'token-1', {'a': 1}, size=10)
+    assert cache.get_valid('k', 'token-1') == (True, {'a': 1})
+    assert cache.get_valid('k', 'token-2') == (False, None)
+    assert cache.get_valid('missing', 'token-1') == (False, None)
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_get_fresh_within_ttl(clock):
+    cache = LoadCache(ttl=5.0)
+    cache.put('k', 'token', [1, 2], size=10)
+    clock[0] += 4.0
+    assert cache.get_fresh('k') == (True, [1, 2])
+    clock[0] += 2.0
+    assert cache.get_fresh('k') == (False, None)
+    # Revalidation restarts the TTL
+    assert cache.get_valid('k', 'token')[0]
+    assert cache.get_fresh('k')[0]
+
+
+def test_values_are_copied():
+    cache = LoadCache()
+    value = {'usernames': {'anna': {'name': 'Anna'}}}
+    cache.put('k', 't', value, size=10)
+    value['usernames']['anna']['name'] = 'changed'
+    _, loaded = cache.get_valid('k', 't')
+    assert loaded['usernames']['anna']['name'] == 'Anna'
+    loaded['usernames'].clear()
+    assert cache.get_valid('k', 't')[1]['usernames']
+
+
+def test_evicts_least_recently_used():
+    cache = LoadCache(max_bytes=100)
+    cache.put('a', 't', 'A', size=40)
+    cache.put('b', 't', 'B', size=40)
+    cache.get_valid('a', 't')
+    cache.put('c', 't', 'C', size=40)
+    assert cache.current_bytes == 80
+    assert cache.get_valid('b', 't') == (False, None)
+    assert cache.get_valid('a', 't') == (True, 'A')
+    assert cache.get_valid('c', 't') == (True, 'C')
+
+
+def test_put_replaces_entry_and_skips_oversized_values():
+    cache = LoadCache(max_bytes=100)
+    cache.put('a', 't1', 'old', size=30)
+    cache.put('a', 't2', 'new', size=50)
+    assert cache.current_bytes == 50
+    assert cache.get_valid('a', 't2') == (True, 'new')
+    cache.put('big', 't', 'x', size=101)
+    assert cache.get_valid('big', 't') == (False, None)
+    assert cache.current_bytes == 50
+
+
+def test_invalidate_removes_all_load_arguments():
+    cache = LoadCache()
+    key_all = LoadCache.make_key('data.csv', {})
+    key_cols = LoadCache.make_key('data.csv', {'usecols': ['bmi']})
+    key_other = LoadCache.make_key('other.csv', {})
+    for key in (key_all, key_cols, key_other):
+        cache.put(key, 't', 'v', size=10)
+    cache.invalidate('data.csv')
+    assert not cache.get_valid(key_all, 't')[0]
+    assert not cache.get_valid(key_cols, 't')[0]
+    assert cache.get_valid(key_other, 't')[0]
+    assert cache.current_bytes == 10
+
+
+def test_make_file_token_from_get_response():
+    class Response:
+        headers = {'ETag': '"e1"', 'Last-Modified': 'Tue, 02 Jan 2024 08:00:00 GMT', 'Content-Length': '42'}
+
+    class WebdavFile:
+        reader = type('Reader', (), {'_initial_response': Response()})()
+
+    etag, modified, size = LoadCache.make_file_token(WebdavFile())
+    assert (etag, modified.isoformat(), size) == ('"e1"', '2024-01-02T08:00:00+00:00', 42)
+
+
+def test_make_file_token_matches_local_info(local_fs, tmp_path):
+    path = (tmp_path / 'data.csv').as_posix()
+    local_fs.pipe_file(path, b'a,b\n1,2\n')
+    with local_fs.open(path, 'rb') as f:
+        assert LoadCache.make_file_token(f) == LoadCache.make_token(local_fs.info(path))
+    assert LoadCache.make_file_token(object()) is None
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+from tools.migrate_to_parquet import migrate_user_folder
+from utils.data_handler import DataHandler
+
+
+def records(n, start='2024-01-01'):
+    return pd.DataFrame({'timestamp': pd.date_range(start, periods=n, freq='D'), 'height': [1.75] * n,
+                         'weight': [70.0 + i for i in range(n)], 'bmi': [22.9] * n,
+                         'category': ['Normalgewicht'] * n})
+
+
+@pytest.fixture
+def folder(tmp_path):
+    return (tmp_path / 'user_data_anna').as_posix()
+
+
+def app_handler(local_fs, folder, compression='gzip'):
+    return DataHandler(local_fs, folder, append_log=True, default_compression=compression)
+
+
+def test_compressed_base_and_segment(local_fs, folder):
+    dh = app_handler(local_fs, folder)
+    dh.save('data.csv', records(5))
+    dh.append('data.csv', records(1, start='2024-02-01'))
+
+    status = migrate_user_folder(local_fs, folder)
+    assert status.startswith("converted 6 rows")
+    converted = dh.load('data.parquet')
+    assert converted['weight'].tolist() == [70.0, 71.0, 72.0, 73.0, 74.0, 70.0]
+    assert converted['timestamp'].iloc[-1] == pd.Timestamp('2024-02-01')
+
+
+def test_compressed_base_only(local_fs, folder):
+    app_handler(local_fs, folder).save('data.csv', records(3))
+    assert migrate_user_folder(local_fs, folder).startswith("converted 3 rows")
+
+
+def test_plain_file_from_before_compression(local_fs, folder):
+    app_handler(local_fs, folder, compression=None).save('data.csv', records(2))
+    assert migrate_user_folder(local_fs, folder).startswith("converted 2 rows")
+
+
+def test_segments_only(local_fs, folder):
+    app_handler(local_fs, folder).append('data.csv', records(2))
+    assert migrate_user_folder(local_fs, folder, dry_run=True) == "would convert 2 rows"
+
+
+def test_skips_folders_without_data_or_with_parquet(local_fs, folder):
+    local_fs.mkdirs(folder)
+    assert migrate_user_folder(local_fs, folder) == "no data.csv, skipped"
+    app_handler(local_fs, folder).save('data.csv', records(2))
+    migrate_user_folder(local_fs, folder)
+    assert migrate_user_folder(local_fs, folder) == "data.parquet exists, skipped"
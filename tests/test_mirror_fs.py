@@ -0,0 +1,232 @@
+import os
+from collections import Counter
+import pytest
+from utils.mirror_fs import MirrorFileSystem
+
+
+class FlakyRemote:
+    """A local filesystem standing in for the remote storage; counts calls and can go offline."""
+
+    def __init__(self, fs):
+        self.fs = fs
+        self.offline = False
+        self.calls = Counter()
+
+    def __getattr__(self, name):
+        attr = getattr(self.fs, name)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self.calls[name] += 1
+            if self.offline:
+                raise ConnectionError('remote unreachable')
+            return attr(*args, **kwargs)
+        return call
+
+
+@pytest.fixture
+def remote(local_fs):
+    return FlakyRemote(local_fs)
+
+
+@pytest.fixture
+def user_folder(tmp_path):
+    folder = tmp_path / 'remote' / 'user_data_anna'
+    folder.mkdir(parents=True)
+    return folder
+
+
+def make_mirror(remote, tmp_path, **kwargs):
+    kwargs.setdefault('sync_interval', 0)
+    return MirrorFileSystem(lambda: remote, (tmp_path / 'mirror').as_posix(), include=r'/user_data_[^/]+/', **kwargs)
+
+
+def read(mirror, path):
+    with mirror.open(path, 'r') as f:
+        return f.read()
+
+
+def write(mirror, path, content):
+    with mirror.open(path, 'w') as f:
+        f.write(content)
+
+
+def test_fresh_copy_is_read_without_remote_calls(remote, tmp_path, user_folder):
+    (user_folder / 'data.csv').write_text('a\n1\n')
+    mirror = make_mirror(remote, tmp_path, max_age=60)
+    path = (user_folder / 'data.csv').as_posix()
+
+    assert read(mirror, path) == 'a\n1\n'
+    assert remote.calls['get_file'] == 1
+    remote.calls.clear()
+    assert read(mirror, path) == 'a\n1\n'
+    assert not remote.calls
+
+
+def test_stale_copy_is_revalidated_and_downloaded_again_if_changed(remote, tmp_path, user_folder):
+    (user_folder / 'data.csv').write_text('a\n1\n')
+    mirror = make_mirror(remote, tmp_path, max_age=0)
+    path = (user_folder / 'data.csv').as_posix()
+    read(mirror, path)
+
+    remote.calls.clear()
+    assert read(mirror, path) == 'a\n1\n'
+    assert remote.calls['info'] == 1 and remote.calls['get_file'] == 0
+
+    (user_folder / 'data.csv').write_text('a\n1\n2\n')  # changed by another process
+    assert read(mirror, path) == 'a\n1\n2\n'
+    assert remote.calls['get_file'] == 1
+
+
+def test_offline_reads_are_served_from_copies(remote, tmp_path, user_folder):
+    (user_folder / 'data.csv').write_text('a\n1\n')
+    mirror = make_mirror(remote, tmp_path, max_age=0)
+    path = (user_folder / 'data.csv').as_posix()
+    read(mirror, path)
+
+    remote.offline = True
+    assert read(mirror, path) == 'a\n1\n'
+    assert not mirror.online
+    with pytest.raises(ConnectionError):
+        read(mirror, (user_folder / 'never_read.csv').as_posix())
+
+
+def test_offline_writes_are_queued_and_synced(remote, tmp_path, user_folder):
+    (user_folder / 'data.csv').write_text('a\n1\n')
+    mirror = make_mirror(remote, tmp_path)
+    path = (user_folder / 'data.csv').as_posix()
+    read(mirror, path)
+
+    remote.offline = True
+    write(mirror, path, 'a\n1\n2\n')
+    write(mirror, (user_folder / 'new.txt').as_posix(), 'neu')
+    assert mirror.pending_count() == 2
+    assert read(mirror, path) == 'a\n1\n2\n'
+    assert (user_folder / 'data.csv').read_text() == 'a\n1\n'
+    assert not mirror.sync()
+
+    remote.offline = False
+    assert mirror.sync()
+    assert mirror.online
+    assert mirror.pending_count() == 0
+    assert (user_folder / 'data.csv').read_text() == 'a\n1\n2\n'
+    assert (user_folder / 'new.txt').read_text() == 'neu'
+
+
+def test_queued_writes_survive_a_restart(remote, tmp_path, user_folder):
+    mirror = make_mirror(remote, tmp_path)
+    path = (user_folder / 'data.csv').as_posix()
+    remote.offline = True
+    write(mirror, path, 'a\n1\n')
+
+    remote.offline = False
+    restarted = make_mirror(remote, tmp_path)
+    assert restarted.pending_count() == 1
+    assert restarted.sync()
+    assert (user_folder / 'data.csv').read_text() == 'a\n1\n'
+
+
+def test_sync_reconciles_changed_and_deleted_files(remote, tmp_path, user_folder):
+    (user_folder / 'a.csv').write_text('x\n1\n')
+    (user_folder / 'b.csv').write_text('x\n2\n')
+    mirror = make_mirror(remote, tmp_path)
+    for name in ('a.csv', 'b.csv'):
+        read(mirror, (user_folder / name).as_posix())
+
+    (user_folder / 'a.csv').write_text('x\n1\n3\n')
+    (user_folder / 'b.csv').unlink()
+    remote.calls.clear()
+    assert mirror.sync()
+    assert remote.calls['ls'] == 1
+
+    remote.calls.clear()
+    assert read(mirror, (user_folder / 'a.csv').as_posix()) == 'x\n1\n3\n'
+    assert not remote.calls  # downloaded by the sync
+    with pytest.raises(FileNotFoundError):
+        read(mirror, (user_folder / 'b.csv').as_posix())
+
+
+def test_least_recently_used_clean_copies_are_evicted(remote, tmp_path, user_folder):
+    for name in ('a', 'b', 'c'):
+        (user_folder / f'{name}.txt').write_text(name * 10)
+    mirror = make_mirror(remote, tmp_path, max_bytes=25)
+    for name in ('a', 'b', 'c'):
+        read(mirror, (user_folder / f'{name}.txt').as_posix())
+
+    assert mirror.current_bytes == 20
+    local_a = os.path.join(mirror.local_root, *(user_folder / 'a.txt').as_posix().strip('/').split('/'))
+    assert not os.path.exists(local_a)
+    remote.calls.clear()
+    read(mirror, (user_folder / 'c.txt').as_posix())
+    assert not remote.calls
+
+
+def test_copies_with_queued_writes_are_not_evicted(remote, tmp_path, user_folder):
+    for name in ('b', 'c'):
+        (user_folder / f'{name}.txt').write_text(name * 10)
+    mirror = make_mirror(remote, tmp_path, max_bytes=25)
+    remote.offline = True
+    write(mirror, (user_folder / 'a.txt').as_posix(), 'a' * 10)
+    remote.offline = False
+    mirror.online = True  # reachable again, but the upload stays queued until the next sync
+    for name in ('b', 'c'):
+        read(mirror, (user_folder / f'{name}.txt').as_posix())
+
+    assert mirror.pending_count() == 1
+    assert read(mirror, (user_folder / 'a.txt').as_posix()) == 'a' * 10
+    assert mirror.current_bytes <= 25
+
+
+def test_paths_outside_include_are_passed_through(remote, tmp_path):
+    shared = tmp_path / 'remote' / 'credentials.yaml'
+    shared.parent.mkdir(parents=True, exist_ok=True)
+    shared.write_text('usernames: {}\n')
+    mirror = make_mirror(remote, tmp_path)
+
+    assert read(mirror, shared.as_posix()) == 'usernames: {}\n'
+    assert read(mirror, shared.as_posix()) == 'usernames: {}\n'
+    assert remote.calls['open'] == 2
+    assert remote.calls['get_file'] == 0
+
+
+def test_revalidated_copies_are_only_a_fallback(remote, tmp_path):
+    shard = tmp_path / 'remote' / 'credentials' / '000.yaml'
+    shard.parent.mkdir(parents=True)
+    shard.write_text('usernames: {}\n')
+    mirror = MirrorFileSystem(lambda: remote, (tmp_path / 'mirror').as_posix(), include=r'/credentials/',
+                              max_age=60, sync_interval=0, revalidate=r'/credentials/')
+    read(mirror, shard.as_posix())
+
+    shard.write_text('usernames: {anna: {}}\n')  # e.g. a conditional upload around the mirror
+    assert read(mirror, shard.as_posix()) == 'usernames: {anna: {}}\n'
+    remote.offline = True
+    assert read(mirror, shard.as_posix()) == 'usernames: {anna: {}}\n'
+
+
+def test_data_manager_starts_and_logs_in_during_an_outage(tmp_path, monkeypatch):
+    from utils.credential_store import CredentialStore
+    from utils.data_manager import DataManager
+
+    def session():
+        dm = object.__new__(DataManager)  # bypass the session-state singleton
+        dm.__init__(fs_protocol='file', fs_root_folder=(tmp_path / 'remote').as_posix(), cache_max_bytes=0,
+                    mirror_folder=(tmp_path / 'mirror').as_posix(), mirror_sync_interval=0)
+        return dm
+
+    dm = session()
+    CredentialStore(dm).put('anna', {'name': 'Anna', 'password': 'hash'})
+    dm._get_user_data_handler('anna').save('settings.json', {'unit': 'kg'})
+    assert CredentialStore(dm).load_all()['usernames']['anna']['name'] == 'Anna'
+
+    def unreachable():
+        raise ConnectionError('WebDAV server unreachable')
+    monkeypatch.setattr(dm.fs_pool, '_fs', None)  # the next request connects again, and fails
+    monkeypatch.setattr(dm.fs_pool, '_create', unreachable)
+
+    dm = session()  # a new session during the outage
+    assert CredentialStore(dm).load_all()['usernames']['anna']['name'] == 'Anna'
+    dh = dm._get_user_data_handler('anna')
+    assert dh.load('settings.json') == {'unit': 'kg'}
+    dh.save('settings.json', {'unit': 'lb'})
+    assert dm.mirror.pending_count() == 1
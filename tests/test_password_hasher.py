@@ -0,0 +1,82 @@
+import threading
+import pytest
+import streamlit as st
+from streamlit_authenticator.utilities import Hasher
+from utils.login_manager import LoginManager
+from utils.password_hasher import HashingBusyError, PasswordHasher, hash_rounds
+
+
+@pytest.fixture
+def hasher():
+    return PasswordHasher(rounds=4, max_workers=1, max_pending=2, wait_timeout=0.1)
+
+
+@pytest.fixture
+def authenticator_hasher(monkeypatch):
+    # install() patches the class; restore it after the test
+    for name in ('hash', 'check_pw'):
+        monkeypatch.setattr(Hasher, name, vars(Hasher)[name])
+    monkeypatch.setattr(st, 'session_state', {})
+    return Hasher
+
+
+def test_hash_and_check(hasher):
+    hashed = hasher.hash('Geheim1!')
+    assert hash_rounds(hashed) == 4
+    assert hasher.check('Geheim1!', hashed) and not hasher.check('falsch', hashed)
+    assert hasher.pending == 0 and hasher.peak_pending == 1
+
+
+def test_needs_rehash(hasher):
+    assert not hasher.needs_rehash(hasher.hash('Geheim1!'))
+    assert PasswordHasher(rounds=5).needs_rehash(hasher.hash('Geheim1!'))
+    assert not hasher.needs_rehash('not a bcrypt hash')
+
+
+def test_rounds_are_validated():
+    with pytest.raises(ValueError):
+        PasswordHasher(rounds=3)
+
+
+def test_calls_beyond_max_pending_are_rejected(hasher):
+    release = threading.Event()
+    blocked = [threading.Thread(target=hasher._run, args=('hash', lambda: release.wait(5))) for _ in range(2)]
+    for thread in blocked:
+        thread.start()
+    try:
+        with pytest.raises(HashingBusyError):
+            hasher.hash('Geheim1!')
+        assert hasher.rejected == 1 and hasher.pending == 2
+    finally:
+        release.set()
+        for thread in blocked:
+            thread.join()
+    assert hasher.pending == 0 and hasher.check('Geheim1!', hasher.hash('Geheim1!'))
+
+
+def test_install_routes_authenticator_and_rehashes_on_login(hasher, authenticator_hasher):
+    old_hash = PasswordHasher(rounds=5).hash('Geheim1!')
+    hasher.install()
+
+    assert hash_rounds(Hasher.hash('Geheim1!')) == 4
+    assert not Hasher.check_pw('falsch', old_hash)
+    assert 'password_rehash' not in st.session_state
+    assert Hasher.check_pw('Geheim1!', old_hash)
+    stored, new_hash = st.session_state['password_rehash']
+    assert stored == old_hash and hash_rounds(new_hash) == 4 and hasher.check('Geheim1!', new_hash)
+
+
+def test_login_manager_reads_password_hashing_settings(monkeypatch):
+    created = {}
+    monkeypatch.setattr(st, 'secrets', {'password_hashing': {'bcrypt_rounds': 10, 'hash_workers': 4,
+                                                             'hash_max_pending': 8, 'hash_wait_timeout': '2.5'}})
+    monkeypatch.setattr('utils.login_manager.get_password_hasher', lambda **kwargs: created.update(kwargs))
+    manager = object.__new__(LoginManager)  # bypass the session-state singleton
+    manager.data_manager = type('DataManager', (), {'metrics': None})()
+
+    manager._init_password_hasher()
+    assert created == {'rounds': 10, 'max_workers': 4, 'max_pending': 8, 'wait_timeout': 2.5, '_metrics': None}
+
+    monkeypatch.setattr(st, 'secrets', {})
+    manager._init_password_hasher()
+    assert created == {'rounds': 12, 'max_workers': 2, 'max_pending': 32, 'wait_timeout': 10.0, '_metrics': None}
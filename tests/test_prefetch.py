@@ -0,0 +1,52 @@
+import threading
+import pytest
+from utils.data_manager import DataManager, PrefetchExecutor
+
+
+@pytest.fixture
+def manager(tmp_path):
+    dm = object.__new__(DataManager)  # bypass the session-state singleton
+    dm.__init__(fs_protocol='file', fs_root_folder=tmp_path.as_posix(), cache_max_bytes=0,
+                prefetch={'settings.json': {}})
+    dm._get_user_data_handler('anna').save('settings.json', {'unit': 'kg'})
+    return dm
+
+
+def test_executor_skips_work_beyond_max_pending():
+    executor = PrefetchExecutor(max_workers=1, max_pending=2)
+    release = threading.Event()
+    running = executor.try_submit(lambda: release.wait(5))
+    queued = executor.try_submit(lambda: 'queued')
+    assert executor.try_submit(lambda: 'skipped') is None
+
+    assert queued.cancel()
+    cancelled_slot = executor.try_submit(lambda: 'after cancel')
+    assert cancelled_slot is not None
+    release.set()
+    assert running.result(5) and cancelled_slot.result(5) == 'after cancel'
+    assert executor.try_submit(lambda: 'free').result(5) == 'free'
+
+
+def test_prefetch_is_used_by_the_first_load(manager):
+    assert manager.prefetch_user_data('anna')
+    future = manager._take_prefetched('anna', 'settings.json', {})
+    assert future.result(5) == {'unit': 'kg'}
+    assert manager._take_prefetched('anna', 'settings.json', {}) is None
+
+
+def test_prefetch_runs_once_per_user_and_session(manager):
+    assert manager.prefetch_user_data('anna')
+    manager.discard_prefetch()  # e.g. the password was wrong
+    assert not manager.prefetch_user_data('anna')
+    assert not manager._prefetched
+
+
+def test_prefetch_is_skipped_while_the_pool_is_busy(manager, monkeypatch):
+    busy = PrefetchExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    busy.try_submit(lambda: release.wait(5))
+    monkeypatch.setattr('utils.data_manager.get_prefetch_executor', lambda: busy)
+
+    assert not manager.prefetch_user_data('anna')
+    assert not manager._prefetched
+    release.set()
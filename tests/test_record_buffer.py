@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+import pytest
+from utils.record_buffer import RecordBuffer, compact_frame
+
+
+def test_append_fills_missing_and_new_columns():
+    buffer = RecordBuffer(capacity=1)
+    buffer.append({'weight': 70.5, 'category': 'Normal'})
+    buffer.append({'weight': 71.0})
+    buffer.append({'height': 1.8})
+
+    df = buffer.to_frame()
+    assert len(buffer) == 3
+    assert buffer.columns == ['weight', 'category', 'height']
+    assert df['weight'].iloc[:2].tolist() == [70.5, 71.0]
+    assert df['category'].iloc[1:].isna().all()
+    assert df['height'].iloc[:2].isna().all()
+    assert buffer.capacity >= 3
+
+
+def test_extend_with_frame_and_records():
+    buffer = RecordBuffer.from_frame(pd.DataFrame({'bmi': [20.1, 21.2]}))
+    buffer.extend(pd.DataFrame({'bmi': [22.3], 'weight': [70.0]}))
+    buffer.extend([{'bmi': 23.4}, {'bmi': 24.5, 'weight': 72.0}])
+
+    df = buffer.to_frame()
+    assert df['bmi'].tolist() == [20.1, 21.2, 22.3, 23.4, 24.5]
+    assert df['weight'].isna().tolist() == [True, True, False, True, False]
+
+
+def test_widen_int_to_float():
+    buffer = RecordBuffer()
+    buffer.append({'count': 1})
+    buffer.append({'count': 2.5})
+    assert buffer.to_frame()['count'].tolist() == [1.0, 2.5]
+
+
+def test_widen_to_object_for_mixed_kinds():
+    buffer = RecordBuffer()
+    buffer.append({'value': 1.5})
+    buffer.append({'value': 'n/a'})
+    assert buffer.to_frame()['value'].tolist() == [1.5, 'n/a']
+
+
+def test_widen_keeps_float_values_exact():
+    buffer = RecordBuffer.from_frame(pd.DataFrame({'height': [1.8, 1.75]}))
+    buffer.extend(pd.DataFrame({'height': [1.123456789]}))
+    buffer.append({'height': 22.9})
+    assert buffer.to_frame()['height'].tolist() == [1.8, 1.75, 1.123456789, 22.9]
+
+
+def test_widen_datetime_keeps_sub_second_values():
+    buffer = RecordBuffer.from_frame(pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01 10:00:00'])}))
+    buffer.append({'timestamp': pd.Timestamp('2024-01-02 10:00:00.250')})
+    assert buffer.to_frame()['timestamp'].tolist() == [pd.Timestamp('2024-01-01 10:00:00'),
+                                                       pd.Timestamp('2024-01-02 10:00:00.250')]
+
+
+def test_to_frame_is_read_only_and_cached():
+    buffer = RecordBuffer()
+    buffer.append({'weight': 70.0})
+    df = buffer.to_frame()
+    assert buffer.to_frame() is df
+    with pytest.raises(ValueError):
+        df['weight'].to_numpy()[0] = 0.0
+
+
+def test_earlier_frames_stay_unchanged_after_appends():
+    buffer = RecordBuffer(capacity=2)
+    buffer.append({'weight': 70.0, 'category': 'Normal'})
+    before = buffer.to_frame()
+    for i in range(10):  # several reallocations
+        buffer.append({'weight': 80.0 + i, 'category': 'Übergewicht', 'bmi': 25.0})
+
+    assert buffer.to_frame() is not before
+    assert len(before) == 1
+    assert list(before.columns) == ['weight', 'category']
+    assert before['weight'].tolist() == [70.0]
+    assert len(buffer.to_frame()) == 11
+
+
+def test_categorical_extension():
+    df = pd.DataFrame({'category': pd.Categorical(['Normal', 'Normal']), 'bmi': [22.0, 23.0]})
+    buffer = RecordBuffer.from_frame(df)
+    before = buffer.to_frame()
+    buffer.append({'category': 'Übergewicht', 'bmi': 26.0})
+    buffer.extend(pd.DataFrame({'category': ['Untergewicht', None], 'bmi': [17.0, 20.0]}))
+
+    after = buffer.to_frame()
+    assert isinstance(after['category'].dtype, pd.CategoricalDtype)
+    assert list(after['category'].cat.categories) == ['Normal', 'Übergewicht', 'Untergewicht']
+    assert after['category'].tolist()[:4] == ['Normal', 'Normal', 'Übergewicht', 'Untergewicht']
+    assert pd.isna(after['category'].iloc[4])
+    assert list(before['category'].cat.categories) == ['Normal']
+    assert before['category'].tolist() == ['Normal', 'Normal']
+
+
+def test_categorical_codes_widen_with_many_categories():
+    buffer = RecordBuffer.from_frame(pd.DataFrame({'tag': pd.Categorical(['t0'])}))
+    buffer.extend(pd.DataFrame({'tag': [f't{i}' for i in range(1, 300)]}))
+    assert buffer.to_frame()['tag'].tolist() == [f't{i}' for i in range(300)]
+    assert buffer._columns['tag'].dtype.itemsize >= np.dtype(np.int16).itemsize
+
+
+def test_compact_frame_keeps_values_exact():
+    df = pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-01 08:00:00', '2024-01-02 08:00:00']),
+                       'weight': [22.9, 70.15], 'category': ['Normalgewicht', 'Normalgewicht']})
+    compact = compact_frame(df)
+    assert compact['timestamp'].dtype == 'datetime64[s]'
+    assert compact['weight'].dtype == np.float64
+    assert isinstance(compact['category'].dtype, pd.CategoricalDtype)
+
+    buffer = RecordBuffer.from_frame(compact)
+    buffer.extend(pd.DataFrame({'weight': [71.3]}))
+    merged = pd.concat([buffer.to_frame(), pd.DataFrame({'weight': [72.1]})], ignore_index=True)
+    assert merged['weight'].tolist() == [22.9, 70.15, 71.3, 72.1]
+    assert merged.to_csv(index=False, columns=['weight']).split() == ['weight', '22.9', '70.15', '71.3', '72.1']
@@ -0,0 +1,92 @@
+import threading
+import pandas as pd
+import pytest
+from utils.data_manager import DataManager
+from utils.record_buffer import compact_frame
+from utils.rollups import TimeRollups, period_start
+
+
+def records():
+    return pd.DataFrame({'timestamp': pd.to_datetime(['2024-01-30 08:00', '2024-02-05 08:00', '2024-02-06 20:00',
+                                                      '2024-03-01 07:00', None]),
+                         'weight': [70.0, 71.0, 73.0, 72.0, 99.0]})
+
+
+@pytest.mark.parametrize('granularity, expected', [('day', '2024-02-07'), ('week', '2024-02-05'),
+                                                   ('month', '2024-02-01')])
+def test_period_start(granularity, expected):
+    assert period_start('2024-02-07 15:30', granularity) == expected
+
+
+def test_from_frame_matches_added_records():
+    built = TimeRollups.from_frame(records())
+    added = TimeRollups()
+    added.extend(records())
+    assert added.periods == built.periods
+    assert added.n_records == built.n_records == 5
+    assert added.fingerprint == built.fingerprint
+
+
+def test_is_current_detects_edits_with_the_same_count():
+    rollups = TimeRollups.from_frame(records())
+    edited = records()
+    edited.loc[1, 'weight'] = 75.0
+    replaced = records()
+    replaced.loc[4, 'timestamp'] = pd.Timestamp('2024-03-02 07:00')
+    assert rollups.is_current(records().iloc[::-1])
+    assert not rollups.is_current(edited)
+    assert not rollups.is_current(replaced)
+    assert not rollups.is_current(records(), columns=('weight',))
+
+
+def test_is_current_after_storage_round_trip(tmp_path):
+    rollups = TimeRollups.from_frame(records().iloc[:2])
+    session_rows = compact_frame(records().iloc[2:].reset_index(drop=True))  # as in the session data
+    rollups.extend(session_rows)
+    path = tmp_path / 'data.csv'
+    pd.concat([records().iloc[:2], session_rows]).to_csv(path, index=False)
+    assert rollups.is_current(pd.read_csv(path, parse_dates=['timestamp']))
+
+
+def test_series_aggregates_per_period():
+    series = TimeRollups.from_frame(records()).series('weight', 'month')
+    assert series.index.strftime('%Y-%m-%d').tolist() == ['2024-01-01', '2024-02-01', '2024-03-01']
+    assert series['count'].tolist() == [1, 2, 1]
+    assert series.loc['2024-02-01', ['mean', 'min', 'max']].tolist() == [72.0, 71.0, 73.0]
+
+
+@pytest.mark.parametrize('granularity, expected', [
+    ('day', ['2024-02-06', '2024-03-01']),
+    ('week', ['2024-02-05', '2024-02-26']),
+    ('month', ['2024-02-01', '2024-03-01']),
+])
+def test_series_keeps_period_containing_start(granularity, expected):
+    rollups = TimeRollups.from_frame(records())
+    series = rollups.series('weight', granularity, pd.Timestamp('2024-02-06 12:00'), pd.Timestamp('2024-03-01 07:00'))
+    assert series.index.strftime('%Y-%m-%d').tolist() == expected
+
+
+def test_from_dict_round_trip_and_version():
+    rollups = TimeRollups.from_frame(records())
+    restored = TimeRollups.from_dict(rollups.to_dict())
+    assert restored.periods == rollups.periods
+    assert restored.is_current(records())
+    assert TimeRollups.from_dict({**rollups.to_dict(), 'version': 0}) is None
+
+
+def test_append_rollups_saves_in_update_order():
+    dm = object.__new__(DataManager)  # bypass the session-state singleton
+    rollups, saved, other_session = TimeRollups(), [], []
+
+    def save_user_data(data, file_name):
+        if not other_session:  # another session of the user appends meanwhile
+            other_session.append(threading.Thread(
+                target=dm.append_rollups, args=(rollups, [{'timestamp': '2024-01-02', 'weight': 71.0}])))
+            other_session[0].start()
+            other_session[0].join(0.2)
+        saved.append(data['n_records'])
+    dm.save_user_data = save_user_data
+
+    dm.append_rollups(rollups, [{'timestamp': '2024-01-01', 'weight': 70.0}])
+    other_session[0].join(5)
+    assert saved == [1, 2]
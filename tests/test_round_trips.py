@@ -0,0 +1,102 @@
+import pandas as pd
+import pytest
+from utils.data_handler import DataHandler
+from utils.io_metrics import InstrumentedFileSystem, IOMetrics
+from utils.load_cache import LoadCache
+
+
+class Requests:
+    """Counts the storage requests of DataHandlers configured like app.py."""
+
+    def __init__(self, local_fs, root):
+        self.metrics = IOMetrics()
+        self.fs = InstrumentedFileSystem(local_fs, self.metrics, scope=('session', 1))
+        self.root = root
+        self.cache = LoadCache()
+        self.known_dirs, self.plain_files = set(), {}
+        self._seen = 0
+
+    def handler(self):
+        return DataHandler(self.fs, self.root, append_log=True, cache=self.cache, minimize_round_trips=True,
+                           known_dirs=self.known_dirs, default_compression='gzip', plain_files=self.plain_files)
+
+    def since_last(self):
+        """Returns the number of requests since the last call."""
+        rows = self.metrics.totals()
+        total = sum(row['count'] for row in rows)
+        n, self._seen = total - self._seen, total
+        return n
+
+    def bytes_read(self):
+        return sum(row['bytes_read'] for row in self.metrics.totals())
+
+
+@pytest.fixture
+def requests(local_fs, tmp_path):
+    return Requests(local_fs, (tmp_path / 'user_data_anna').as_posix())
+
+
+def records(n):
+    return pd.DataFrame({'timestamp': pd.date_range('2024-01-01', periods=n, freq='D'),
+                         'height': [1.75] * n, 'weight': [70.0] * n})
+
+
+def test_saves(requests):
+    dh = requests.handler()
+    dh.save('rollups.json', {'daily': {}})
+    assert requests.since_last() == 3  # the folder is created when the first write fails
+    dh.save('rollups.json', {'daily': {'2024-01-01': [1, 22.9]}})
+    assert requests.since_last() == 1
+    dh.save('data.csv', records(3))
+    assert requests.since_last() == 2  # write and segment listing
+
+
+def test_loads_validate_the_cache_with_the_download(requests):
+    dh = requests.handler()
+    dh.save('rollups.json', {'daily': {}})
+    dh.save('data.csv', records(3))
+    requests.since_last()
+
+    for _ in range(2):
+        assert requests.handler().load('rollups.json') == {'daily': {}}
+        assert requests.since_last() == 1
+        assert len(requests.handler().load('data.csv', parse_dates=['timestamp'])) == 3
+        assert requests.since_last() == 2  # segment listing and download
+    assert requests.cache.hits == 2
+
+
+def test_cache_hit_reads_no_content(requests):
+    requests.handler().save('rollups.json', {'daily': {}})
+    requests.handler().load('rollups.json')
+    read = requests.bytes_read()
+    assert read > 0
+    requests.handler().load('rollups.json')
+    assert requests.bytes_read() == read
+
+
+def test_changed_file_is_reloaded(requests):
+    requests.handler().save('rollups.json', {'daily': {}})
+    requests.handler().load('rollups.json')
+    other = DataHandler(requests.fs.fs, requests.root, default_compression='gzip')  # e.g. another process
+    other.save('rollups.json', {'daily': {'2024-01-01': [1, 22.9]}})
+    assert requests.handler().load('rollups.json') == {'daily': {'2024-01-01': [1, 22.9]}}
+
+
+def test_appends(requests):
+    dh = requests.handler()
+    dh.save('data.csv', records(3))
+    requests.since_last()
+    dh.append('data.csv', records(1))
+    requests.since_last()  # the first one creates the segment folder
+    dh.append('data.csv', records(1))
+    assert requests.since_last() == 2  # segment write and listing
+
+
+def test_missing_file(requests):
+    dh = requests.handler()
+    dh.save('data.csv', records(1))
+    requests.since_last()
+    assert dh.load('rollups.json', initial_value={}) == {}
+    assert requests.since_last() == 2  # both names, once
+    assert requests.handler().load('rollups.json', initial_value={}) == {}
+    assert requests.since_last() == 1
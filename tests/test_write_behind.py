@@ -0,0 +1,111 @@
+import threading
+import pytest
+from utils.write_behind import WriteBehindQueue
+
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    monkeypatch.setattr('utils.write_behind.time.sleep', lambda seconds: None)
+
+
+def test_writes_to_a_path_run_in_order():
+    write_queue = WriteBehindQueue(workers=4)
+    done = []
+    for i in range(50):
+        write_queue.submit('a.csv', lambda i=i: done.append(i))
+    assert write_queue.flush(5)
+    assert done == list(range(50))
+    assert write_queue.pending_count() == 0
+
+
+def test_coalescable_writes_keep_only_the_latest():
+    write_queue = WriteBehindQueue(workers=1)
+    started, release = threading.Event(), threading.Event()
+    done = []
+
+    def blocking_write():
+        started.set()
+        release.wait(5)
+        done.append('first')
+
+    write_queue.submit('data.csv', blocking_write, coalesce=True)
+    assert started.wait(5)
+    for version in range(3):
+        write_queue.submit('data.csv', lambda version=version: done.append(version), coalesce=True)
+    write_queue.submit('data.csv', lambda: done.append('append'))
+    write_queue.submit('data.csv', lambda: done.append('save'), coalesce=True)
+    assert write_queue.pending_count() == 4
+
+    release.set()
+    assert write_queue.flush(5)
+    assert done == ['first', 2, 'append', 'save']
+
+
+def test_failed_write_is_retried(no_backoff):
+    write_queue = WriteBehindQueue(max_retries=3)
+    attempts = []
+
+    def flaky_write():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise OSError('temporarily unavailable')
+
+    write_queue.submit('a.csv', flaky_write)
+    assert write_queue.flush(5)
+    assert len(attempts) == 3
+    assert not write_queue.failed_writes()
+
+
+def test_write_failing_all_attempts_is_recorded(no_backoff):
+    write_queue = WriteBehindQueue(max_retries=2)
+    done = []
+
+    def failing_write():
+        raise OSError('storage down')
+
+    write_queue.submit('anna/a.csv', failing_write, group='anna')
+    write_queue.submit('anna/a.csv', lambda: done.append('next'), group='anna')
+    assert write_queue.flush(5)
+    assert [(path, error) for path, error, _ in write_queue.failed_writes()] == [('anna/a.csv', 'storage down')]
+    assert len(write_queue.failed_writes('anna')) == 1
+    assert write_queue.failed_writes('bert') == []
+    assert done == ['next']
+
+
+def test_submit_blocks_while_queue_is_full():
+    write_queue = WriteBehindQueue(max_pending=1, workers=1)
+    release = threading.Event()
+    write_queue.submit('a.csv', lambda: release.wait(5))
+    submitted = threading.Event()
+    threading.Thread(target=lambda: (write_queue.submit('b.csv', lambda: None), submitted.set()),
+                     daemon=True).start()
+
+    assert not submitted.wait(0.2)
+    release.set()
+    assert submitted.wait(5)
+    assert write_queue.flush(5)
+
+
+def test_flush_times_out():
+    write_queue = WriteBehindQueue(workers=1)
+    release = threading.Event()
+    write_queue.submit('a.csv', lambda: release.wait(5))
+    assert not write_queue.flush(0.05)
+    release.set()
+    assert write_queue.flush(5)
+
+
+def test_pending_and_flush_per_group():
+    write_queue = WriteBehindQueue(workers=2)
+    release = threading.Event()
+    write_queue.submit('bert/data.csv', lambda: release.wait(5), group='bert')
+    write_queue.submit('anna/data.csv', lambda: None, group='anna')
+
+    assert write_queue.flush(5, group='anna')
+    assert write_queue.pending_count('anna') == 0
+    assert write_queue.pending_count('bert') == 1
+    assert write_queue.pending_count() == 1
+    assert not write_queue.flush(0.05, group='bert')
+    release.set()
+    assert write_queue.flush(5, group='bert')
+    assert write_queue.pending_count() == 0
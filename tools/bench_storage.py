@@ -0,0 +1,215 @@
+"""
+Storage benchmark for DataHandler and DataManager at realistic history sizes and latencies.
+
+Runs load/save/append against a local fsspec backend (memory or local disk) or a
+local WebDAV server (requires wsgidav and cheroot), wrapped in a LatencyFileSystem
+that adds per-request latency and a bandwidth limit. Reports p50/p99 timings,
+round trips and bytes per operation.
+
+Run from the repository root:
+
+    python -m tools.bench_storage                                  # defaults
+    python -m tools.bench_storage --latency 0.08 --bandwidth 2e6 --records 100 10000
+    python -m tools.bench_storage --save bench/baseline.json
+    python -m tools.bench_storage --compare bench/baseline.json    # exits 1 on regressions
+"""
+import argparse, json, os, platform, posixpath, sys, tempfile, threading, time, uuid
+import fsspec
+import numpy as np
+import pandas as pd
+from functions.bmi_calculator import calculate_bmi_batch
+from utils.data_handler import DataHandler
+from utils.data_manager import DataManager
+from utils.data_schema import BMI_DATA_SCHEMA
+from utils.load_cache import LoadCache
+from utils.record_buffer import RecordBuffer
+from tools.latency_fs import LatencyFileSystem
+
+
+def make_history(n_records, seed=0):
+    """Returns a synthetic BMI history with n_records rows."""
+    rng = np.random.default_rng(seed)
+    df = calculate_bmi_batch(rng.uniform(1.5, 2.0, n_records), rng.uniform(45, 120, n_records))
+    df['category'] = df['category'].astype(str)
+    df['timestamp'] = pd.Timestamp('2020-01-01') + pd.to_timedelta(np.arange(n_records), unit='h')
+    return df
+
+
+def make_record(i):
+    """Returns one new BMI record."""
+    return {'height': 1.75, 'weight': 70.0 + i % 10, 'bmi': 23.5, 'category': 'Normalgewicht',
+            'timestamp': pd.Timestamp('2030-01-01') + pd.Timedelta(minutes=i)}
+
+
+def open_backend(backend):
+    """
+    Creates the filesystem under test.
+
+    Returns:
+        tuple: (fsspec filesystem, root folder, cleanup function).
+    """
+    if backend == 'memory':
+        root = f'/bench-{uuid.uuid4().hex}'
+        fs = fsspec.filesystem('memory')
+        return fs, root, lambda: fs.rm(root, recursive=True)
+    if backend == 'local':
+        tmp = tempfile.TemporaryDirectory()
+        return fsspec.filesystem('file'), tmp.name, tmp.cleanup
+    if backend == 'webdav':
+        return start_webdav_server()
+    raise ValueError(f"Unknown backend: {backend}")
+
+
+def start_webdav_server():
+    """Starts a local WebDAV server (wsgidav + cheroot) in a background thread."""
+    try:
+        from cheroot import wsgi
+        from wsgidav.wsgidav_app import WsgiDAVApp
+    except ImportError:
+        sys.exit("The webdav backend needs: pip install wsgidav cheroot")
+    tmp = tempfile.TemporaryDirectory()
+    app = WsgiDAVApp({'provider_mapping': {'/': tmp.name}, 'simple_dc': {'user_mapping': {'*': True}},
+                      'verbose': 0, 'logging': {'enable': False}})
+    server = wsgi.Server(('127.0.0.1', 0), app)
+    server.prepare()
+    threading.Thread(target=server.serve, daemon=True).start()
+    port = server.bind_addr[1]
+    fs = fsspec.filesystem('webdav', base_url=f'http://127.0.0.1:{port}', skip_instance_cache=True)
+
+    def cleanup():
+        server.stop()
+        tmp.cleanup()
+    return fs, 'bench', cleanup
+
+
+def measure(fn, repeat, fs):
+    """
+    Runs fn repeat times and collects timings and I/O counters.
+
+    Returns:
+        dict: p50/p99/mean in milliseconds, median round trips and mean bytes per call.
+    """
+    timings, round_trips, transferred = [], [], []
+    for i in range(repeat):
+        fs.reset()
+        start = time.perf_counter()
+        fn(i)
+        timings.append((time.perf_counter() - start) * 1000)
+        counters = fs.counters()
+        round_trips.append(counters['round_trips'])
+        transferred.append(counters['bytes_read'] + counters['bytes_written'])
+    return {'p50_ms': float(np.percentile(timings, 50)), 'p99_ms': float(np.percentile(timings, 99)),
+            'mean_ms': float(np.mean(timings)), 'round_trips': float(np.median(round_trips)),
+            'bytes': float(np.mean(transferred))}
+
+
+def run_scenarios(fs, root, record_counts, formats, repeat):
+    """
+    Runs all benchmark scenarios.
+
+    Returns:
+        list of dict: One result per scenario, format and record count.
+    """
+    results = []
+    for n_records in record_counts:
+        history = make_history(n_records)
+        for fmt in formats:
+            file_name = f'data.{fmt}'
+            folder = posixpath.join(root, f'user_data_{fmt}_{n_records}')
+            schema = BMI_DATA_SCHEMA if fmt == 'parquet' else None
+            dh = DataHandler(fs, folder, parquet_schema=schema)
+            dh_cached = DataHandler(fs, folder, cache=LoadCache(), parquet_schema=schema)
+            dh_log = DataHandler(fs, folder + '_log', append_log=True, parquet_schema=schema)
+            dh.save(file_name, history)
+            dh_log.save(file_name, history)
+
+            scenarios = {
+                'save': lambda i: dh.save(file_name, history),
+                'load': lambda i: dh.load(file_name, parse_dates=['timestamp']),
+                'load_cached': lambda i: dh_cached.load(file_name, parse_dates=['timestamp']),
+                'append_rewrite': lambda i: dh.append(file_name, make_record(i)),
+                'append_log': lambda i: dh_log.append(file_name, make_record(i)),
+            }
+            for name, fn in scenarios.items():
+                result = measure(fn, repeat, fs)
+                results.append({'scenario': name, 'format': fmt, 'records': n_records, **result})
+                print_result(results[-1])
+
+        # In-memory appends, no I/O
+        buffer = RecordBuffer.from_frame(history)
+        for name, fn in {
+            'append_record_df': lambda i: DataManager.append_record(history, make_record(i)),
+            'append_record_buffer': lambda i: DataManager.append_record(buffer, make_record(i)),
+        }.items():
+            result = measure(fn, repeat, fs)
+            results.append({'scenario': name, 'format': '-', 'records': n_records, **result})
+            print_result(results[-1])
+    return results
+
+
+def print_result(r):
+    print(f"{r['scenario']:<22}{r['format']:<9}{r['records']:>8}  p50 {r['p50_ms']:9.2f} ms  "
+          f"p99 {r['p99_ms']:9.2f} ms  {r['round_trips']:5.1f} RT  {r['bytes'] / 1024:10.1f} KiB")
+
+
+def compare(results, baseline_file, threshold):
+    """
+    Compares results with a saved baseline.
+
+    Returns:
+        bool: True if no scenario got slower than threshold times the baseline p50
+        or needs more round trips.
+    """
+    with open(baseline_file) as f:
+        baseline = {(r['scenario'], r['format'], r['records']): r for r in json.load(f)['results']}
+    ok = True
+    print(f"\nComparison with {baseline_file} (threshold x{threshold}):")
+    for r in results:
+        base = baseline.get((r['scenario'], r['format'], r['records']))
+        if base is None:
+            continue
+        ratio = r['p50_ms'] / base['p50_ms'] if base['p50_ms'] else 1.0
+        regression = ratio > threshold or r['round_trips'] > base['round_trips']
+        ok &= not regression
+        print(f"{'REGRESSION' if regression else 'ok':<11}{r['scenario']:<22}{r['format']:<9}{r['records']:>8}  "
+              f"p50 x{ratio:5.2f}  RT {base['round_trips']:.1f} -> {r['round_trips']:.1f}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--backend', choices=['memory', 'local', 'webdav'], default='memory')
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per request (default 0.05)")
+    parser.add_argument('--bandwidth', type=float, default=None, help="bytes per second (default unlimited)")
+    parser.add_argument('--records', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--formats', nargs='+', choices=['csv', 'parquet'], default=['csv', 'parquet'])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--save', metavar='FILE', help="save the results as a JSON baseline")
+    parser.add_argument('--compare', metavar='FILE', help="compare with a JSON baseline")
+    parser.add_argument('--threshold', type=float, default=1.25, help="allowed p50 slowdown factor")
+    args = parser.parse_args()
+
+    base_fs, root, cleanup = open_backend(args.backend)
+    fs = LatencyFileSystem(base_fs, latency=args.latency, bandwidth=args.bandwidth)
+    try:
+        results = run_scenarios(fs, root, args.records, args.formats, args.repeat)
+    finally:
+        cleanup()
+
+    report = {
+        'meta': {'backend': args.backend, 'latency': args.latency, 'bandwidth': args.bandwidth,
+                 'repeat': args.repeat, 'python': platform.python_version(), 'pandas': pd.__version__,
+                 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+        'results': results,
+    }
+    if args.save:
+        os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nSaved baseline to {args.save}")
+    if args.compare and not compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""
+Measures the import cost of the app's startup paths against the startup budget.
+
+Each scenario imports a set of modules in a fresh interpreter with -X importtime,
+then reports the total import time, the slowest modules, and whether modules that
+the scenario must not load (e.g. pandas on the login page) were imported.
+
+Run from the repository root:
+
+    python -m tools.import_time                  # all scenarios
+    python -m tools.import_time --scenario login --top 20
+    python -m tools.import_time --check          # exits 1 if a budget is exceeded
+
+The budgets are documented in README.md (Startup budget).
+"""
+import argparse, json, statistics, subprocess, sys
+
+# name: (modules to import, modules that must not be loaded, budget in ms)
+SCENARIOS = {
+    'login': (['streamlit', 'utils.data_manager', 'utils.login_manager'],
+              ['pandas', 'numpy', 'pyarrow'], 600),
+    'app': (['streamlit', 'utils.data_manager', 'utils.login_manager', 'utils.session_data',
+             'utils.rollups', 'functions.bmi_calculator', 'functions.data_view', 'functions.downsample'],
+            [], 1200),
+}
+
+
+def measure(modules, repeat=3):
+    """
+    Imports modules in fresh interpreters and parses the -X importtime output.
+
+    Returns:
+        tuple: (median total milliseconds, {module: cumulative ms} of the last run,
+        set of loaded module names).
+    """
+    code = ("import json, sys\n"
+            + "".join(f"import {m}\n" for m in modules)
+            + "print(json.dumps(sorted(sys.modules)))")
+    totals = []
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                                capture_output=True, text=True, check=True)
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative_us, name = line[len('import time:'):].split('|')
+            # Nested imports are indented by two spaces per level
+            depth = len(name) - len(name.lstrip())
+            cumulative[name.strip()] = (int(cumulative_us) / 1000, depth)
+        totals.append(sum(ms for ms, depth in cumulative.values() if depth == 1))
+        loaded = set(json.loads(result.stdout.strip().splitlines()[-1]))
+    return statistics.median(totals), {m: ms for m, (ms, _) in cumulative.items()}, loaded
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', choices=list(SCENARIOS), action='append',
+                        help="scenario to measure (default: all)")
+    parser.add_argument('--top', type=int, default=10, help="number of slowest modules to show")
+    parser.add_argument('--repeat', type=int, default=3, help="runs per scenario (the median is reported)")
+    parser.add_argument('--check', action='store_true', help="exit 1 if a budget is exceeded")
+    args = parser.parse_args()
+
+    ok = True
+    for name in args.scenario or SCENARIOS:
+        modules, forbidden, budget_ms = SCENARIOS[name]
+        total_ms, cumulative, loaded = measure(modules, args.repeat)
+        unexpected = sorted(m for m in forbidden if m in loaded)
+        within = total_ms <= budget_ms and not unexpected
+        ok &= within
+        print(f"\n{name}: {total_ms:.0f} ms (budget {budget_ms} ms) {'ok' if within else 'OVER BUDGET'}")
+        if unexpected:
+            print(f"  must not import: {', '.join(unexpected)}")
+        for module, ms in sorted(cumulative.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {ms:8.1f} ms  {module}")
+    if args.check and not ok:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+A stand-in for a remote (WebDAV) filesystem: wraps any fsspec filesystem, adds a
+fixed latency per request and an optional bandwidth limit, and counts round trips
+and transferred bytes.
+"""
+import threading, time
+from utils.io_metrics import ROUND_TRIP_METHODS, MeteredFile
+
+
+class LatencyFileSystem:
+    """
+    Wraps an fsspec filesystem with per-request latency and a bandwidth limit.
+
+    Attributes:
+        fs: The wrapped fsspec filesystem.
+        latency (float): Seconds added to each request.
+        bandwidth (float or None): Transfer rate in bytes per second (None: unlimited).
+        round_trips (int): Number of requests so far.
+        bytes_read (int): Bytes read from files so far.
+        bytes_written (int): Bytes written to files so far.
+    """
+
+    def __init__(self, fs, latency=0.05, bandwidth=None):
+        """
+        Initialize the wrapper.
+
+        Args:
+            fs: The fsspec filesystem to wrap.
+            latency (float): Seconds added to each request.
+            bandwidth (float, optional): Transfer rate in bytes per second.
+        """
+        self.fs = fs
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Resets the counters."""
+        with self._lock:
+            self.round_trips = 0
+            self.bytes_read = 0
+            self.bytes_written = 0
+
+    def counters(self):
+        """Returns the counters as a dict."""
+        with self._lock:
+            return {'round_trips': self.round_trips, 'bytes_read': self.bytes_read,
+                    'bytes_written': self.bytes_written}
+
+    def _round_trip(self):
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _transfer(self, n_bytes, write):
+        with self._lock:
+            if write:
+                self.bytes_written += n_bytes
+            else:
+                self.bytes_read += n_bytes
+        if self.bandwidth:
+            time.sleep(n_bytes / self.bandwidth)
+
+    def open(self, path, mode='rb', **kwargs):
+        """Opens a file; opening costs one round trip, transfers are metered."""
+        self._round_trip()
+        write = 'r' not in mode
+        return MeteredFile(self.fs.open(path, mode, **kwargs), on_transfer=lambda n: self._transfer(n, write))
+
+    def __getattr__(self, name):
+        attr = getattr(self.fs, name)
+        if name not in ROUND_TRIP_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            self._round_trip()
+            return attr(*args, **kwargs)
+        return call
+
@@ -0,0 +1,325 @@
+"""
+Multi-session load test of the whole app, built on Streamlit's AppTest.
+
+Simulated users run in parallel threads of one process, like the sessions of one
+Streamlit server: each logs in, opens BMI Rechner and submits the form, then opens
+BMI Daten and BMI Grafik. app.py runs unchanged; storage is a local folder wrapped
+in a LatencyFileSystem that adds per-request latency (--latency 0: plain local
+filesystem). Every user starts with a history of --records measurements.
+
+Each combination of --sessions and --records runs in its own subprocess, so caches
+start cold and the peak RSS is that of the run. Reports per page the rerun latency
+(p50/p95/p99) and median storage round trips, and per run the throughput (reruns
+and submits per second) and the peak RSS.
+
+Run from the repository root:
+
+    python -m tools.load_test                                          # defaults
+    python -m tools.load_test --sessions 1 10 25 --records 100 10000 --latency 0.05
+    python -m tools.load_test --save bench/load.json
+    python -m tools.load_test --data-format parquet                     # records stored as data.parquet
+
+Notes:
+- Each session's DataManager is created with the settings of app.py (APP_OPTIONS)
+  and injected through its session-state singleton, so app.py's DataManager(...)
+  call returns it.
+- Round trips are counted per session; writes of the write-behind queue count
+  for the step during which they run.
+- AppTest is made for one test at a time (see patch_app_test()). Here all sessions
+  share one runtime (st.cache_data, st.cache_resource) and the compiled scripts,
+  and each has its own session id, as on a Streamlit server.
+"""
+import argparse, json, os, platform, posixpath, random, resource, subprocess, sys, tempfile, threading, time, uuid
+from unittest.mock import MagicMock
+import bcrypt
+import fsspec
+import numpy as np
+import pandas as pd
+from streamlit import config
+from streamlit.components.v2.component_manager import BidiComponentManager
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.dataframe_source_manager import DataframeSourceManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest, app_test, local_script_runner
+from utils.credential_store import CredentialStore
+from utils.data_manager import DataManager
+from utils.password_hasher import DEFAULT_ROUNDS
+from tools.bench_storage import make_history
+from tools.latency_fs import LatencyFileSystem
+
+APP_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app.py')
+# DataManager settings of app.py (except the filesystem)
+APP_OPTIONS = dict(append_log=True, write_behind=True, instrument=True, minimize_round_trips=True,
+                   compression='gzip', prefetch={'data.csv': {'parse_dates': ['timestamp']}, 'rollups.json': {}})
+PASSWORD = 'LoadTest1!'
+PAGES = ('login', 'login_submit', 'rechner', 'rechner_submit', 'daten', 'grafik')
+
+
+class _StaticPool:
+    """Stands in for FilesystemPool: always returns the same filesystem."""
+
+    def __init__(self, fs, known_dirs):
+        self.protocol = 'file'
+        self.fs = fs
+        self.known_dirs = known_dirs
+        self.plain_files = {}
+
+    def get(self):
+        return self.fs
+
+
+def patch_app_test():
+    """
+    Makes AppTest instances behave like the sessions of one Streamlit server.
+
+    Every AppTest run installs a mock Runtime and removes it when done, runs under
+    the same session id and compiles the scripts again. With sessions in parallel
+    threads, one run would remove the runtime of another, SharedUserData would see
+    a single session, and the concurrent compiles fail (they are not thread-safe).
+    Instead, one mock Runtime is installed for the process, each AppTest gets its
+    own session id, and the compiled scripts are shared.
+    """
+    script_cache = ScriptCache()
+    session_ids = {}
+
+    class ServerRuntime(Runtime):
+        """Takes AppTest's per-run Runtime._instance assignments, so the shared runtime stays installed."""
+
+    class SessionScriptRunner(local_script_runner.LocalScriptRunner):
+        """LocalScriptRunner with the shared ScriptCache and a session id per AppTest."""
+
+        def __init__(self, script_path, session_state, *args, **kwargs):
+            super().__init__(script_path, session_state, *args, **kwargs)
+            self._script_cache = script_cache
+            self._session_id = session_ids.setdefault(id(session_state), uuid.uuid4().hex)
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.dataframe_source_mgr = DataframeSourceManager()
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    runtime.bidi_component_registry = BidiComponentManager()
+    runtime.bidi_component_registry.discover_and_register_components(start_file_watching=False)
+    Runtime._instance = runtime
+    config.set_option('global.appTest', True)  # restored to this value after each run
+    app_test.Runtime = ServerRuntime
+    app_test.ScriptCache = lambda: script_cache
+    app_test.LocalScriptRunner = SessionScriptRunner
+
+
+def make_data_manager(fs, root, known_dirs, data_format='csv'):
+    """
+    Creates a DataManager with the settings of app.py on the given filesystem.
+
+    data_format is the [storage] data_format setting ('csv' or 'parquet').
+
+    Outside a script run all sessions share one session state, so the singleton
+    constructor would return the same instance every time; the instance is
+    created directly instead.
+    """
+    options = dict(APP_OPTIONS)
+    if data_format == 'parquet':
+        from utils.data_schema import BMI_DATA_SCHEMA
+        options.update(parquet_schema=BMI_DATA_SCHEMA, data_file='data.parquet',
+                       prefetch={'data.parquet': {'parse_dates': ['timestamp']}, 'rollups.json': {}})
+    dm = object.__new__(DataManager)
+    dm.__init__(fs_protocol='file', fs_root_folder=root, **options)
+    dm.fs_pool = _StaticPool(fs, known_dirs)
+    return dm
+
+
+def seed_users(fs, root, n_users, n_records, rounds, data_format='csv'):
+    """
+    Registers n_users users, each with a history of n_records measurements.
+
+    Returns:
+        list of str: The usernames.
+    """
+    dm = make_data_manager(fs, root, set(), data_format)
+    store = CredentialStore(dm)
+    password_hash = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds)).decode()
+    history = make_history(n_records)
+    usernames = [f'user{i:03d}' for i in range(n_users)]
+    for username in usernames:
+        store.put(username, {'email': f'{username}@example.com', 'first_name': 'Load', 'last_name': 'Test',
+                             'password': password_hash, 'failed_login_attempts': 0, 'logged_in': False,
+                             'roles': None}, overwrite=True)
+        if n_records:
+            dm._get_user_data_handler(username).save(dm.data_file, history)
+    dm.flush()
+    return usernames
+
+
+class Session:
+    """
+    One simulated user, driving the app through AppTest.
+
+    Attributes:
+        timings (list): (page, seconds, round trips) per rerun.
+        error (str): The error that ended the session early, or None.
+    """
+
+    def __init__(self, username, fs, root, known_dirs, rounds, timeout, data_format='csv'):
+        self.username = username
+        self.fs = fs
+        self.dm = make_data_manager(fs, root, known_dirs, data_format)
+        self.at = AppTest.from_file(APP_FILE, default_timeout=timeout)
+        self.at.secrets['password_hashing'] = {'bcrypt_rounds': rounds}
+        self.at.secrets['storage'] = {'data_format': data_format}
+        self.at.session_state['data_manager'] = self.dm
+        self.timings = []
+        self.error = None
+
+    def _step(self, page, fn):
+        """Runs one interaction and records its latency and round trips."""
+        self.fs.reset()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if self.at.exception:
+            raise RuntimeError(f"{page}: {self.at.exception[0].value}")
+        self.timings.append((page, elapsed, self.fs.counters()['round_trips']))
+
+    def _login(self):
+        self.at.text_input[0].input(self.username)
+        self.at.text_input[1].input(PASSWORD)
+        next(b for b in self.at.button if b.label == 'Login').click().run()
+        if self.at.session_state['authentication_status'] is not True:
+            raise RuntimeError("login failed")
+        self.at.run()  # first page after login, with the user's data loaded
+
+    def _submit(self, rng):
+        self.at.number_input[0].set_value(round(rng.uniform(1.5, 2.0), 2))
+        self.at.number_input[1].set_value(round(rng.uniform(45, 120), 1))
+        next(b for b in self.at.button if b.label == 'Submit').click().run()
+
+    def run(self, n_submits, start_barrier=None):
+        """Runs the scenario; errors are kept in self.error instead of being raised."""
+        rng = random.Random(self.username)
+        try:
+            if start_barrier is not None:
+                start_barrier.wait()
+            self._step('login', self.at.run)
+            self._step('login_submit', self._login)
+            self._step('rechner', lambda: self.at.switch_page('views/bmi_rechner.py').run())
+            for _ in range(n_submits):
+                self._step('rechner_submit', lambda: self._submit(rng))
+            self._step('daten', lambda: self.at.switch_page('views/bmi_daten.py').run())
+            self._step('grafik', lambda: self.at.switch_page('views/bmi_grafik.py').run())
+            self.dm.flush(username=self.username)
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+
+
+def run_load(n_sessions, n_records, latency, bandwidth, n_submits, rounds, timeout, data_format='csv'):
+    """
+    Runs n_sessions sessions in parallel against freshly seeded storage.
+
+    Returns:
+        dict: Per page latency percentiles and round trips, throughput and peak RSS.
+    """
+    patch_app_test()
+    with tempfile.TemporaryDirectory() as tmp:
+        base_fs = fsspec.filesystem('file')
+        root = posixpath.join(tmp, 'BMLD_App_DB')
+        usernames = seed_users(base_fs, root, n_sessions, n_records, rounds, data_format)
+        known_dirs = set()  # shared by all sessions, like the FilesystemPool's
+        sessions = [Session(username, LatencyFileSystem(base_fs, latency=latency, bandwidth=bandwidth),
+                            root, known_dirs, rounds, timeout, data_format)
+                    for username in usernames]
+        barrier = threading.Barrier(n_sessions)
+        threads = [threading.Thread(target=s.run, args=(n_submits, barrier)) for s in sessions]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+
+    timings = [t for s in sessions for t in s.timings]
+    pages = {}
+    for page in PAGES:
+        seconds = [t[1] * 1000 for t in timings if t[0] == page]
+        if seconds:
+            pages[page] = {'count': len(seconds), 'p50_ms': float(np.percentile(seconds, 50)),
+                           'p95_ms': float(np.percentile(seconds, 95)), 'p99_ms': float(np.percentile(seconds, 99)),
+                           'round_trips': float(np.median([t[2] for t in timings if t[0] == page]))}
+    return {'sessions': n_sessions, 'records': n_records, 'wall_s': wall,
+            'reruns_per_s': len(timings) / wall,
+            'submits_per_s': sum(1 for t in timings if t[0] == 'rechner_submit') / wall,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'errors': [f"{s.username}: {s.error}" for s in sessions if s.error], 'pages': pages}
+
+
+def run_in_subprocess(n_sessions, n_records, args):
+    """Runs one configuration in a fresh interpreter and returns its result."""
+    cmd = [sys.executable, '-m', 'tools.load_test', '--worker', '--sessions', str(n_sessions),
+           '--records', str(n_records), '--latency', str(args.latency), '--submits', str(args.submits),
+           '--bcrypt-rounds', str(args.bcrypt_rounds), '--timeout', str(args.timeout),
+           '--data-format', args.data_format]
+    if args.bandwidth:
+        cmd += ['--bandwidth', str(args.bandwidth)]
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"Load test with {n_sessions} sessions and {n_records} records failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def print_result(r):
+    print(f"\n{r['sessions']} sessions, {r['records']} records: {r['reruns_per_s']:.1f} reruns/s, "
+          f"{r['submits_per_s']:.1f} submits/s, peak RSS {r['peak_rss_mb']:.0f} MiB, {r['wall_s']:.1f} s")
+    for page, p in r['pages'].items():
+        print(f"  {page:<16}{p['count']:>5}  p50 {p['p50_ms']:9.1f} ms  p95 {p['p95_ms']:9.1f} ms  "
+              f"p99 {p['p99_ms']:9.1f} ms  {p['round_trips']:5.1f} RT")
+    for error in r['errors']:
+        print(f"  ERROR {error}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1, 5, 10])
+    parser.add_argument('--records', type=int, nargs='+', default=[100, 10000])
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds per request (default 0.05)")
+    parser.add_argument('--bandwidth', type=float, default=None, help="bytes per second (default unlimited)")
+    parser.add_argument('--submits', type=int, default=3, help="BMI form submits per session")
+    parser.add_argument('--bcrypt-rounds', type=int, default=DEFAULT_ROUNDS,
+                        help=f"cost factor of the users' password hashes (default {DEFAULT_ROUNDS})")
+    parser.add_argument('--timeout', type=float, default=120.0, help="seconds per rerun before failing")
+    parser.add_argument('--data-format', choices=['csv', 'parquet'], default='csv',
+                        help="[storage] data_format of the app (default csv)")
+    parser.add_argument('--save', metavar='FILE', help="save the results as JSON")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_load(args.sessions[0], args.records[0], args.latency, args.bandwidth, args.submits,
+                          args.bcrypt_rounds, args.timeout, args.data_format)
+        print(json.dumps(result))
+        return
+
+    results = []
+    for n_records in args.records:
+        for n_sessions in args.sessions:
+            results.append(run_in_subprocess(n_sessions, n_records, args))
+            print_result(results[-1])
+
+    if args.save:
+        report = {
+            'meta': {'latency': args.latency, 'bandwidth': args.bandwidth, 'submits': args.submits,
+                     'data_format': args.data_format,
+                     'bcrypt_rounds': args.bcrypt_rounds, 'python': platform.python_version(),
+                     'pandas': pd.__version__, 'created': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': results,
+        }
+        os.makedirs(os.path.dirname(args.save) or '.', exist_ok=True)
+        with open(args.save, 'w') as f:
+            json.dump(report, f, indent=4)
+        print(f"\nSaved results to {args.save}")
+    if any(r['errors'] for r in results):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""
+Convert the users' data.csv files (including append-log segments) to data.parquet.
+
+Run from the repository root:
+
+    python -m tools.migrate_to_parquet                           # WebDAV, see .streamlit/secrets.toml
+    python -m tools.migrate_to_parquet --protocol file --root app_data
+    python -m tools.migrate_to_parquet --dry-run
+    python -m tools.migrate_to_parquet --compression none      # data written before compression was enabled
+
+data.csv is read like the app reads it: data.csv.gz (--compression, the app's
+setting), else a plain data.csv left from before, plus the delta segments.
+The CSV files are kept: the app reads and writes data.csv until data_format =
+"parquet" is set in the [storage] section of secrets.toml. Stop the app, run
+the migration, then set data_format, so no records are appended to data.csv
+after it was converted.
+"""
+import argparse, posixpath, tomllib
+import fsspec
+from utils.data_handler import DataHandler
+from utils.data_schema import BMI_DATA_SCHEMA
+
+
+def open_filesystem(protocol, secrets_file):
+    """
+    Creates the filesystem the app uses, without a Streamlit runtime.
+
+    Args:
+        protocol (str): 'webdav' (credentials from secrets_file) or 'file'.
+        secrets_file (str): Path to the Streamlit secrets.toml.
+
+    Returns:
+        fsspec.AbstractFileSystem: The filesystem.
+    """
+    if protocol == 'file':
+        return fsspec.filesystem('file')
+    with open(secrets_file, 'rb') as f:
+        secrets = tomllib.load(f)['webdav']
+    return fsspec.filesystem('webdav', base_url=secrets['base_url'],
+                             auth=(secrets['username'], secrets['password']))
+
+
+def migrate_user_folder(fs, folder, dry_run=False, overwrite=False, compression='gzip'):
+    """
+    Converts data.csv of one user folder to data.parquet.
+
+    Args:
+        fs: The fsspec filesystem.
+        folder (str): Path of the user_data_* folder.
+        dry_run (bool): Only report what would be converted.
+        overwrite (bool): Replace an existing data.parquet.
+        compression (str, optional): Codec the app stores data.csv with (DataManager compression).
+
+    Returns:
+        str: A one-line status message.
+    """
+    dh = DataHandler(fs, folder, append_log=True, parquet_schema=BMI_DATA_SCHEMA, default_compression=compression)
+    if dh.exists('data.parquet') and not overwrite:
+        return "data.parquet exists, skipped"
+    try:
+        df = dh.load('data.csv', parse_dates=['timestamp'])
+    except FileNotFoundError:
+        return "no data.csv, skipped"
+    if dry_run:
+        return f"would convert {len(df)} rows"
+
+    dh.save('data.parquet', df)
+    converted = dh.load('data.parquet')
+    if len(converted) != len(df) or list(converted.columns) != list(df.columns):
+        raise RuntimeError(f"Verification failed for {folder}")
+
+    csv_size = sum(csv_sizes(fs, dh))
+    parquet_size = fs.info(posixpath.join(folder, 'data.parquet'))['size']
+    return f"converted {len(df)} rows ({csv_size} -> {parquet_size} bytes)"
+
+
+def csv_sizes(fs, dh):
+    """Yields the size of the stored data.csv (compressed or plain, see DataHandler._variants()) and its segments."""
+    for variant in dh._variants('data.csv'):
+        try:
+            yield fs.info(dh._resolve_path(variant))['size']
+            break
+        except FileNotFoundError:
+            pass
+    for segment in dh._list_segments('data.csv'):
+        yield fs.info(dh._resolve_path(segment))['size']
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--protocol', choices=['webdav', 'file'], default='webdav')
+    parser.add_argument('--root', default='BMLD_App_DB', help="root folder of the app data")
+    parser.add_argument('--secrets', default='.streamlit/secrets.toml')
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--overwrite', action='store_true', help="replace existing data.parquet files")
+    parser.add_argument('--compression', default='gzip',
+                        help="codec of the app's data files (DataManager compression in app.py), or 'none'")
+    args = parser.parse_args()
+    compression = None if args.compression == 'none' else args.compression
+
+    fs = open_filesystem(args.protocol, args.secrets)
+    folders = sorted(p.rstrip('/') for p in fs.ls(args.root, detail=False)
+                     if posixpath.basename(p.rstrip('/')).startswith('user_data_'))
+    for folder in folders:
+        try:
+            status = migrate_user_folder(fs, folder, args.dry_run, args.overwrite, compression)
+        except Exception as e:
+            status = f"FAILED: {e}"
+        print(f"{posixpath.basename(folder)}: {status}")
+
+
+if __name__ == '__main__':
+    main()
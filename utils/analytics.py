@@ -0,0 +1,194 @@
+import logging, posixpath
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import numpy as np
+import pandas as pd
+from utils.data_handler import DataHandler, split_extension
+
+logger = logging.getLogger(__name__)
+
+# BMI histogram bins: 1-wide from 10 to 60, plus underflow and overflow
+BMI_HISTOGRAM_EDGES = np.arange(10, 61, 1)
+
+
+class CohortSummary:
+    """
+    Streaming aggregate of BMI records over many users.
+
+    Frames are added one at a time and only the aggregates are kept, so memory
+    does not depend on the number of users or records. Summaries can be merged
+    and serialized, which allows per-user partial results to be stored.
+
+    Attributes:
+        n_users (int): Number of users with at least one record.
+        n_records (int): Number of records with a valid BMI.
+        bmi_counts (np.ndarray): Histogram counts (see BMI_HISTOGRAM_EDGES).
+        category_counts (dict): Category to number of records.
+        monthly (dict): 'YYYY-MM' to [number of records, sum of BMI].
+    """
+
+    def __init__(self):
+        self.n_users = 0
+        self.n_records = 0
+        self.bmi_counts = np.zeros(len(BMI_HISTOGRAM_EDGES) + 1, dtype=np.int64)
+        self.category_counts = {}
+        self.monthly = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Summarizes the records of one user.
+
+        Args:
+            df (pd.DataFrame): Records with 'bmi' and optionally 'category' and 'timestamp'.
+
+        Returns:
+            CohortSummary: The summary of this frame.
+        """
+        summary = cls()
+        if df.empty or 'bmi' not in df.columns:
+            return summary
+        bmi = pd.to_numeric(df['bmi'], errors='coerce')
+        valid = bmi.notna()
+        summary.n_users = int(valid.any())
+        summary.n_records = int(valid.sum())
+        summary.bmi_counts += np.bincount(np.searchsorted(BMI_HISTOGRAM_EDGES, bmi[valid], side='right'),
+                                          minlength=len(summary.bmi_counts))
+        if 'category' in df.columns:
+            summary.category_counts = {str(k): int(v) for k, v in df['category'].value_counts().items()}
+        if 'timestamp' in df.columns:
+            months = pd.to_datetime(df['timestamp'], errors='coerce')[valid].dt.strftime('%Y-%m')
+            grouped = bmi[valid].groupby(months.to_numpy()).agg(['count', 'sum'])
+            summary.monthly = {m: [int(row['count']), float(row['sum'])] for m, row in grouped.iterrows()}
+        return summary
+
+    def merge(self, other):
+        """Adds the aggregates of another summary to this one (in place) and returns self."""
+        self.n_users += other.n_users
+        self.n_records += other.n_records
+        self.bmi_counts += other.bmi_counts
+        for category, count in other.category_counts.items():
+            self.category_counts[category] = self.category_counts.get(category, 0) + count
+        for month, (count, total) in other.monthly.items():
+            current = self.monthly.setdefault(month, [0, 0.0])
+            current[0] += count
+            current[1] += total
+        return self
+
+    def to_dict(self):
+        """Returns a JSON-serializable representation."""
+        return {'n_users': self.n_users, 'n_records': self.n_records,
+                'bmi_counts': self.bmi_counts.tolist(), 'category_counts': self.category_counts,
+                'monthly': self.monthly}
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restores a summary from to_dict()."""
+        summary = cls()
+        summary.n_users = data['n_users']
+        summary.n_records = data['n_records']
+        summary.bmi_counts = np.array(data['bmi_counts'], dtype=np.int64)
+        summary.category_counts = dict(data['category_counts'])
+        summary.monthly = {m: list(v) for m, v in data['monthly'].items()}
+        return summary
+
+    def bmi_distribution(self):
+        """
+        Returns the BMI histogram.
+
+        Returns:
+            pd.Series: Number of records per BMI bin, labelled by the bin's lower edge.
+        """
+        labels = [f"<{BMI_HISTOGRAM_EDGES[0]}"] + [str(e) for e in BMI_HISTOGRAM_EDGES[:-1]] \
+            + [f">={BMI_HISTOGRAM_EDGES[-1]}"]
+        return pd.Series(self.bmi_counts, index=labels, name='count')
+
+    def monthly_trend(self):
+        """
+        Returns the mean BMI and number of records per month.
+
+        Returns:
+            pd.DataFrame: Indexed by month with columns 'count' and 'mean_bmi'.
+        """
+        months = sorted(self.monthly)
+        counts = np.array([self.monthly[m][0] for m in months], dtype=np.int64)
+        sums = np.array([self.monthly[m][1] for m in months], dtype=np.float64)
+        return pd.DataFrame({'count': counts, 'mean_bmi': sums / np.maximum(counts, 1)},
+                            index=pd.Index(months, name='month'))
+
+
+def _folder_token(fs, folder, file_name):
+    """Change token of a user's data file: name, size and ETag/mtime of the file (plain or compressed) and its segments."""
+    try:
+        entries = fs.find(folder, detail=True)
+    except FileNotFoundError:
+        return []
+    token = []
+    for path, info in entries.items():
+        relative = posixpath.relpath(path, folder)
+        compressed = posixpath.splitext(relative)[0] == file_name and split_extension(relative)[1] is not None
+        if relative == file_name or compressed or relative.startswith(file_name + '.segments/'):
+            version = info.get('etag') or info.get('modified') or info.get('mtime')
+            token.append([relative, info.get('size'), str(version)])
+    return sorted(token)
+
+
+def summarize_user_folders(fs, root, file_name, index, append_log=False, max_workers=8, compression=None):
+    """
+    Aggregates a data file over all user_data_* folders, re-reading only changed folders.
+
+    Change tokens are fetched concurrently. Changed folders are then loaded by a
+    bounded thread pool; at most 2 * max_workers frames are held at a time and
+    each frame is discarded once summarized.
+
+    Args:
+        fs: The fsspec filesystem.
+        root (str): The app data root folder.
+        file_name (str): The per-user data file, e.g. 'data.csv'.
+        index (dict): Result of a previous run ({folder: {'token': ..., 'summary': ...}}).
+        append_log (bool): Whether the data files use append-log segments.
+        max_workers (int): Maximum number of concurrent requests.
+        compression (str, optional): Codec of compressed data files (see DataHandler default_compression).
+
+    Returns:
+        tuple: (CohortSummary over all users, updated index, number of re-read folders).
+    """
+    folders = sorted(posixpath.basename(p.rstrip('/')) for p in fs.ls(root, detail=False)
+                     if posixpath.basename(p.rstrip('/')).startswith('user_data_'))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        tokens = dict(zip(folders, executor.map(
+            lambda folder: _folder_token(fs, posixpath.join(root, folder), file_name), folders)))
+
+        new_index = {folder: index[folder] for folder in folders
+                     if folder in index and index[folder]['token'] == tokens[folder]}
+        changed = [folder for folder in folders if folder not in new_index and tokens[folder]]
+
+        def summarize(folder):
+            dh = DataHandler(fs, posixpath.join(root, folder), append_log=append_log,
+                             default_compression=compression)
+            df = dh.load(file_name, initial_value=pd.DataFrame(), parse_dates=['timestamp'])
+            return CohortSummary.from_frame(df).to_dict()
+
+        remaining = iter(changed)
+        running = {}
+        while True:
+            while len(running) < 2 * max_workers:
+                folder = next(remaining, None)
+                if folder is None:
+                    break
+                running[executor.submit(summarize, folder)] = folder
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                folder = running.pop(future)
+                try:
+                    new_index[folder] = {'token': tokens[folder], 'summary': future.result()}
+                except Exception as e:
+                    # Left out of the index, so it is retried on the next run
+                    logger.warning("Skipping %s: %s", folder, e)
+
+    total = CohortSummary()
+    for entry in new_index.values():
+        total.merge(CohortSummary.from_dict(entry['summary']))
+    return total, new_index, len(changed)
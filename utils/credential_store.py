@@ -0,0 +1,181 @@
+import hashlib, posixpath, random, threading, time, yaml
+from io import BytesIO
+
+# Serializes conditional writes on filesystems without ETag support (e.g. local files)
+_LOCAL_WRITE_LOCK = threading.Lock()
+
+
+class CredentialConflictError(RuntimeError):
+    """Raised when a shard could not be updated because of concurrent writes."""
+
+
+class CredentialStore:
+    """
+    Stores user credentials in YAML shards instead of one credentials file.
+
+    Users are assigned to one of n_buckets shard files (credentials/<bucket>.yaml)
+    by a hash of their username. Registering a user only rewrites that user's
+    shard, using a conditional write (HTTP If-Match on WebDAV) that is retried
+    if another session changed the shard in the meantime, so concurrent
+    registrations do not overwrite each other.
+
+    Attributes:
+        data_manager (DataManager): Provides the filesystem and load cache.
+        folder (str): Shard folder relative to the app data root.
+        n_buckets (int): Number of shard files.
+        legacy_file (str): Single credentials file migrated on first use.
+    """
+
+    def __init__(self, data_manager, folder='credentials', n_buckets=16, legacy_file='credentials.yaml'):
+        """
+        Initialize the credential store.
+
+        Args:
+            data_manager (DataManager): Provides the filesystem and load cache.
+            folder (str): Shard folder relative to the app data root.
+            n_buckets (int): Number of shard files. Must not change once shards exist.
+            legacy_file (str): Single credentials file to migrate if no shards exist yet.
+        """
+        self.data_manager = data_manager
+        self.folder = folder
+        self.n_buckets = n_buckets
+        self.legacy_file = legacy_file
+
+    def shard_name(self, username):
+        """Returns the shard file name for a username."""
+        digest = hashlib.sha1(username.lower().encode('utf-8')).hexdigest()
+        return f"{int(digest, 16) % self.n_buckets:03d}.yaml"
+
+    def load_all(self):
+        """
+        Loads the credentials of all users.
+
+        Shards are loaded concurrently and validated against one directory listing.
+        If no shards exist yet, the legacy credentials file is migrated.
+
+        Returns:
+            dict: Credentials in streamlit-authenticator format ({'usernames': {...}}).
+        """
+        dh = self.data_manager._get_data_handler()
+        shards = dh.load_folder(self.folder, '.yaml')
+        if not shards:
+            return self.migrate_legacy()
+        usernames = {}
+        for shard in shards.values():
+            usernames.update((shard or {}).get('usernames') or {})
+        return {'usernames': usernames}
+
+    def get(self, username):
+        """
+        Loads the credentials of a single user by reading only that user's shard.
+
+        Args:
+            username (str): The username.
+
+        Returns:
+            dict or None: The user's credentials, or None if the user does not exist.
+        """
+        dh = self.data_manager._get_data_handler(self.folder)
+        shard = dh.load(self.shard_name(username), initial_value={'usernames': {}})
+        return ((shard or {}).get('usernames') or {}).get(username)
+
+    def put(self, username, credentials, max_attempts=5, overwrite=False):
+        """
+        Creates or updates a single user's credentials with a conditional write.
+
+        The shard is re-read right before writing and only this user's entry is
+        changed. If the shard changes in between, the write is retried. An existing
+        entry is only replaced with overwrite=True, which callers must only pass for
+        the logged-in user's own entry (e.g. a new password hash).
+
+        Args:
+            username (str): The username.
+            credentials (dict): The user's credentials (email, name, hashed password, ...).
+            max_attempts (int): Number of attempts before giving up.
+            overwrite (bool): Replace the user's existing entry.
+
+        Raises:
+            CredentialConflictError: If the shard kept changing, or if the username
+                already exists and overwrite is False.
+        """
+        dh = self.data_manager._get_data_handler(self.folder)
+        name = self.shard_name(username)
+        for attempt in range(max_attempts):
+            shard, token = self._read_shard(dh, name)
+            existing = shard['usernames'].get(username)
+            if existing is not None and not overwrite:
+                if existing == credentials:
+                    return  # stored by an earlier attempt whose response was lost
+                raise CredentialConflictError(f"Username {username} is already taken")
+            shard['usernames'][username] = credentials
+            if self._write_if_match(dh, name, shard, token):
+                return
+            time.sleep(0.05 * 2 ** attempt * (1 + random.random()))
+        raise CredentialConflictError(f"Could not save credentials for {username}, please try again")
+
+    def migrate_legacy(self):
+        """
+        Splits the legacy single credentials file into shards.
+
+        The legacy file is left in place.
+
+        Returns:
+            dict: The migrated credentials ({'usernames': {...}}).
+        """
+        legacy = self.data_manager.load_app_data(self.legacy_file, initial_value={'usernames': {}})
+        usernames = (legacy or {}).get('usernames') or {}
+        shards = {}
+        for username, credentials in usernames.items():
+            shards.setdefault(self.shard_name(username), {})[username] = credentials
+        for name, shard_users in shards.items():
+            self.data_manager.save_app_data({'usernames': shard_users}, posixpath.join(self.folder, name))
+        return {'usernames': usernames}
+
+    @staticmethod
+    def _token(info):
+        return info.get('etag') or (info.get('mtime') or info.get('modified'), info.get('size'))
+
+    def _read_shard(self, dh, name):
+        """Reads a shard bypassing the cache. Returns (shard, token); token is None if it does not exist."""
+        try:
+            token = self._token(dh.filesystem.info(dh._resolve_path(name)))
+            shard = yaml.safe_load(dh.read_text(name)) or {}
+        except FileNotFoundError:
+            return {'usernames': {}}, None
+        shard.setdefault('usernames', {})
+        return shard, token
+
+    def _write_if_match(self, dh, name, shard, token):
+        """
+        Writes a shard only if it still has the given token (None: only if it does not exist).
+
+        Returns:
+            bool: True if written, False if the shard was changed concurrently.
+        """
+        fs = dh.filesystem
+        full_path = dh._resolve_path(name)
+        client = getattr(fs, 'client', None)
+        if hasattr(client, 'upload_fileobj'):
+            dh.ensure_dir()
+            etag = str(token) if token is None or str(token).startswith(('"', 'W/')) else f'"{token}"'
+            headers = {'If-None-Match': '*'} if token is None else {'If-Match': etag}
+            content = yaml.dump(shard, default_flow_style=False).encode('utf-8')
+            try:
+                client.upload_fileobj(BytesIO(content), fs._strip_protocol(full_path),
+                                      overwrite=True, headers=headers)
+            except Exception as e:
+                if getattr(getattr(e, 'response', None), 'status_code', None) == 412:
+                    return False
+                raise
+            dh._invalidate(full_path)
+            return True
+
+        with _LOCAL_WRITE_LOCK:
+            try:
+                current = self._token(fs.info(full_path))
+            except FileNotFoundError:
+                current = None
+            if current != token:
+                return False
+            dh.save(name, shard)
+            return True
@@ -1,18 +1,96 @@
-import json, yaml, posixpath
-import pandas as pd
-from io import StringIO
+import io, json, posixpath, secrets, sys, time, yaml
+from io import BytesIO
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from fsspec.compression import compr
+
+# pandas and pyarrow are imported on first use, so that e.g. the login page,
+# which only reads YAML, does not pay for importing them.
+
+_TEXT_EXTENSIONS = (".json", ".yaml", ".yml", ".csv", ".txt")
+_FRAME_EXTENSIONS = (".csv", ".parquet")
+PARQUET_ROW_GROUP_SIZE = 10_000
+
+# Compression suffixes recognized after the format extension, e.g. data.csv.gz (fsspec codec names)
+COMPRESSION_EXTENSIONS = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+_CODEC_EXTENSIONS = {codec: ext for ext, codec in COMPRESSION_EXTENSIONS.items()}
+_NOT_FOUND = object()
+
+
+def split_extension(path):
+    """
+    Split a file name into its format extension and compression codec.
+
+    Example: 'data.csv.gz' gives ('.csv', 'gzip'), 'data.csv' gives ('.csv', None).
+    """
+    root, ext = posixpath.splitext(path)
+    compression = COMPRESSION_EXTENSIONS.get(ext.lower())
+    if compression is not None:
+        ext = posixpath.splitext(root)[-1]
+    return ext.lower(), compression
+
+
+def _is_frame(content):
+    """Whether content is a DataFrame, without importing pandas (a DataFrame implies pandas is loaded)."""
+    pd = sys.modules.get('pandas')
+    return pd is not None and isinstance(content, pd.DataFrame)
+
+
+def _is_missing_parent(error):
+    """Whether a failed write means the parent directory does not exist (WebDAV answers 409 Conflict)."""
+    return isinstance(error, FileNotFoundError) \
+        or getattr(getattr(error, 'response', None), 'status_code', None) == 409
+
 
 class DataHandler:
-    def __init__(self, filesystem, root_path):
+    def __init__(self, filesystem, root_path, append_log=False, compact_threshold=20, cache=None,
+                 parquet_schema=None, minimize_round_trips=False, known_dirs=None, default_compression=None,
+                 plain_files=None):
         """
         Initialize the DataHandler with an fsspec filesystem and a root path.
 
         Args:
             filesystem: An fsspec-compatible filesystem object.
             root_path: The root directory for file operations.
+            append_log (bool): If True, CSV and Parquet files are stored as a base file plus
+                small delta segments written by append(). load() merges both.
+            compact_threshold (int): Number of delta segments after which append()
+                folds them back into the base file.
+            cache (LoadCache, optional): Cache for parsed file contents. Cached values
+                are revalidated with a metadata request instead of a download (with
+                minimize_round_trips, with the metadata of the download itself).
+            parquet_schema (pyarrow.Schema, optional): Column types used when writing
+                Parquet files. Columns not in the schema keep their inferred type.
+            minimize_round_trips (bool): If True, files are opened without checking that
+                they or their parent directory exist. A missing file is treated like
+                initial_value, and a missing parent directory is only created when a
+                write fails because of it. Loads and saves of a file then cost one
+                request, plus one to list the delta segments in append-log mode.
+            known_dirs (set, optional): Directories known to exist, shared between handlers
+                on the same filesystem (see FilesystemPool.known_dirs). Only used with
+                minimize_round_trips.
+            default_compression (str, optional): Codec ('gzip', 'bz2', 'xz' or 'zstd') for
+                files saved under a plain name: save('data.csv') writes data.csv.gz, and
+                load('data.csv') reads data.csv.gz, falling back to an existing data.csv.
+                Files named with a compression suffix are always (de)compressed.
+            plain_files (dict, optional): Whether the plain variant of a file (e.g. data.csv
+                next to data.csv.gz) exists, by resolved path, where known; shared between
+                handlers on the same filesystem (see FilesystemPool.plain_files). A plain
+                variant known to be missing is not probed again, and one is only removed
+                on save if a load found it. Only used with default_compression.
         """
         self.filesystem = filesystem
         self.root_path = root_path
+        self.append_log = append_log
+        self.compact_threshold = compact_threshold
+        self.cache = cache
+        self.parquet_schema = parquet_schema
+        self.minimize_round_trips = minimize_round_trips
+        self.known_dirs = known_dirs if known_dirs is not None else set()
+        if default_compression is not None and default_compression not in _CODEC_EXTENSIONS:
+            raise ValueError(f"Unsupported compression: {default_compression}")
+        self.default_compression = default_compression
+        self.plain_files = plain_files if plain_files is not None else {}
 
     def _join(self, *args):
         return posixpath.join(*args)
@@ -44,7 +122,7 @@ class DataHandler:
 
     def read_text(self, relative_path):
         """
-        Read the contents of a text file.
+        Read the contents of a text file, decompressing it if its name has a compression suffix.
 
         Args:
             relative_path: The path relative to the root directory.
@@ -53,12 +131,12 @@ class DataHandler:
             The content of the file as a string.
         """
         full_path = self._resolve_path(relative_path)
-        with self.filesystem.open(full_path, "r", encoding='utf-8') as f:
+        with self._open(full_path, "r", encoding='utf-8') as f:
             return f.read()
 
     def read_binary(self, relative_path):
         """
-        Read the contents of a binary file.
+        Read the contents of a binary file, decompressing it if its name has a compression suffix.
 
         Args:
             relative_path: The path relative to the root directory.
@@ -67,65 +145,237 @@ class DataHandler:
             The content of the file as bytes.
         """
         full_path = self._resolve_path(relative_path)
-        with self.filesystem.open(full_path, "rb") as f:
+        with self._open(full_path, "rb") as f:
             return f.read()
 
     def write_text(self, relative_path, content):
         """
-        Write text content to a file.
+        Write text content to a file, compressing it if its name has a compression suffix.
 
         Args:
             relative_path: The path relative to the root directory.
             content: The text content to write.
         """
         full_path = self._resolve_path(relative_path)
-        with self.filesystem.open(full_path, "w", encoding='utf-8') as f:
-            f.write(content)
+        self._write_file(full_path, "w", lambda f: f.write(content))
 
     def write_binary(self, relative_path, content):
         """
-        Write binary content to a file.
+        Write binary content to a file, compressing it if its name has a compression suffix.
 
         Args:
             relative_path: The path relative to the root directory.
             content: The binary content to write.
         """
         full_path = self._resolve_path(relative_path)
-        with self.filesystem.open(full_path, "wb") as f:
-            f.write(content)
+        self._write_file(full_path, "wb", lambda f: f.write(content))
 
     def load(self, relative_path, initial_value=None, **load_args):
         """
         Load data from a file based on its extension.
 
+        In append-log mode, CSV and Parquet files are returned merged with their delta segments.
+        Compressed files (e.g. data.csv.gz) are decompressed while parsing. With
+        default_compression, load('data.csv') reads data.csv.gz or else data.csv.
+
         Args:
             relative_path: The path relative to the root directory.
             initial_value: The value to return if the file does not exist. If None, raises FileNotFoundError.
-            **load_args: Additional arguments to pass to the file loader (pd.read_csv).
+            **load_args: Additional arguments to pass to the file loader (pd.read_csv or
+                pd.read_parquet, e.g. columns=[...] or filters=[('timestamp', '>=', start)]).
         Returns:
             Parsed data (e.g., DataFrame, dict, str, bytes) depending on the file type, or the initial value if provided.
         """
-        if not self.exists(relative_path):
-            if initial_value is not None:
-                return initial_value
-            raise FileNotFoundError(f"File does not exist: {relative_path}")
+        if self._uses_segments(relative_path):
+            segments = self._list_segments(relative_path)
+            if segments:
+                base = self._load_variants(relative_path, **load_args)
+                frames = [] if base is _NOT_FOUND else [base]
+                frames += [self._parse(seg, **load_args) for seg in segments]
+                import pandas as pd
+                return pd.concat(frames, ignore_index=True)
+        value = self._load_variants(relative_path, **load_args)
+        return self._missing(relative_path, initial_value) if value is _NOT_FOUND else value
+
+    def _variants(self, relative_path):
+        """Stored names of a file: with default_compression the compressed name first, then the plain one."""
+        ext, compression = split_extension(relative_path)
+        if self.default_compression is None or compression is not None or ext == ".parquet":
+            return [relative_path]
+        return [relative_path + _CODEC_EXTENSIONS[self.default_compression], relative_path]
+
+    def _load_variants(self, relative_path, **load_args):
+        """
+        Load the first existing variant of a file (see _variants()), or return _NOT_FOUND.
+
+        The plain variant is only requested if the compressed one is missing and the
+        plain one is not known to be missing; the outcome is recorded in plain_files.
+        """
+        variants = self._variants(relative_path)
+        value = self._load_file(variants[0], _NOT_FOUND, **load_args)
+        for variant in variants[1:]:
+            full_path = self._resolve_path(variant)
+            if value is not _NOT_FOUND or self.plain_files.get(full_path) is False:
+                break
+            value = self._load_file(variant, _NOT_FOUND, **load_args)
+            self.plain_files[full_path] = value is not _NOT_FOUND
+        return value
+
+    def load_folder(self, folder, extension, max_workers=8, **load_args):
+        """
+        Load all files with the given extension in a folder concurrently.
+
+        Compressed files (e.g. '.yaml.gz' for extension '.yaml') are included.
+
+        With a cache, cached files are validated against a single directory listing,
+        so loading an unchanged folder costs one request.
+
+        Args:
+            folder: The folder path relative to the root directory.
+            extension (str): Extension of the files to load, e.g. ".yaml".
+            max_workers (int): Maximum number of concurrent downloads.
+            **load_args: Additional arguments to pass to the file loader.
+
+        Returns:
+            dict: File name to parsed content; empty if the folder does not exist.
+        """
+        try:
+            entries = self.filesystem.ls(self._resolve_path(folder), detail=True)
+        except FileNotFoundError:
+            return {}
+        files = {posixpath.basename(e['name'].rstrip('/')): e for e in entries
+                 if e.get('type') == 'file' and split_extension(e['name'])[0] == extension.lower()}
+
+        def load_entry(name):
+            relative_path = self._join(folder, name)
+            if self.cache is None:
+                return self._parse(relative_path, **load_args)
+            key = self.cache.make_key(self._resolve_path(relative_path), load_args)
+            token = self.cache.make_token(files[name])
+            hit, value = self.cache.get_valid(key, token)
+            if not hit:
+                value, size = self._parse(relative_path, with_size=True, **load_args)
+                self.cache.put(key, token, value, size)
+            return value
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(zip(files, executor.map(load_entry, files)))
+
+    def _load_file(self, relative_path, initial_value=None, **load_args):
+        """Load a single file based on its extension, using the cache if configured (see load())."""
+        if self.cache is None:
+            if self.minimize_round_trips:
+                try:
+                    return self._parse(relative_path, **load_args)
+                except FileNotFoundError:
+                    return self._missing(relative_path, initial_value)
+            if not self.exists(relative_path):
+                return self._missing(relative_path, initial_value)
+            return self._parse(relative_path, **load_args)
 
-        ext = posixpath.splitext(relative_path)[-1].lower()
+        full_path = self._resolve_path(relative_path)
+        key = self.cache.make_key(full_path, load_args)
+        hit, value = self.cache.get_fresh(key)
+        if hit:
+            return value
+        try:
+            if self.minimize_round_trips:
+                return self._load_opened(relative_path, key, **load_args)
+            token = self.cache.make_token(self.filesystem.info(full_path))
+        except FileNotFoundError:
+            self.cache.invalidate(full_path)
+            return self._missing(relative_path, initial_value)
+        hit, value = self.cache.get_valid(key, token)
+        if hit:
+            return value
+        value, size = self._parse(relative_path, with_size=True, **load_args)
+        self.cache.put(key, token, value, size)
+        return value
+
+    def _load_opened(self, relative_path, key, **load_args):
+        """
+        Load a file with a single request, validating the cached value with the file's metadata.
+
+        The file is opened right away and the token taken from the open file (the GET
+        response), instead of asking for its metadata first. On a cache hit the content
+        is not read.
+        """
+        with self.filesystem.open(self._resolve_path(relative_path), "rb") as raw:
+            token = self.cache.make_file_token(raw)
+            if token is not None:
+                hit, value = self.cache.get_valid(key, token)
+                if hit:
+                    return value
+            value, size = self._parse(relative_path, with_size=True, raw=raw, **load_args)
+        if token is not None:
+            self.cache.put(key, token, value, size)
+        return value
+
+    @staticmethod
+    def _missing(relative_path, initial_value):
+        if initial_value is not None:
+            return initial_value
+        raise FileNotFoundError(f"File does not exist: {relative_path}")
+
+    def _parse(self, relative_path, with_size=False, raw=None, **load_args):
+        """
+        Read a file and parse it based on its extension.
+
+        CSV files are parsed straight from the (decompressing) stream, so the text is
+        never held in memory as a whole.
+
+        Args:
+            relative_path: The path relative to the root directory.
+            with_size (bool): If True, also return the size of the parsed content
+                (memory usage for DataFrames, length of the raw content otherwise).
+            raw (file, optional): The file, already opened in binary mode (see _open()).
+            **load_args: Additional arguments to pass to the file loader (pd.read_csv).
+
+        Returns:
+            The parsed data, or a tuple (data, size) if with_size is True.
+        """
+        ext, compression = split_extension(relative_path)
+        full_path = self._resolve_path(relative_path)
+        if ext in _FRAME_EXTENSIONS:
+            import pandas as pd
+            if ext == ".parquet":
+                self._check_parquet_compression(relative_path, compression)
+                load_args.pop('parse_dates', None)  # column types are stored in the file
+                with self._open(full_path, "rb", raw=raw) as f:
+                    value = pd.read_parquet(f, **load_args)
+            else:
+                with self._open(full_path, "r", encoding='utf-8', raw=raw) as f:
+                    value = pd.read_csv(f, **load_args)
+            return (value, int(value.memory_usage(deep=True).sum())) if with_size else value
+
+        with self._open(full_path, "r" if ext in _TEXT_EXTENSIONS else "rb", raw=raw) as f:
+            content = f.read()
         if ext == ".json":
-            return json.loads(self.read_text(relative_path))
+            value = json.loads(content)
         elif ext in [".yaml", ".yml"]:
-            return yaml.safe_load(self.read_text(relative_path))
-        elif ext == ".csv":
-            return pd.read_csv(StringIO(self.read_text(relative_path)), **load_args)       
-        elif ext == ".txt":
-            return self.read_text(relative_path)
+            value = yaml.safe_load(content)
         else:
-            return self.read_binary(relative_path)
+            value = content
+        return (value, len(content)) if with_size else value
+
+    @staticmethod
+    def _check_parquet_compression(relative_path, compression):
+        if compression is not None:
+            raise ValueError(f"Parquet files are compressed internally, use a plain .parquet name: {relative_path}")
 
     def save(self, relative_path, content):
         """
         Save data to a file based on its extension.
 
+        The content is serialized straight into the (compressing) file stream. With
+        default_compression, save('data.csv') writes data.csv.gz and removes a plain
+        data.csv left from before if a load found it (see plain_files).
+
+        In append-log mode the save supersedes the delta segments that exist when it
+        starts; segments appended while it runs are kept. Saves, appends and
+        compactions of the same file must not run concurrently (DataManager runs
+        them one at a time per path, see WriteBehindQueue).
+
         Args:
             relative_path: The path relative to the root directory.
             content: The content to save (e.g., DataFrame, dict, str, bytes).
@@ -133,24 +383,269 @@ class DataHandler:
         Raises:
             ValueError: If the content type doesn't match the file extension.
         """
-        full_path = self._resolve_path(relative_path)
-        parent_dir = posixpath.dirname(full_path)
-
-        # Ensure the parent directory exists
-        if not self.filesystem.exists(parent_dir):
-            self.filesystem.mkdirs(parent_dir, exist_ok=True)
-
-        ext = posixpath.splitext(relative_path)[-1].lower()
+        variants = self._variants(relative_path)
+        full_path = self._resolve_path(variants[0])
+        ext, compression = split_extension(variants[0])
 
-        if isinstance(content, pd.DataFrame) and ext == ".csv":
-            self.write_text(relative_path, content.to_csv(index=False))
+        if _is_frame(content) and ext == ".csv":
+            mode, write_fn = "w", lambda f: content.to_csv(f, index=False)
+        elif _is_frame(content) and ext == ".parquet":
+            self._check_parquet_compression(relative_path, compression)
+            mode, write_fn = "wb", lambda f: f.write(self._to_parquet(content))
         elif isinstance(content, (dict, list)) and ext == ".json":
-            self.write_text(relative_path, json.dumps(content, indent=4))
+            mode, write_fn = "w", lambda f: json.dump(content, f, indent=4)
         elif isinstance(content, (dict, list)) and ext in [".yaml", ".yml"]:
-            self.write_text(relative_path, yaml.dump(content, default_flow_style=False))
+            mode, write_fn = "w", lambda f: yaml.dump(content, f, default_flow_style=False)
         elif isinstance(content, str) and ext == ".txt":
-            self.write_text(relative_path, content)
+            mode, write_fn = "w", lambda f: f.write(content)
         elif isinstance(content, bytes):
-            self.write_binary(relative_path, content)
+            mode, write_fn = "wb", lambda f: f.write(content)
         else:
             raise ValueError(f"Unsupported content type for extension {ext}")
+
+        # A full save supersedes the pending delta segments, but not ones appended meanwhile
+        segments = self._list_segments(relative_path) if self._uses_segments(relative_path) else []
+        self._ensure_parent(full_path)
+        self._write_file(full_path, mode, write_fn)
+        self._remove_stale_variants(variants)
+        self._remove_segments(segments)
+
+    def append(self, relative_path, content):
+        """
+        Append records to a CSV or Parquet file.
+
+        In append-log mode only the new records are uploaded as a small delta segment,
+        so the cost per call does not depend on the size of the existing file. Once
+        compact_threshold segments have accumulated, they are folded into the base file.
+        Without append-log mode the file is loaded, extended and rewritten.
+
+        Args:
+            relative_path: The path relative to the root directory (.csv or .parquet).
+            content (pd.DataFrame or dict): The record(s) to append.
+
+        Raises:
+            ValueError: If the file is not a CSV or Parquet file.
+        """
+        if split_extension(relative_path)[0] not in _FRAME_EXTENSIONS:
+            raise ValueError(f"Append is only supported for CSV and Parquet files: {relative_path}")
+        import pandas as pd
+        if isinstance(content, dict):
+            content = pd.DataFrame([content])
+
+        if not self.append_log:
+            existing = self.load(relative_path, initial_value=pd.DataFrame())
+            self.save(relative_path, pd.concat([existing, content], ignore_index=True))
+            return
+
+        # Time-ordered names keep segments sorted without a shared counter
+        segment_name = f"{time.time_ns():020d}-{secrets.token_hex(4)}{self._segment_suffix(relative_path)}"
+        segment_path = posixpath.join(self._segment_dir(relative_path), segment_name)
+        self._write_frame(segment_path, content)
+
+        if len(self._list_segments(relative_path)) >= self.compact_threshold:
+            self.compact(relative_path)
+
+    def compact(self, relative_path):
+        """
+        Fold all delta segments of a CSV or Parquet file back into its base file.
+
+        The data is read without load arguments so values are written back unchanged.
+        Only the segments listed at the start are folded in and removed. Callers must
+        not compact, save or append the same file concurrently (see save()); if a
+        listed segment disappears while it is read, another compaction got there
+        first and the file is left unchanged.
+
+        Args:
+            relative_path: The path relative to the root directory.
+        """
+        segments = self._list_segments(relative_path)
+        if not segments:
+            return
+        variants = self._variants(relative_path)
+        base = self._load_variants(relative_path)
+        frames = [] if base is _NOT_FOUND else [base]
+        try:
+            frames += [self._parse(seg) for seg in segments]
+        except FileNotFoundError:
+            return
+        import pandas as pd
+        self._write_frame(variants[0], pd.concat(frames, ignore_index=True))
+        self._remove_stale_variants(variants)
+        self._remove_segments(segments)
+
+    def _uses_segments(self, relative_path):
+        return self.append_log and split_extension(relative_path)[0] in _FRAME_EXTENSIONS
+
+    def _segment_suffix(self, relative_path):
+        """File suffix of new delta segments, e.g. '.csv.gz' with default_compression."""
+        ext, compression = split_extension(self._variants(relative_path)[0])
+        return ext if compression is None else ext + _CODEC_EXTENSIONS[compression]
+
+    @staticmethod
+    def _segment_dir(relative_path):
+        return relative_path + ".segments"
+
+    def _write_frame(self, relative_path, df):
+        """Write a DataFrame as CSV or Parquet, leaving delta segments untouched (unlike save())."""
+        full_path = self._resolve_path(relative_path)
+        self._ensure_parent(full_path)
+        ext, compression = split_extension(relative_path)
+        if ext == ".parquet":
+            self._check_parquet_compression(relative_path, compression)
+            self._write_file(full_path, "wb", lambda f: f.write(self._to_parquet(df)))
+        else:
+            self._write_file(full_path, "w", lambda f: df.to_csv(f, index=False))
+
+    def _to_parquet(self, df):
+        """
+        Serialize a DataFrame to Parquet bytes using parquet_schema where it applies.
+
+        Row groups carry min/max statistics, so loads with filters=[...] can skip them.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = None
+        if self.parquet_schema is not None:
+            inferred = pa.Schema.from_pandas(df, preserve_index=False)
+            schema = pa.schema([self.parquet_schema.field(f.name) if f.name in self.parquet_schema.names else f
+                                for f in inferred])
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        buffer = BytesIO()
+        pq.write_table(table, buffer, row_group_size=PARQUET_ROW_GROUP_SIZE, compression='zstd')
+        return buffer.getvalue()
+
+    def ensure_dir(self, relative_path=''):
+        """
+        Create a directory if it does not exist yet.
+
+        With minimize_round_trips, directories created or written to before are not checked again.
+
+        Args:
+            relative_path: The directory path relative to the root directory.
+        """
+        full_path = self._resolve_path(relative_path).rstrip('/')
+        if self.minimize_round_trips and full_path in self.known_dirs:
+            return
+        if not self.filesystem.exists(full_path):
+            self.filesystem.mkdirs(full_path, exist_ok=True)
+        self._remember_dir(full_path)
+
+    def _ensure_parent(self, full_path):
+        """Create the parent directory before a write (deferred to a failed write with minimize_round_trips)."""
+        if not self.minimize_round_trips:
+            parent_dir = posixpath.dirname(full_path)
+            if not self.filesystem.exists(parent_dir):
+                self.filesystem.mkdirs(parent_dir, exist_ok=True)
+
+    @contextmanager
+    def _open(self, full_path, mode, encoding='utf-8', raw=None):
+        """
+        Open a file, (de)compressing it on the fly if its name has a compression suffix.
+
+        The codec wraps the raw binary stream, so only compressed bytes are transferred
+        and the plaintext is never buffered as a whole.
+
+        Args:
+            full_path: The resolved path.
+            mode (str): 'r', 'rb', 'w' or 'wb'.
+            encoding (str): Encoding in text mode.
+            raw (file, optional): The file, already opened in binary mode; it is
+                wrapped instead of opening the file again and left open.
+        """
+        text = 'b' not in mode
+        compression = split_extension(full_path)[1]
+        if compression is None and raw is None:
+            with self.filesystem.open(full_path, mode, **({'encoding': encoding} if text else {})) as f:
+                yield f
+            return
+
+        if compression is not None and compr.get(compression) is None:
+            raise ValueError(f"Compression '{compression}' needs an extra package (e.g. zstandard for .zst)")
+        binary_mode = mode.rstrip('b') + 'b'
+        codec = (lambda f: nullcontext(f)) if compression is None else \
+            (lambda f: compr[compression](f, mode=binary_mode))
+        with (self.filesystem.open(full_path, binary_mode) if raw is None else nullcontext(raw)) as raw, \
+                codec(raw) as f:
+            if not text:
+                yield f
+                return
+            wrapper = io.TextIOWrapper(f, encoding=encoding)
+            try:
+                yield wrapper
+            finally:
+                wrapper.flush()
+                wrapper.detach()  # the codec stream (or raw file) is closed by its own context manager
+
+    def _write_file(self, full_path, mode, write_fn):
+        """
+        Write a file with write_fn(f) and invalidate its cache entry.
+
+        With minimize_round_trips, a write that fails because the parent directory is
+        missing creates the directory and is retried once.
+        """
+        parent_dir = posixpath.dirname(full_path)
+        try:
+            with self._open(full_path, mode) as f:
+                write_fn(f)
+        except Exception as e:
+            if not (self.minimize_round_trips and _is_missing_parent(e)):
+                raise
+            self.known_dirs.discard(parent_dir)
+            self.filesystem.mkdirs(parent_dir, exist_ok=True)
+            with self._open(full_path, mode) as f:
+                write_fn(f)
+        if self.minimize_round_trips:
+            self._remember_dir(parent_dir)
+        self._invalidate(full_path)
+
+    def _remember_dir(self, full_path):
+        """Add a directory and its ancestors to known_dirs."""
+        while full_path and full_path not in self.known_dirs:
+            self.known_dirs.add(full_path)
+            full_path = posixpath.dirname(full_path.rstrip('/'))
+
+    def _list_segments(self, relative_path):
+        """
+        List the delta segments of a file in append order.
+
+        Returns:
+            list: Segment paths relative to the root directory.
+        """
+        segment_dir = self._segment_dir(relative_path)
+        try:
+            entries = self.filesystem.ls(self._resolve_path(segment_dir), detail=False)
+        except FileNotFoundError:
+            return []
+        names = sorted(posixpath.basename(e.rstrip("/")) for e in entries)
+        ext = split_extension(relative_path)[0]
+        return [self._join(segment_dir, n) for n in names if split_extension(n)[0] == ext]
+
+    def _remove_segments(self, segments):
+        for seg in segments:
+            try:
+                self.filesystem.rm(self._resolve_path(seg))
+            except FileNotFoundError:
+                pass  # already folded in by another compaction
+
+    def _remove_stale_variants(self, variants):
+        """
+        After writing variants[0], remove the plain variant of the file if a load found it.
+
+        A plain variant not known to exist is left alone: it costs a request to find
+        out, and loads read the compressed variant first anyway.
+        """
+        for variant in variants[1:]:
+            full_path = self._resolve_path(variant)
+            if not self.plain_files.get(full_path):
+                continue
+            try:
+                self.filesystem.rm(full_path)
+            except FileNotFoundError:
+                pass
+            self.plain_files[full_path] = False
+            self._invalidate(full_path)
+
+    def _invalidate(self, full_path):
+        if self.cache is not None:
+            self.cache.invalidate(full_path)
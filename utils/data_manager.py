@@ -1,13 +1,66 @@
-import fsspec, posixpath
+import posixpath, re, threading, time
 import streamlit as st
-import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from zoneinfo import ZoneInfo
 from utils.data_handler import DataHandler
+from utils.fs_pool import get_filesystem_pool
+from utils.load_cache import get_load_cache
+from utils.mirror_fs import get_mirror_filesystem
+from utils.write_behind import get_write_behind_queue
+from utils.io_metrics import InstrumentedFileSystem, current_scope, get_io_metrics, start_metrics_exporter
+
+# Optional connection pool settings in the [webdav] section of secrets.toml
+_POOL_OPTIONS = ('max_connections', 'max_keepalive_connections', 'keepalive_expiry',
+                 'pool_timeout', 'health_check_interval')
+
+# App-wide folders also kept in the mirror, as a fallback while the storage is
+# unreachable: the credential shards (see CredentialStore), so logins keep working
+_MIRRORED_APP_FOLDERS = ('credentials',)
+
+# pandas, numpy and the modules built on them (record buffer, rollups, analytics) are
+# imported inside the methods that need them, so the login page starts without them.
+
+
+class PrefetchExecutor:
+    """
+    A thread pool for speculative loads that skips work instead of queuing it.
+
+    At most max_pending loads are queued or running; try_submit() returns None
+    beyond that, so a burst of logins cannot pile up storage reads.
+    """
+
+    def __init__(self, max_workers=4, max_pending=16):
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='prefetch')
+        self._slots = threading.BoundedSemaphore(max_pending)
+
+    def try_submit(self, fn):
+        """Runs fn in the pool. Returns its Future, or None if max_pending loads are in flight."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        future = self._executor.submit(fn)
+        future.add_done_callback(lambda _: self._slots.release())  # also called on cancel()
+        return future
+
+
+@st.cache_resource(show_spinner=False)
+def get_prefetch_executor(max_workers=4, max_pending=16):
+    """Returns the process-wide PrefetchExecutor for speculative loads (see DataManager.prefetch_user_data())."""
+    return PrefetchExecutor(max_workers, max_pending)
+
+
+def storage_setting(key, default=None):
+    """Returns a setting of the optional [storage] section of secrets.toml, or default."""
+    try:
+        return st.secrets.get('storage', {}).get(key, default)
+    except FileNotFoundError:
+        return default
 
 
 def _ch_now():
     """Returns current Swiss time as a timezone-naive pandas Timestamp, floored to seconds."""
+    import pandas as pd
     return pd.Timestamp(datetime.now(ZoneInfo('Europe/Zurich')).replace(tzinfo=None)).floor('s')
 
 
@@ -22,8 +75,23 @@ class DataManager:
     reading from and writing to st.session_state explicitly.
 
     Attributes:
-        fs (fsspec.AbstractFileSystem): The filesystem interface
+        fs (fsspec.AbstractFileSystem): The filesystem interface (shared by all sessions)
+        fs_pool (FilesystemPool): The process-wide pool providing fs
         fs_root_folder (str): Root directory for all file operations
+        append_log (bool): Whether CSV/Parquet files are written as base file plus delta segments
+        compact_threshold (int): Number of delta segments before they are compacted
+        cache (LoadCache): Process-wide cache of loaded files, or None if disabled
+        write_queue (WriteBehindQueue): Process-wide background write queue, or None
+            if saves are written synchronously
+        minimize_round_trips (bool): Whether files are read and written without existence checks
+        compression (str): Codec for newly written user data files, or None
+        metrics (IOMetrics): Process-wide collector of storage call metrics, or None
+            if instrumentation is disabled
+        mirror (MirrorFileSystem): Process-wide local mirror of the user data folders,
+            or None if disabled
+        prefetch (dict): User data files loaded in the background at login, mapped to
+            their load arguments (see prefetch_user_data())
+        data_file (str): Name of the file holding each user's records ('data.csv' or 'data.parquet')
     """
 
     def __new__(cls, *args, **kwargs):
@@ -34,37 +102,178 @@ class DataManager:
         st.session_state.data_manager = instance
         return instance
 
-    def __init__(self, fs_protocol='file', fs_root_folder='app_data'):
+    def __init__(self, fs_protocol='file', fs_root_folder='app_data', append_log=False, compact_threshold=20,
+                 cache_max_bytes=32 * 1024 * 1024, cache_ttl=0.0, parquet_schema=None, write_behind=False,
+                 instrument=False, minimize_round_trips=False, compression=None, mirror_folder=None,
+                 mirror_max_bytes=256 * 1024 * 1024, mirror_max_age=60.0, mirror_sync_interval=30.0,
+                 prefetch=None, prefetch_max_age=30.0, data_file='data.csv'):
         """
         Initialize the data manager with filesystem configuration.
 
         Args:
             fs_protocol (str): Protocol for filesystem operations ('file' or 'webdav').
             fs_root_folder (str): Base directory path for all file operations.
+            append_log (bool): Store appended CSV records as small delta segments
+                instead of rewriting the whole file (see append_user_data()).
+            compact_threshold (int): Number of delta segments after which they are
+                folded back into the base file.
+            cache_max_bytes (int): Size limit of the process-wide cache of loaded files.
+                Set to 0 to disable caching.
+            cache_ttl (float): Seconds during which a cached file is reused without
+                checking its metadata. With 0, every load costs one metadata request
+                (with minimize_round_trips, the metadata of the download is used instead,
+                and a still valid download is not read).
+            parquet_schema (pyarrow.Schema, optional): Column types for .parquet files,
+                e.g. utils.data_schema.BMI_DATA_SCHEMA.
+            write_behind (bool): Queue saves and appends for background upload instead of
+                waiting for them. Call flush() to wait for the user's pending writes.
+            instrument (bool): Record call counts, latencies and bytes of all storage calls
+                per session and rerun (see utils.io_metrics). If the [metrics] section of
+                secrets.toml sets a port, the metrics are also served over HTTP.
+            minimize_round_trips (bool): Open files directly instead of checking first that
+                they and their folder exist; folders are created when a write fails because
+                the folder is missing, and remembered for the life of the filesystem.
+            compression (str, optional): Compress user data files written from now on
+                ('gzip', 'bz2', 'xz' or 'zstd'; zstd needs the zstandard package). Callers
+                keep using plain names: 'data.csv' is stored as data.csv.gz, and existing
+                plain files are still read and replaced on their next full save.
+                App-wide files (e.g. credentials) are not affected.
+            mirror_folder (str, optional): Keep local copies of the user data folders in this
+                folder (see utils.mirror_fs). Reads are served from the copies once validated,
+                and while the storage is unreachable user data is read from the copies and
+                writes are queued until it is back. The credential shards are mirrored too,
+                but only read from the copies while the storage is unreachable (logins work,
+                registrations fail). Other app-wide files are always read remotely. With a
+                mirror, the app starts even if the storage is unreachable.
+            mirror_max_bytes (int): Size limit of the local copies (least recently used are evicted).
+            mirror_max_age (float): Seconds during which a copy is read without revalidation.
+            mirror_sync_interval (float): Seconds between background syncs of the mirror.
+            prefetch (dict, optional): User data files to load in the background as soon as
+                the username is known at login, mapped to the load arguments the app
+                uses for them, e.g. {'data.csv': {'parse_dates': ['timestamp']}}
+                (see prefetch_user_data()).
+            prefetch_max_age (float): Seconds after which an unused prefetched file is
+                discarded and loaded again when needed.
+            data_file (str): Name of the file holding each user's records, e.g. 'data.parquet'
+                to store them as Parquet (pass parquet_schema as well).
         """
-        if hasattr(self, 'fs'):
+        if hasattr(self, 'fs_pool'):
             return
         self.fs_root_folder = fs_root_folder
-        self.fs = self._init_filesystem(fs_protocol)
+        self.append_log = append_log
+        self.compact_threshold = compact_threshold
+        self.cache = get_load_cache(cache_max_bytes, cache_ttl) if cache_max_bytes > 0 else None
+        self.parquet_schema = parquet_schema
+        self.data_file = data_file
+        self.minimize_round_trips = minimize_round_trips
+        self.compression = compression
+        self.write_queue = get_write_behind_queue() if write_behind else None
+        self.metrics = self._init_metrics() if instrument else None
+        self.fs_pool = self._init_filesystem(fs_protocol, check=mirror_folder is None)
+        self.prefetch = dict(prefetch or {})
+        self.prefetch_max_age = prefetch_max_age
+        self._prefetched = {}  # file name -> (username, load_args, started, future)
+        self._prefetched_users = set()  # usernames prefetched in this session
+        self.mirror = None
+        if mirror_folder is not None:
+            root = re.escape(fs_root_folder)
+            app_folders = '|'.join(re.escape(folder) for folder in _MIRRORED_APP_FOLDERS)
+            self.mirror = get_mirror_filesystem(self.fs_pool, mirror_folder,
+                                                rf'(^|/){root}/(user_data_[^/]+|{app_folders})/',
+                                                mirror_max_bytes, mirror_max_age, mirror_sync_interval,
+                                                revalidate=rf'(^|/){root}/({app_folders})/')
 
     def info(self):
         """Returns a string with information about the DataManager's internal state."""
         return (
             f"DataManager Information:\n"
-            f"  Filesystem Type: {type(self.fs).__name__}\n"
+            f"  Filesystem Protocol: {self.fs_pool.protocol}\n"
             f"  Root Folder: {self.fs_root_folder}\n"
+            f"  Data File: {self.data_file}\n"
+            f"  Append Log: {self.append_log} (compact after {self.compact_threshold} segments)\n"
+            f"  Minimize Round Trips: {self.minimize_round_trips}\n"
+            f"  Compression: {self.compression or 'none'}\n"
+            f"  Load Cache: {self._cache_info()}\n"
+            f"  Write Behind: {self.write_queue is not None} ({self.pending_writes()} pending)\n"
+            f"  Mirror: {self._mirror_info()}\n"
+            f"  Prefetch: {', '.join(self.prefetch) or 'disabled'}\n"
+            f"  I/O Metrics: {'enabled' if self.metrics is not None else 'disabled'}\n"
         )
 
+    def _cache_info(self):
+        if self.cache is None:
+            return "disabled"
+        return (f"{self.cache.current_bytes} of {self.cache.max_bytes} bytes, "
+                f"{self.cache.hits} hits, {self.cache.misses} misses")
+
+    def _mirror_info(self):
+        if self.mirror is None:
+            return "disabled"
+        return (f"{self.mirror.current_bytes} of {self.mirror.max_bytes} bytes, "
+                f"{'online' if self.mirror.online else 'offline'}, {self.mirror.pending_count()} queued")
+
+    @property
+    def fs(self):
+        """fsspec.AbstractFileSystem: The process-wide shared filesystem (mirrored and instrumented if enabled)."""
+        fs = self.fs_pool.get() if self.mirror is None else self.mirror
+        return fs if self.metrics is None else InstrumentedFileSystem(fs, self.metrics)
+
     @staticmethod
-    def _init_filesystem(protocol: str):
+    def _init_metrics():
+        """Returns the process-wide metrics collector and starts the HTTP exporter if configured."""
+        try:
+            port = st.secrets.get('metrics', {}).get('port')
+        except FileNotFoundError:
+            port = None
+        if port:
+            start_metrics_exporter(int(port), st.secrets['metrics'].get('host', '127.0.0.1'))
+        return get_io_metrics()
+
+    def begin_rerun(self):
+        """
+        Marks the start of a script rerun, so storage calls are grouped per rerun.
+
+        Call once at the top of the main script. Does nothing without instrumentation.
         """
-        Creates and configures an fsspec filesystem instance.
+        if self.metrics is None:
+            return
+        st.session_state['io_rerun'] = st.session_state.get('io_rerun', 0) + 1
+        self.metrics.begin_rerun(*current_scope())
+
+    def _measured(self, op, path, fn):
+        """Returns fn wrapped to record its duration as a DataManager operation (fn itself without metrics)."""
+        if self.metrics is None:
+            return fn
+        scope = current_scope()
+
+        def run():
+            start, error = time.perf_counter(), False
+            try:
+                return fn()
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.metrics.record('data_manager', op, path, time.perf_counter() - start, error=error, scope=scope)
+        return run
+
+    def _init_filesystem(self, protocol: str, check=True):
+        """
+        Returns the process-wide filesystem pool for the given protocol.
+
+        The pool is shared by all sessions, so HTTP connections are reused and a new
+        session does not need to set up its own WebDAV client. Optional pool settings
+        (max_connections, max_keepalive_connections, keepalive_expiry, pool_timeout,
+        health_check_interval) are read from the [webdav] section of secrets.toml.
 
         Args:
             protocol (str): The filesystem protocol ('webdav' or 'file').
+            check (bool): Connect right away and stop the script with an error if the
+                WebDAV server is unreachable. Without the check (e.g. with a mirror that
+                stands in during an outage), the connection is made on first use.
 
         Returns:
-            fsspec.AbstractFileSystem: Configured filesystem instance.
+            FilesystemPool: The shared filesystem pool.
 
         Raises:
             ValueError: If an unsupported protocol is specified.
@@ -75,31 +284,52 @@ class DataManager:
             except (KeyError, FileNotFoundError):
                 st.error("WebDAV-Konfiguration fehlt. Bitte überprüfen Sie die secrets.toml Datei.")
                 st.stop()
+            pool_options = {key: secrets[key] for key in _POOL_OPTIONS if key in secrets}
             try:
-                return fsspec.filesystem('webdav',
-                                         base_url=secrets['base_url'],
-                                         auth=(secrets['username'], secrets['password']))
+                pool = get_filesystem_pool('webdav',
+                                           base_url=secrets['base_url'],
+                                           auth=(secrets['username'], secrets['password']),
+                                           health_check_path=self.fs_root_folder,
+                                           **pool_options)
+                if check:
+                    pool.get()
+                return pool
             except Exception as e:
                 st.error(f"Verbindung zu WebDAV fehlgeschlagen: {e}")
                 st.stop()
         elif protocol == 'file':
-            return fsspec.filesystem('file')
+            return get_filesystem_pool('file', health_check_path=self.fs_root_folder)
         else:
             raise ValueError(f"DataManager: Invalid filesystem protocol: {protocol}")
 
-    def _get_data_handler(self, subfolder=None):
+    def _get_data_handler(self, subfolder=None, default_compression=None):
         """
         Creates a DataHandler instance for the specified subfolder.
 
         Args:
             subfolder (str, optional): Subfolder path relative to root folder.
+            default_compression (str, optional): Codec for files saved under plain names.
 
         Returns:
             DataHandler: Configured for operations in the specified folder.
         """
-        if subfolder is None:
-            return DataHandler(self.fs, self.fs_root_folder)
-        return DataHandler(self.fs, posixpath.join(self.fs_root_folder, subfolder))
+        root_path = self.fs_root_folder if subfolder is None else posixpath.join(self.fs_root_folder, subfolder)
+        return DataHandler(self.fs, root_path, append_log=self.append_log,
+                           compact_threshold=self.compact_threshold, cache=self.cache,
+                           parquet_schema=self.parquet_schema, minimize_round_trips=self.minimize_round_trips,
+                           known_dirs=self.fs_pool.known_dirs, default_compression=default_compression,
+                           plain_files=self.fs_pool.plain_files)
+
+    def _get_user_data_handler(self, username):
+        """Creates a DataHandler for a user's data folder, compressing new files if configured."""
+        return self._get_data_handler('user_data_' + username, default_compression=self.compression)
+
+    def _write_group(self, username=None):
+        """Write-behind group of a user's data folder (the logged-in user's by default, else app-wide data)."""
+        username = username or st.session_state.get('username')
+        if username is None:
+            return self.fs_root_folder
+        return posixpath.join(self.fs_root_folder, 'user_data_' + username)
 
     def load_app_data(self, file_name, initial_value=None, **load_args):
         """
@@ -114,7 +344,8 @@ class DataManager:
             The loaded data (DataFrame, dict, list, etc.).
         """
         dh = self._get_data_handler()
-        return dh.load(file_name, initial_value, **load_args)
+        return self._measured('load', dh._resolve_path(file_name),
+                              lambda: dh.load(file_name, initial_value, **load_args))()
 
     def load_user_data(self, file_name, initial_value=None, **load_args):
         """
@@ -132,8 +363,73 @@ class DataManager:
         if username is None:
             st.error(f"DataManager: No user logged in, cannot load '{file_name}'")
             return initial_value
-        dh = self._get_data_handler('user_data_' + username)
-        return dh.load(file_name, initial_value, **load_args)
+        dh = self._get_user_data_handler(username)
+        future = self._take_prefetched(username, file_name, load_args)
+        if future is not None:
+            try:
+                # Waits for the prefetch if it is still in flight
+                return self._measured('load', dh._resolve_path(file_name), future.result)()
+            except FileNotFoundError:
+                return dh._missing(file_name, initial_value)
+            except Exception:
+                pass  # a failed speculative load is repeated below
+        return self._measured('load', dh._resolve_path(file_name),
+                              lambda: dh.load(file_name, initial_value, **load_args))()
+
+    def prefetch_user_data(self, username):
+        """
+        Start loading a user's prefetch files in the background, before the user is logged in.
+
+        Called by LoginManager as soon as the username is known (login form submitted
+        or session cookie restored), so the loads overlap with authentication. The
+        first load_user_data() call for a file with the same load arguments then gets
+        the result of the load in flight or completed instead of reading the file
+        again. Results of an earlier prefetch are discarded.
+
+        The username is not authenticated yet, so the reads are limited: each user is
+        prefetched at most once per session (repeated failed logins cause no further
+        reads), and nothing is started while the process-wide pool already has its
+        maximum of loads in flight.
+
+        Args:
+            username (str): The user whose files to load; not necessarily authenticated yet.
+
+        Returns:
+            bool: Whether loads were started.
+        """
+        self.discard_prefetch()
+        if not self.prefetch or username in self._prefetched_users:
+            return False
+        self._prefetched_users.add(username)
+        executor = get_prefetch_executor()
+        dh = self._get_user_data_handler(username)
+        started = time.monotonic()
+        for file_name, load_args in self.prefetch.items():
+            load = self._measured('prefetch', dh._resolve_path(file_name), partial(dh.load, file_name, **load_args))
+            future = executor.try_submit(load)
+            if future is None:
+                self.discard_prefetch()
+                return False
+            self._prefetched[file_name] = (username, load_args, started, future)
+        return True
+
+    def discard_prefetch(self):
+        """Drops the results of prefetch_user_data(), e.g. after a failed login or a logout."""
+        for *_, future in self._prefetched.values():
+            future.cancel()
+        self._prefetched.clear()
+
+    def _take_prefetched(self, username, file_name, load_args):
+        """Removes and returns the prefetch of a file if it matches the load, else None."""
+        entry = self._prefetched.pop(file_name, None)
+        if entry is None:
+            return None
+        prefetched_user, prefetched_args, started, future = entry
+        if (prefetched_user != username or prefetched_args != load_args
+                or time.monotonic() - started > self.prefetch_max_age):
+            future.cancel()
+            return None
+        return future
 
     def save_app_data(self, data, file_name):
         """
@@ -144,7 +440,7 @@ class DataManager:
             file_name (str): Name of the file to save to.
         """
         dh = self._get_data_handler()
-        dh.save(file_name, data)
+        self._write(dh, file_name, 'save', lambda: dh.save(file_name, data), coalesce=True)
 
     def save_user_data(self, data, file_name):
         """
@@ -158,38 +454,205 @@ class DataManager:
         if username is None:
             st.error("DataManager: No user logged in, cannot save data")
             return
-        dh = self._get_data_handler('user_data_' + username)
-        dh.save(file_name, data)
+        dh = self._get_user_data_handler(username)
+        self._write(dh, file_name, 'save', lambda: dh.save(file_name, data), coalesce=True)
+
+    def append_user_data(self, records, file_name):
+        """
+        Append records to a CSV or Parquet file in the current user's data folder.
+
+        With append_log enabled only the new records are uploaded, so the cost does
+        not grow with the user's history. Otherwise the file is rewritten.
+
+        Args:
+            records (pd.DataFrame or dict): The record(s) to append.
+            file_name (str): Name of the CSV or Parquet file to append to.
+        """
+        username = st.session_state.get('username')
+        if username is None:
+            st.error("DataManager: No user logged in, cannot append data")
+            return
+        dh = self._get_user_data_handler(username)
+        self._write(dh, file_name, 'append', lambda: dh.append(file_name, records))
+
+    def load_rollups(self, data, file_name='rollups.json'):
+        """
+        Load the current user's time rollups (see utils.rollups.TimeRollups).
+
+        The stored rollups are rebuilt from data and saved if they are missing, were
+        written by another rollup version, or do not match data (e.g. after an edit).
+
+        Args:
+            data (pd.DataFrame): The user's records the rollups belong to.
+            file_name (str): Name of the rollup file in the user's data folder.
+
+        Returns:
+            TimeRollups: Rollups matching data.
+        """
+        from utils.rollups import TimeRollups
+        if len(data) == 0:
+            return TimeRollups()  # saved with the first appended record
+        rollups = TimeRollups.from_dict(self.load_user_data(file_name, initial_value={}))
+        if rollups is None or not rollups.is_current(data):
+            rollups = self.rebuild_rollups(data, file_name)
+        return rollups
+
+    def rebuild_rollups(self, data, file_name='rollups.json'):
+        """
+        Rebuild the current user's time rollups from all records and save them.
+
+        Call this after records were edited or deleted.
+
+        Args:
+            data (pd.DataFrame): All records of the user.
+            file_name (str): Name of the rollup file in the user's data folder.
+
+        Returns:
+            TimeRollups: The rebuilt rollups.
+        """
+        from utils.rollups import TimeRollups
+        rollups = TimeRollups.from_frame(data)
+        self.save_user_data(rollups.to_dict(), file_name)
+        return rollups
+
+    def append_rollups(self, rollups, records, file_name='rollups.json'):
+        """
+        Add new records to the current user's time rollups and save them.
+
+        Updating costs O(1) per record; only the compact rollup file is written.
+        The rollups are shared by the user's sessions: their lock is held while
+        adding and queuing the save, so saves are queued in the order of the
+        updates and the last one written contains the records of all sessions.
+
+        Args:
+            rollups (TimeRollups): The rollups to update in place.
+            records (pd.DataFrame or list of dict): The appended records (with timestamp).
+            file_name (str): Name of the rollup file in the user's data folder.
+        """
+        with rollups.lock:
+            rollups.extend(records)
+            self.save_user_data(rollups.to_dict(), file_name)
+
+    def aggregate_user_data(self, file_name=None, max_workers=8):
+        """
+        Aggregate a data file over all users (BMI distribution, categories, monthly trend).
+
+        User folders are read concurrently and summarized one frame at a time. Per-user
+        summaries are kept in an index file (analytics/<file_name>.summary.json), so
+        later runs only re-read folders whose data changed.
+
+        Args:
+            file_name (str, optional): The per-user data file to aggregate (data_file by default).
+            max_workers (int): Maximum number of concurrent requests.
+
+        Returns:
+            CohortSummary: The aggregates over all users.
+        """
+        from utils.analytics import summarize_user_folders
+        file_name = file_name or self.data_file
+        index_file = posixpath.join('analytics', file_name + '.summary.json')
+        index = self.load_app_data(index_file, initial_value={})
+        summary, new_index, n_changed = summarize_user_folders(
+            self.fs, self.fs_root_folder, file_name, index, self.append_log, max_workers, self.compression)
+        if n_changed or new_index.keys() != index.keys():
+            self.save_app_data(new_index, index_file)
+        return summary
+
+    def _write(self, dh, file_name, op, write_fn, coalesce=False):
+        """Runs a write now, or queues it in write-behind mode (see WriteBehindQueue.submit())."""
+        path = dh._resolve_path(file_name)
+        write_fn = self._measured(op, path, write_fn)
+        if self.write_queue is None:
+            write_fn()
+        else:
+            self.write_queue.submit(path, write_fn, coalesce, group=dh.root_path)
+
+    def pending_writes(self, username=None):
+        """
+        Returns the number of the user's queued writes not yet stored (always 0 without write-behind).
+
+        Args:
+            username (str, optional): Defaults to the logged-in user.
+        """
+        return 0 if self.write_queue is None else self.write_queue.pending_count(self._write_group(username))
+
+    def failed_writes(self, username=None):
+        """
+        Returns the user's most recent failed background writes as (path, error, time) tuples.
+
+        Args:
+            username (str, optional): Defaults to the logged-in user.
+        """
+        return [] if self.write_queue is None else self.write_queue.failed_writes(self._write_group(username))
+
+    def flush(self, timeout=30, username=None):
+        """
+        Waits until the user's queued writes are stored. Writes of other users are not waited for.
+
+        Args:
+            timeout (float): Maximum seconds to wait.
+            username (str, optional): Defaults to the logged-in user.
+
+        Returns:
+            bool: True if none of the user's writes are pending anymore.
+        """
+        return True if self.write_queue is None else self.write_queue.flush(timeout, self._write_group(username))
 
     @staticmethod
     def append_record(data, record_dict):
         """
-        Append a new record to a DataFrame or list and return the result.
+        Append a new record to a DataFrame, list or RecordBuffer and return the result.
 
-        This is a pure function — it does not modify session state or save to
-        storage. Use save_user_data() or save_app_data() to persist the result.
+        This does not modify session state or save to storage. Use save_user_data()
+        or save_app_data() to persist the result. DataFrames and lists are copied
+        (O(n) per call); a RecordBuffer is extended in place in amortized O(1) and
+        returned.
 
         A timestamp is automatically added if not present in record_dict.
 
         Args:
-            data (pd.DataFrame or list): The existing data to append to.
+            data (pd.DataFrame, list or RecordBuffer): The existing data to append to.
             record_dict (dict): The new record to append.
 
         Returns:
-            A new DataFrame or list with the record appended.
+            A new DataFrame or list, or the extended RecordBuffer.
 
         Raises:
-            ValueError: If record_dict is not a dict, or data is not a DataFrame/list.
+            ValueError: If record_dict is not a dict, or data is not a DataFrame/list/RecordBuffer.
         """
         if not isinstance(record_dict, dict):
             raise ValueError("DataManager: record_dict must be a dictionary")
+        return DataManager.append_records(data, [record_dict])
+
+    @staticmethod
+    def append_records(data, records):
+        """
+        Append several records at once (see append_record()).
+
+        Args:
+            data (pd.DataFrame, list or RecordBuffer): The existing data to append to.
+            records (list of dict): The new records to append.
 
-        if 'timestamp' not in record_dict:
-            record_dict = {**record_dict, 'timestamp': _ch_now()}
+        Returns:
+            A new DataFrame or list, or the extended RecordBuffer.
 
-        if isinstance(data, pd.DataFrame):
-            return pd.concat([data, pd.DataFrame([record_dict])], ignore_index=True)
+        Raises:
+            ValueError: If a record is not a dict, or data is not a DataFrame/list/RecordBuffer.
+        """
+        if not all(isinstance(r, dict) for r in records):
+            raise ValueError("DataManager: records must be dictionaries")
+        import pandas as pd
+        from utils.record_buffer import RecordBuffer
+
+        now = _ch_now()
+        records = [r if 'timestamp' in r else {**r, 'timestamp': now} for r in records]
+
+        if isinstance(data, RecordBuffer):
+            data.extend(records)
+            return data
+        elif isinstance(data, pd.DataFrame):
+            return pd.concat([data, pd.DataFrame(records)], ignore_index=True)
         elif isinstance(data, list):
-            return data + [record_dict]
+            return data + records
         else:
-            raise ValueError("DataManager: data must be a DataFrame or a list")
+            raise ValueError("DataManager: data must be a DataFrame, a list or a RecordBuffer")
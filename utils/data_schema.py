@@ -0,0 +1,11 @@
+import pyarrow as pa
+
+# Column types of the BMI records stored in user_data_*/data.parquet.
+# category is dictionary encoded and loads as a pandas categorical column.
+BMI_DATA_SCHEMA = pa.schema([
+    pa.field('timestamp', pa.timestamp('us')),
+    pa.field('height', pa.float64()),
+    pa.field('weight', pa.float64()),
+    pa.field('bmi', pa.float64()),
+    pa.field('category', pa.dictionary(pa.int8(), pa.string())),
+])
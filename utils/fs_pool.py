@@ -0,0 +1,170 @@
+import threading, time
+import fsspec
+import streamlit as st
+
+
+def is_offline_error(e):
+    """Whether an exception means the remote storage is unreachable (rather than e.g. a missing file)."""
+    if isinstance(e, (ConnectionError, TimeoutError)):
+        return True
+    status = getattr(e, 'status_code', None) or getattr(getattr(e, 'response', None), 'status_code', None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    try:
+        import httpx
+        if isinstance(e, httpx.TransportError):
+            return True
+    except ImportError:
+        pass
+    try:
+        from webdav4.client import BadGatewayError
+        return isinstance(e, BadGatewayError)
+    except ImportError:
+        return False
+
+
+class FilesystemPool:
+    """
+    A process-wide holder for one shared fsspec filesystem.
+
+    Streamlit creates a new DataManager for every browser session. Sharing the
+    filesystem between them means all sessions reuse the same HTTP client, so
+    keep-alive connections (and their TLS handshakes) are shared instead of being
+    opened per session.
+
+    The filesystem is health-checked at most every health_check_interval seconds
+    and recreated if its connection broke. The check runs outside the lock, so a
+    slow request does not stall the other sessions.
+
+    Attributes:
+        protocol (str): The fsspec protocol ('file' or 'webdav').
+        health_check_path (str): Path used for the health check request.
+        health_check_interval (float): Seconds between health checks.
+        known_dirs (set): Directories known to exist on the current filesystem; cleared
+            when the filesystem is recreated (see DataHandler minimize_round_trips).
+        plain_files (dict): Whether uncompressed variants of compressed files exist, by
+            path, where known (see DataHandler plain_files).
+    """
+
+    def __init__(self, protocol, fs_options=None, health_check_path='', health_check_interval=60.0):
+        """
+        Initialize the pool. The filesystem is created lazily on first use.
+
+        Args:
+            protocol (str): The fsspec protocol ('file' or 'webdav').
+            fs_options (dict, optional): Keyword arguments for fsspec.filesystem().
+            health_check_path (str): Path checked with exists() to verify the connection.
+            health_check_interval (float): Seconds between health checks.
+        """
+        self.protocol = protocol
+        self.fs_options = fs_options or {}
+        self.health_check_path = health_check_path
+        self.health_check_interval = health_check_interval
+        self._fs = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self.known_dirs = set()
+        self.plain_files = {}
+
+    def get(self):
+        """
+        Returns the shared filesystem, creating or replacing it if necessary.
+
+        Returns:
+            fsspec.AbstractFileSystem: The shared filesystem instance.
+
+        Raises:
+            Exception: If the storage is unreachable even with a new connection, or the
+                health check failed for another reason (e.g. rejected credentials).
+        """
+        with self._lock:
+            now = time.monotonic()
+            fs, created = self._fs, self._fs is None
+            if created:
+                fs = self._fs = self._create()
+            elif now - self._last_check <= self.health_check_interval:
+                return fs
+            self._last_check = now  # other sessions keep using fs while it is checked
+        try:
+            self._check(fs)  # for a new filesystem, this also warms up the connection
+            return fs
+        except Exception as e:
+            if created or not is_offline_error(e):
+                if created:
+                    self._discard(fs)
+                raise
+        fs = self._replace(fs)
+        self._check(fs)
+        return fs
+
+    def _create(self):
+        # skip_instance_cache: the pool, not fsspec, owns the instance lifecycle
+        return fsspec.filesystem(self.protocol, skip_instance_cache=True, **self.fs_options)
+
+    def _check(self, fs):
+        """Raises if a request to the storage fails (a missing health check path is fine)."""
+        try:
+            fs.info(self.health_check_path)  # not exists(): that swallows all errors
+        except FileNotFoundError:
+            pass
+
+    def _replace(self, broken):
+        """Replaces a filesystem with a broken connection, unless another session already did."""
+        with self._lock:
+            if self._fs is broken:
+                self._close(broken)
+                self._fs = self._create()
+                self.known_dirs.clear()
+            return self._fs
+
+    def _discard(self, fs):
+        """Forgets a new filesystem that failed its first check, so the next call retries."""
+        with self._lock:
+            if self._fs is fs:
+                self._fs = None
+
+    @staticmethod
+    def _close(fs):
+        client = getattr(fs, 'client', None)
+        http = getattr(client, 'http', None)
+        if http is not None:
+            http.close()
+
+
+@st.cache_resource(show_spinner=False)
+def get_filesystem_pool(protocol, base_url=None, auth=None, max_connections=10,
+                        max_keepalive_connections=5, keepalive_expiry=60.0, pool_timeout=30.0,
+                        health_check_path='', health_check_interval=60.0):
+    """
+    Returns the process-wide FilesystemPool for the given configuration.
+
+    Cached with st.cache_resource, so all sessions with the same configuration
+    share one pool.
+
+    Args:
+        protocol (str): The fsspec protocol ('file' or 'webdav').
+        base_url (str, optional): WebDAV base URL.
+        auth (tuple, optional): WebDAV (username, password).
+        max_connections (int): Maximum open HTTP connections. Since every request
+            needs its own connection, this also bounds the requests in flight.
+        max_keepalive_connections (int): Maximum idle connections kept open.
+        keepalive_expiry (float): Seconds an idle connection is kept open.
+        pool_timeout (float): Seconds a request waits for a free connection.
+        health_check_path (str): Path checked with exists() to verify the connection.
+        health_check_interval (float): Seconds between health checks.
+
+    Returns:
+        FilesystemPool: The shared pool.
+    """
+    fs_options = {}
+    if protocol == 'webdav':
+        import httpx
+        fs_options = {
+            'base_url': base_url,
+            'auth': auth,
+            'limits': httpx.Limits(max_connections=max_connections,
+                                   max_keepalive_connections=max_keepalive_connections,
+                                   keepalive_expiry=keepalive_expiry),
+            'timeout': httpx.Timeout(30.0, pool=pool_timeout),
+        }
+    return FilesystemPool(protocol, fs_options, health_check_path, health_check_interval)
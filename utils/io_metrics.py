@@ -0,0 +1,451 @@
+import json, re, threading, time
+from collections import OrderedDict, deque
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Filesystem methods that correspond to one request on a remote filesystem
+ROUND_TRIP_METHODS = ('exists', 'info', 'ls', 'find', 'isdir', 'isfile', 'mkdir', 'mkdirs', 'makedirs',
+                      'rm', 'rm_file', 'cat_file', 'pipe_file', 'cp_file', 'mv')
+
+_USER_FOLDER = re.compile(r'user_data_[^/]+')
+_SEGMENT_FILE = re.compile(r'\.segments/[^/]+$')
+
+
+def path_group(path):
+    """
+    Maps a path to a low-cardinality label: user folders and delta segments are collapsed.
+
+    Example: 'BMLD_App_DB/user_data_anna/data.csv.segments/0001-ab.csv'
+    becomes 'BMLD_App_DB/user_data_*/data.csv.segments/*'.
+    """
+    return _SEGMENT_FILE.sub('.segments/*', _USER_FOLDER.sub('user_data_*', str(path)))
+
+
+def current_scope():
+    """
+    Returns the (session id, rerun number) of the running script.
+
+    Calls from threads without a script context (e.g. background writes started
+    outside a session) are attributed to the session 'background'.
+    """
+    ctx = get_script_run_ctx(suppress_warning=True)
+    if ctx is None:
+        return 'background', 0
+    return ctx.session_id, st.session_state.get('io_rerun', 0)
+
+
+def can_view_metrics(username):
+    """
+    Whether a user may see the process-wide I/O metrics (the I/O Debug page).
+
+    The metrics cover all sessions, so only the users listed as admins in the
+    [metrics] section of secrets.toml may see or reset them.
+    """
+    try:
+        admins = st.secrets.get('metrics', {}).get('admins', [])
+    except FileNotFoundError:
+        admins = []
+    return username is not None and username in admins
+
+
+class _Stats:
+    """Count, errors, total seconds, bytes and latency histogram of one operation."""
+    __slots__ = ('count', 'errors', 'seconds', 'bytes_read', 'bytes_written', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def add(self, seconds, bytes_read, bytes_written, error):
+        self.count += 1
+        self.errors += int(error)
+        self.seconds += seconds
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+        self.buckets[_bucket(seconds)] += 1
+
+    def quantile(self, q):
+        """Estimates a latency quantile in seconds from the histogram (upper bucket bound)."""
+        rank, seen = q * self.count, 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if n and seen >= rank:
+                return LATENCY_BUCKETS[i] if i < len(LATENCY_BUCKETS) else float('inf')
+        return 0.0
+
+    def to_dict(self):
+        return {'count': self.count, 'errors': self.errors, 'seconds': self.seconds,
+                'bytes_read': self.bytes_read, 'bytes_written': self.bytes_written,
+                'buckets': list(self.buckets)}
+
+
+def _bucket(seconds):
+    for i, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(LATENCY_BUCKETS)
+
+
+class IOMetrics:
+    """
+    Thread-safe collector of storage call metrics.
+
+    Every call is recorded under (layer, operation, path group): 'fs' for
+    filesystem requests and file transfers, 'data_manager' for DataManager
+    loads and writes, 'auth' for password hashing. Totals are kept for the
+    whole process and, per session, for the most recent script reruns. Gauges
+    (e.g. queue depths) are read from callables when the metrics are exported.
+
+    Attributes:
+        max_sessions (int): Number of sessions kept (least recently active are dropped).
+        max_reruns (int): Number of reruns kept per session.
+        started (float): Time when collection started or was last reset.
+    """
+
+    def __init__(self, max_sessions=200, max_reruns=20):
+        """
+        Initialize an empty collector.
+
+        Args:
+            max_sessions (int): Number of sessions kept.
+            max_reruns (int): Number of reruns kept per session.
+        """
+        self.max_sessions = max_sessions
+        self.max_reruns = max_reruns
+        self._lock = threading.Lock()
+        self._gauges = {}  # name -> (callable, help text); kept on reset()
+        self.reset()
+
+    def reset(self):
+        """Discards all recorded metrics."""
+        with self._lock:
+            self.started = time.time()
+            self._totals = {}
+            self._sessions = OrderedDict()  # session id -> deque of rerun dicts
+
+    def begin_rerun(self, session_id, rerun):
+        """Starts a new rerun entry for a session."""
+        with self._lock:
+            reruns = self._session(session_id)
+            reruns.append({'rerun': rerun, 'started': time.time(), 'ops': {}})
+
+    def record(self, layer, op, path, seconds, bytes_read=0, bytes_written=0, error=False, scope=None):
+        """
+        Records one call.
+
+        Args:
+            layer (str): 'fs', 'data_manager' or 'auth'.
+            op (str): Operation name, e.g. 'info' or 'load'.
+            path (str): The path the operation acted on.
+            seconds (float): Duration of the call.
+            bytes_read (int): Bytes downloaded.
+            bytes_written (int): Bytes uploaded.
+            error (bool): Whether the call raised an exception.
+            scope (tuple, optional): (session id, rerun) to attribute the call to;
+                defaults to current_scope().
+        """
+        session_id, rerun = scope or current_scope()
+        key = (layer, op, path_group(path))
+        with self._lock:
+            self._totals.setdefault(key, _Stats()).add(seconds, bytes_read, bytes_written, error)
+            reruns = self._session(session_id)
+            entry = next((r for r in reversed(reruns) if r['rerun'] == rerun), None)
+            if entry is None:
+                entry = {'rerun': rerun, 'started': time.time(), 'ops': {}}
+                reruns.append(entry)
+            entry['ops'].setdefault(key, _Stats()).add(seconds, bytes_read, bytes_written, error)
+
+    def add_gauge(self, name, fn, help_text=''):
+        """
+        Registers a gauge whose current value is read when the metrics are exported.
+
+        Args:
+            name (str): Metric name without prefix, e.g. 'password_hash_queue_depth'.
+            fn (callable): Returns the current value (a number).
+            help_text (str): Description for the Prometheus HELP line.
+        """
+        with self._lock:
+            self._gauges[name] = (fn, help_text)
+
+    def gauges(self):
+        """Returns the current values of all gauges as {name: value}."""
+        with self._lock:
+            gauges = dict(self._gauges)
+        return {name: fn() for name, (fn, _) in sorted(gauges.items())}
+
+    def _session(self, session_id):
+        reruns = self._sessions.get(session_id)
+        if reruns is None:
+            reruns = self._sessions[session_id] = deque(maxlen=self.max_reruns)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self._sessions.move_to_end(session_id)
+        return reruns
+
+    def totals(self):
+        """
+        Returns the process-wide metrics.
+
+        Returns:
+            list of dict: One row per (layer, op, path) with count, errors, seconds,
+            bytes, p50/p95 estimates and histogram buckets.
+        """
+        with self._lock:
+            return [self._row(key, stats) for key, stats in sorted(self._totals.items())]
+
+    def session_reruns(self, session_id):
+        """
+        Returns the metrics of a session's recent reruns, newest first.
+
+        Returns:
+            list of dict: Per rerun its number, start time, totals and 'ops' rows.
+        """
+        with self._lock:
+            reruns = list(self._sessions.get(session_id, ()))
+            result = []
+            for r in reversed(reruns):
+                ops = [self._row(key, stats) for key, stats in sorted(r['ops'].items())]
+                result.append({'rerun': r['rerun'], 'started': r['started'],
+                               'calls': sum(o['count'] for o in ops if o['layer'] == 'fs'),
+                               'seconds': sum(o['seconds'] for o in ops if o['layer'] == 'fs'),
+                               'bytes': sum(o['bytes_read'] + o['bytes_written'] for o in ops if o['layer'] == 'fs'),
+                               'ops': ops})
+            return result
+
+    @staticmethod
+    def _row(key, stats):
+        layer, op, path = key
+        return {'layer': layer, 'op': op, 'path': path, **stats.to_dict(),
+                'p50': stats.quantile(0.5), 'p95': stats.quantile(0.95)}
+
+    def to_json(self):
+        """Returns the process-wide metrics as a JSON string."""
+        with self._lock:
+            n_sessions = len(self._sessions)
+        return json.dumps({'started': self.started, 'sessions': n_sessions, 'buckets': list(LATENCY_BUCKETS),
+                           'metrics': self.totals(), 'gauges': self.gauges()}, indent=2)
+
+    def to_prometheus(self, prefix='bmi_io'):
+        """
+        Returns the process-wide metrics in the Prometheus text exposition format.
+
+        Args:
+            prefix (str): Prefix of the metric names.
+        """
+        rows = self.totals()
+        lines = [f"# HELP {prefix}_calls_total Storage calls.", f"# TYPE {prefix}_calls_total counter"]
+        lines += [f"{prefix}_calls_total{{{_labels(r)}}} {r['count']}" for r in rows]
+        lines += [f"# HELP {prefix}_errors_total Storage calls that raised an exception.",
+                  f"# TYPE {prefix}_errors_total counter"]
+        lines += [f"{prefix}_errors_total{{{_labels(r)}}} {r['errors']}" for r in rows]
+        lines += [f"# HELP {prefix}_bytes_total Bytes transferred.", f"# TYPE {prefix}_bytes_total counter"]
+        for r in rows:
+            lines.append(f"{prefix}_bytes_total{{{_labels(r)},direction=\"read\"}} {r['bytes_read']}")
+            lines.append(f"{prefix}_bytes_total{{{_labels(r)},direction=\"write\"}} {r['bytes_written']}")
+        lines += [f"# HELP {prefix}_duration_seconds Duration of storage calls.",
+                  f"# TYPE {prefix}_duration_seconds histogram"]
+        for r in rows:
+            cumulative = 0
+            for bound, n in zip(LATENCY_BUCKETS + ('+Inf',), r['buckets']):
+                cumulative += n
+                lines.append(f"{prefix}_duration_seconds_bucket{{{_labels(r)},le=\"{bound}\"}} {cumulative}")
+            lines.append(f"{prefix}_duration_seconds_sum{{{_labels(r)}}} {r['seconds']}")
+            lines.append(f"{prefix}_duration_seconds_count{{{_labels(r)}}} {r['count']}")
+        with self._lock:
+            help_texts = {name: help_text for name, (_, help_text) in self._gauges.items()}
+        for name, value in self.gauges().items():
+            lines += [f"# HELP {prefix}_{name} {help_texts[name]}", f"# TYPE {prefix}_{name} gauge",
+                      f"{prefix}_{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def _labels(row):
+    escape = lambda v: str(v).replace('\\', '\\\\').replace('"', '\\"')
+    return f'layer="{escape(row["layer"])}",op="{escape(row["op"])}",path="{escape(row["path"])}"'
+
+
+class InstrumentedFileSystem:
+    """
+    Wraps an fsspec filesystem and records every request in an IOMetrics collector.
+
+    Calls are attributed to the session and rerun that created the wrapper, so
+    work done later on its behalf (thread pools, background writes) is counted
+    for the rerun that caused it.
+    """
+
+    def __init__(self, fs, metrics, scope=None):
+        """
+        Args:
+            fs: The fsspec filesystem to wrap.
+            metrics (IOMetrics): The collector.
+            scope (tuple, optional): (session id, rerun); defaults to current_scope().
+        """
+        self.fs = fs
+        self.metrics = metrics
+        self.scope = scope or current_scope()
+
+    def open(self, path, mode='rb', **kwargs):
+        """Opens a file. The transfer is recorded as 'read' or 'write' when the file is closed."""
+        start = time.perf_counter()
+        try:
+            f = self.fs.open(path, mode, **kwargs)
+        except Exception:
+            self.metrics.record('fs', 'open', path, time.perf_counter() - start, error=True, scope=self.scope)
+            raise
+        op = 'read' if 'r' in mode and '+' not in mode else 'write'
+
+        def record(n_bytes):
+            sizes = {'bytes_read': n_bytes} if op == 'read' else {'bytes_written': n_bytes}
+            self.metrics.record('fs', op, path, time.perf_counter() - start, scope=self.scope, **sizes)
+        return MeteredFile(f, on_close=record)
+
+    def __getattr__(self, name):
+        attr = getattr(self.fs, name)
+        if name not in ROUND_TRIP_METHODS or not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            path = args[0] if args else kwargs.get('path', '')
+            start, error = time.perf_counter(), False
+            try:
+                return attr(*args, **kwargs)
+            except Exception:
+                error = True
+                raise
+            finally:
+                self.metrics.record('fs', name, path, time.perf_counter() - start, error=error, scope=self.scope)
+        return call
+
+
+class MeteredFile:
+    """
+    File wrapper that counts the bytes read from or written to a file.
+
+    Reads (read, read1, readinto, iteration) and writes call on_transfer(n_bytes);
+    on_close(total_bytes) is called once when the file is closed. Shared by
+    InstrumentedFileSystem and the latency-injecting filesystem of the benchmarks
+    (tools.latency_fs), so both meter the same calls.
+
+    Attributes:
+        transferred (int): Bytes read or written so far.
+    """
+
+    def __init__(self, f, on_transfer=None, on_close=None):
+        """
+        Args:
+            f: The file object to wrap.
+            on_transfer (callable, optional): Called with the size of every read or write.
+            on_close (callable, optional): Called with the total bytes when the file is closed.
+        """
+        self._f = f
+        self._on_transfer = on_transfer
+        self._on_close = on_close
+        self._closed = False
+        self.transferred = 0
+
+    @staticmethod
+    def _size(data):
+        return len(data.encode('utf-8')) if isinstance(data, str) else len(data)
+
+    def _count(self, n_bytes):
+        self.transferred += n_bytes
+        if self._on_transfer is not None:
+            self._on_transfer(n_bytes)
+
+    def read(self, *args):
+        data = self._f.read(*args)
+        self._count(self._size(data))
+        return data
+
+    def read1(self, *args):
+        # Used by io.TextIOWrapper
+        data = getattr(self._f, 'read1', self._f.read)(*args)
+        self._count(self._size(data))
+        return data
+
+    def readinto(self, buffer):
+        # Used by pyarrow to read Parquet files
+        n_bytes = self._f.readinto(buffer)
+        self._count(n_bytes or 0)
+        return n_bytes
+
+    def write(self, data):
+        self._count(self._size(data))
+        return self._f.write(data)
+
+    def __iter__(self):
+        for line in self._f:
+            self._count(self._size(line))
+            yield line
+
+    def close(self):
+        try:
+            self._f.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                if self._on_close is not None:
+                    self._on_close(self.transferred)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+@st.cache_resource(show_spinner=False)
+def get_io_metrics():
+    """Returns the process-wide IOMetrics collector, shared by all sessions."""
+    return IOMetrics()
+
+
+@st.cache_resource(show_spinner=False)
+def start_metrics_exporter(port, host='127.0.0.1'):
+    """
+    Serves the process-wide metrics over HTTP for monitoring, once per process.
+
+    GET /metrics returns the Prometheus text format, GET /metrics.json the JSON format.
+
+    Args:
+        port (int): TCP port to listen on.
+        host (str): Interface to bind; the default only accepts local connections.
+
+    Returns:
+        http.server.ThreadingHTTPServer: The running server.
+    """
+    import http.server
+    metrics = get_io_metrics()
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == '/metrics':
+                body, content_type = metrics.to_prometheus(), 'text/plain; version=0.0.4'
+            elif self.path == '/metrics.json':
+                body, content_type = metrics.to_json(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            data = body.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name='io-metrics-exporter', daemon=True).start()
+    return server
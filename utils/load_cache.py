@@ -0,0 +1,170 @@
+import copy, os, threading, time
+from collections import OrderedDict
+from email.utils import parsedate_to_datetime
+import streamlit as st
+
+
+class LoadCache:
+    """
+    A bounded, thread-safe LRU cache of parsed file contents.
+
+    Entries are stored together with a validation token derived from the file's
+    metadata (ETag, modification time, size). A cached value is only reused if
+    the token still matches, or if it was validated less than ttl seconds ago.
+    The least recently used entries are evicted once the total size of the raw
+    file contents exceeds max_bytes.
+
+    Attributes:
+        max_bytes (int): Upper bound for the summed size of all cached files.
+        ttl (float): Seconds during which an entry is reused without revalidation.
+        current_bytes (int): Summed size of all cached files.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that required a download.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024, ttl=0.0):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes (int): Upper bound for the summed size of all cached files.
+            ttl (float): Seconds during which an entry is reused without revalidation.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(path, load_args):
+        """Returns the cache key for a file path and its loader arguments."""
+        return (path, repr(sorted(load_args.items())))
+
+    @staticmethod
+    def make_token(info):
+        """
+        Derives a validation token from an fsspec info dict.
+
+        Args:
+            info (dict): Result of filesystem.info().
+
+        Returns:
+            tuple: ETag, modification time and size (whichever the backend provides).
+        """
+        return (info.get('etag'), info.get('modified') or info.get('mtime'), info.get('size'))
+
+    @staticmethod
+    def make_file_token(f):
+        """
+        Derives a validation token from an open file, so that a download validates itself.
+
+        WebDAV files provide the ETag, Last-Modified and Content-Length headers of their
+        GET response, local files (e.g. mirror copies) their modification time and size.
+        The token matches make_token() for the info() of the same file.
+
+        Args:
+            f: A file opened for reading in binary mode.
+
+        Returns:
+            tuple: The token, or None if the file does not provide its metadata.
+        """
+        response = getattr(getattr(f, 'reader', None), '_initial_response', None)
+        if response is not None:
+            headers = response.headers
+            modified, size = headers.get('Last-Modified'), headers.get('Content-Length', '')
+            return LoadCache.make_token({'etag': headers.get('ETag'),
+                                         'modified': parsedate_to_datetime(modified) if modified else None,
+                                         'size': int(size) if size.isdigit() else None})
+        try:
+            stat = os.fstat(f.fileno())
+        except (AttributeError, OSError, ValueError):
+            return None
+        return LoadCache.make_token({'mtime': stat.st_mtime, 'size': stat.st_size})
+
+    def get_fresh(self, key):
+        """
+        Returns a copy of the cached value if it was validated within the TTL.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or time.monotonic() - entry['checked'] > self.ttl:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._copy(entry['value'])
+
+    def get_valid(self, key, token):
+        """
+        Returns a copy of the cached value if its token matches and marks it validated.
+
+        Returns:
+            tuple: (True, value) on a hit, (False, None) otherwise.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry['token'] != token:
+                self.misses += 1
+                return False, None
+            entry['checked'] = time.monotonic()
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._copy(entry['value'])
+
+    def put(self, key, token, value, size):
+        """
+        Stores a parsed value and evicts least recently used entries if needed.
+
+        Args:
+            key: Cache key from make_key().
+            token: Validation token from make_token().
+            value: The parsed file content.
+            size (int): Size of the raw file content in bytes.
+        """
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._pop(key)
+            self._entries[key] = {'token': token, 'value': self._copy(value),
+                                  'size': size, 'checked': time.monotonic()}
+            self.current_bytes += size
+            while self.current_bytes > self.max_bytes:
+                self._pop(next(iter(self._entries)))
+
+    def invalidate(self, path):
+        """Removes all entries for the given path (for any loader arguments)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == path]:
+                self._pop(key)
+
+    def _pop(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry['size']
+
+    @staticmethod
+    def _copy(value):
+        # Callers may modify loaded data in place (e.g. the credentials dict)
+        if hasattr(value, 'copy') and not isinstance(value, (dict, list)):
+            return value.copy()
+        return copy.deepcopy(value)
+
+
+@st.cache_resource(show_spinner=False)
+def get_load_cache(max_bytes=32 * 1024 * 1024, ttl=0.0):
+    """
+    Returns the process-wide LoadCache, shared by all sessions.
+
+    Args:
+        max_bytes (int): Upper bound for the summed size of all cached files.
+        ttl (float): Seconds during which an entry is reused without revalidation.
+
+    Returns:
+        LoadCache: The shared cache.
+    """
+    return LoadCache(max_bytes, ttl)
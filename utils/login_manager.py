@@ -1,7 +1,9 @@
-import secrets
+import inspect, secrets
 import streamlit as st
 import streamlit_authenticator as stauth
 from utils.data_manager import DataManager
+from utils.credential_store import CredentialStore, CredentialConflictError
+from utils.password_hasher import DEFAULT_ROUNDS, HashingBusyError, get_password_hasher
 
 
 class LoginManager:
@@ -9,8 +11,11 @@ class LoginManager:
     Singleton class that manages user authentication for the application.
 
     Handles user login, registration, and session management using
-    streamlit-authenticator. Credentials are stored in a YAML file via
-    the DataManager.
+    streamlit-authenticator. Credentials are stored in sharded YAML files via
+    the CredentialStore. Password hashing and verification run in a bounded
+    thread pool (see utils.password_hasher), configured by the optional
+    [password_hashing] section of secrets.toml; hashes made with another bcrypt
+    cost factor are replaced on the user's next login.
     """
 
     def __new__(cls, *args, **kwargs):
@@ -34,7 +39,8 @@ class LoginManager:
 
         Args:
             data_manager (DataManager): The DataManager instance to use for credential storage.
-            auth_credentials_file (str): Filename for storing user credentials.
+            auth_credentials_file (str): Legacy single credentials file, migrated to
+                the sharded credential store on first use.
             auth_cookie_name (str): Cookie name for session management.
         """
         if hasattr(self, 'authenticator'):
@@ -46,23 +52,84 @@ class LoginManager:
         self.auth_credentials_file = auth_credentials_file
         self.auth_cookie_name = auth_cookie_name
         self.auth_cookie_key = secrets.token_urlsafe(32)
+        self.credential_store = CredentialStore(data_manager, legacy_file=auth_credentials_file)
+        self.password_hasher = self._init_password_hasher()
         self.auth_credentials = self._load_auth_credentials()
         self.authenticator = stauth.Authenticate(
             self.auth_credentials, self.auth_cookie_name, self.auth_cookie_key
         )
+        self._prefetch_on_login()
+
+    def _init_password_hasher(self):
+        """
+        Returns the process-wide password hasher, configured from the [password_hashing]
+        section of secrets.toml ([auth] is reserved by Streamlit for st.login).
+        """
+        try:
+            options = st.secrets.get('password_hashing', {})
+        except FileNotFoundError:
+            options = {}
+        return get_password_hasher(rounds=int(options.get('bcrypt_rounds', DEFAULT_ROUNDS)),
+                                   max_workers=int(options.get('hash_workers', 2)),
+                                   max_pending=int(options.get('hash_max_pending', 32)),
+                                   wait_timeout=float(options.get('hash_wait_timeout', 10.0)),
+                                   _metrics=self.data_manager.metrics)
+
+    def _prefetch_on_login(self):
+        """
+        Starts loading the user's data in the background as soon as a login begins.
+
+        The authenticator's login is wrapped, so DataManager.prefetch_user_data() runs
+        when the login form is submitted (the loads overlap with the password check)
+        or the session cookie is restored (they overlap with the authenticator's
+        pre-login pause). If the login fails, the prefetched data is discarded.
+        DataManager.prefetch_user_data() limits the reads a failed login can cause.
+
+        This relies on private internals of streamlit-authenticator 0.4.2 (pinned in
+        requirements.txt): authentication_controller.authentication_model.login and
+        its username and token parameters. If they change, logins work as before,
+        just without prefetching.
+        """
+        try:
+            model = self.authenticator.authentication_controller.authentication_model
+            login = model.login
+            signature = inspect.signature(login)
+        except (AttributeError, TypeError, ValueError):
+            return
+        if not {'username', 'token'} <= signature.parameters.keys():
+            return
+
+        def prefetching_login(*args, **kwargs):
+            arguments = signature.bind(*args, **kwargs).arguments
+            username = arguments.get('username') or (arguments.get('token') or {}).get('username')
+            if username in self.auth_credentials['usernames']:
+                self.data_manager.prefetch_user_data(username)
+            try:
+                return login(*args, **kwargs)
+            finally:
+                if st.session_state.get('authentication_status') is not True:
+                    self.data_manager.discard_prefetch()
+        model.login = prefetching_login
 
     def _load_auth_credentials(self):
         """
-        Loads user credentials from the configured credentials file.
+        Loads the credentials of all users from the credential store.
 
         Returns:
-            dict: User credentials, defaulting to empty usernames dict if file not found.
+            dict: User credentials, defaulting to empty usernames dict if none exist.
         """
-        return self.data_manager.load_app_data(self.auth_credentials_file, initial_value={"usernames": {}})
+        return self.credential_store.load_all()
 
-    def _save_auth_credentials(self):
-        """Saves current user credentials to the credentials file."""
-        self.data_manager.save_app_data(self.auth_credentials, self.auth_credentials_file)
+    def _save_auth_credentials(self, username, overwrite=False):
+        """
+        Saves the credentials of a single user to the credential store.
+
+        Args:
+            username (str): The user whose credentials are saved.
+            overwrite (bool): Replace the stored entry; only for the logged-in user's
+                own credentials. Without it, an existing username is a conflict.
+        """
+        self.credential_store.put(username, self.auth_credentials['usernames'][username], overwrite=overwrite)
 
     def login_register(self, login_title='Login', register_title='Register new user'):
         """
@@ -75,15 +142,40 @@ class LoginManager:
             register_title (str): Label for the registration tab.
         """
         if st.session_state.get("authentication_status") is True:
+            if 'password_rehash' in st.session_state:
+                self._save_rehash(*st.session_state.pop('password_rehash'))
             with st.sidebar:
                 st.write(f"Angemeldet als: **{st.session_state.get('name')}**")
-                self.authenticator.logout()
+                pending = self.data_manager.pending_writes()
+                if pending:
+                    st.caption(f":material/cloud_upload: {pending} Änderung(en) werden gespeichert …")
+                if self.data_manager.failed_writes():
+                    st.warning("Einige Änderungen konnten nicht gespeichert werden.")
+                self.authenticator.logout(callback=self._on_logout)
         else:
             page_fn = lambda: self._login_register_page(login_title, register_title)
             pg = st.navigation([st.Page(page_fn, title="Login", icon=":material/login:")])
             pg.run()
             st.stop()
 
+    def _save_rehash(self, old_hash, new_hash):
+        """Replaces the logged-in user's password hash made with an outdated cost factor."""
+        username = st.session_state.get('username')
+        user = self.auth_credentials['usernames'].get(username)
+        if user is None or user.get('password') != old_hash:
+            return
+        user['password'] = new_hash
+        try:
+            self._save_auth_credentials(username, overwrite=True)
+        except Exception:
+            user['password'] = old_hash  # retried on the next login
+
+    def _on_logout(self, _details):
+        """Waits for the user's queued writes (not those of other users) before they are logged out."""
+        self.data_manager.discard_prefetch()
+        if not self.data_manager.flush():
+            st.warning("Nicht alle Änderungen konnten gespeichert werden.")
+
     def _login_register_page(self, login_title, register_title):
         """Page function shown when the user is not authenticated."""
         login_tab, register_tab = st.tabs((login_title, register_title))
@@ -94,7 +186,11 @@ class LoginManager:
 
     def _login(self):
         """Renders the login form and handles authentication status messages."""
-        self.authenticator.login()
+        try:
+            self.authenticator.login()
+        except HashingBusyError as e:
+            st.warning(str(e))
+            return
         if st.session_state["authentication_status"] is False:
             st.error("Username/password is incorrect")
         else:
@@ -111,11 +207,18 @@ class LoginManager:
         The password must be 8-20 characters long and include at least one uppercase letter,
         one lowercase letter, one digit, and one special character from @$!%*?&.
         """)
-        res = self.authenticator.register_user()
+        try:
+            res = self.authenticator.register_user()
+        except HashingBusyError as e:
+            st.warning(str(e))
+            return
         if res[1] is not None:
-            st.success(f"User {res[1]} registered successfully")
             try:
-                self._save_auth_credentials()
+                self._save_auth_credentials(res[1])
+                st.success(f"User {res[1]} registered successfully")
                 st.success("Credentials saved successfully")
+            except CredentialConflictError as e:
+                self.auth_credentials['usernames'].pop(res[1], None)
+                st.error(f"Registration failed: {e}")
             except Exception as e:
                 st.error(f"Failed to save credentials: {e}")
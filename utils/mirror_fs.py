@@ -0,0 +1,544 @@
+import json, logging, os, posixpath, re, threading, time, uuid
+import streamlit as st
+from utils.fs_pool import is_offline_error
+
+logger = logging.getLogger(__name__)
+
+_INDEX_FILE = '.mirror_index.json'
+_TEXT_KWARGS = ('encoding', 'errors', 'newline')
+
+
+def _public_info(info, name):
+    """Reduces an fsspec info dict to JSON-serializable fields (modification times as strings)."""
+    modified = info.get('modified') or info.get('mtime')
+    return {'name': name, 'size': info.get('size'), 'type': info.get('type', 'file'),
+            'etag': info.get('etag'), 'modified': None if modified is None else str(modified)}
+
+
+def _token(info):
+    return [info.get('etag'), info.get('modified'), info.get('size')]
+
+
+class MirrorFileSystem:
+    """
+    Keeps a local on-disk copy of remote files, so reads work offline and skip the network.
+
+    Wraps the remote fsspec filesystem for the paths matching include; all other
+    paths are passed through. A file is downloaded on its first read and later
+    served from the local copy as long as it was validated against the remote
+    metadata (ETag, modification time, size) within max_age seconds.
+
+    Writes go to the local copy first and are then uploaded. If the remote is
+    unreachable, the write is kept locally and queued; until the queue is replayed
+    the mirror stays offline and serves all mirrored reads from local copies. A
+    background thread replays queued writes and reconciles the mirror every
+    sync_interval seconds, with one listing per mirrored folder. Least recently used
+    files are evicted once the local copies exceed max_bytes; files with queued
+    writes are never evicted. The index (and the write queue) is stored in
+    local_root, so queued writes survive a restart.
+
+    Copies of paths matching revalidate are only a fallback: while the remote is
+    reachable they are validated on every read, so files that are also written
+    around the mirror (e.g. with conditional uploads) are never served stale.
+
+    Attributes:
+        local_root (str): Local folder holding the copies.
+        max_bytes (int): Upper bound for the summed size of the local copies.
+        max_age (float): Seconds during which a copy is served without revalidation.
+        sync_interval (float): Seconds between background syncs (0: no background sync).
+        online (bool): False while the remote is known to be unreachable.
+        current_bytes (int): Summed size of the local copies.
+    """
+
+    def __init__(self, remote, local_root, include=None, max_bytes=256 * 1024 * 1024, max_age=60.0,
+                 sync_interval=30.0, revalidate=None):
+        """
+        Initialize the mirror and start the background sync.
+
+        Args:
+            remote (callable): Returns the current remote filesystem (e.g. FilesystemPool.get).
+            local_root (str): Local folder for the copies; created if missing.
+            include (str, optional): Regex; only matching paths are mirrored (default: all).
+            max_bytes (int): Upper bound for the summed size of the local copies.
+            max_age (float): Seconds during which a copy is served without revalidation.
+            sync_interval (float): Seconds between background syncs (0: no background sync).
+            revalidate (str, optional): Regex; copies of matching paths are served without
+                asking the remote only while it is unreachable.
+        """
+        self._remote = remote
+        self.local_root = os.path.abspath(local_root)
+        self.include = re.compile(include) if include else None
+        self.revalidate = re.compile(revalidate) if revalidate else None
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.sync_interval = sync_interval
+        self.online = True
+        self._entries = {}  # path -> {'size', 'info', 'token', 'checked', 'used', 'dirty', 'deleted'}
+        self._outbox = []   # queued remote operations as [op, path], oldest first
+        self._lock = threading.RLock()
+        os.makedirs(self.local_root, exist_ok=True)
+        self._load_index()
+        if sync_interval > 0:
+            threading.Thread(target=self._sync_loop, name='mirror-sync', daemon=True).start()
+
+    @property
+    def remote(self):
+        """fsspec.AbstractFileSystem: The current remote filesystem."""
+        return self._remote()
+
+    @property
+    def current_bytes(self):
+        with self._lock:
+            return sum(e['size'] for e in self._entries.values() if not e.get('deleted'))
+
+    def pending_count(self):
+        """Returns the number of remote operations waiting for the remote to become reachable."""
+        with self._lock:
+            return len(self._outbox)
+
+    def __getattr__(self, name):
+        return getattr(self.remote, name)
+
+    # ---- Reads ----
+
+    def open(self, path, mode='rb', **kwargs):
+        """Opens a file; mirrored files are read from and written to their local copy."""
+        path = path.rstrip('/')
+        if not self._mirrored(path) or mode not in ('rb', 'r', 'wb', 'w'):
+            return self.remote.open(path, mode, **kwargs)
+        local_kwargs = {k: kwargs[k] for k in _TEXT_KWARGS if k in kwargs}
+        if 'r' in mode:
+            return self._open_local(path, mode, local_kwargs)
+        local = self._local(path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        tmp = f"{local}.{uuid.uuid4().hex}.tmp"
+        return _MirrorWriteFile(open(tmp, mode, **local_kwargs), lambda: self._commit(path, tmp),
+                                lambda: os.remove(tmp))
+
+    def info(self, path, **kwargs):
+        """Returns file metadata, from the mirror if the copy is fresh or the remote is offline."""
+        path = path.rstrip('/')
+        if not self._mirrored(path):
+            return self.remote.info(path, **kwargs)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (entry.get('deleted') or self._servable(path, entry)):
+                return self._entry_info(path, entry)
+        try:
+            info = _public_info(self.remote.info(path, **kwargs), path)
+        except Exception as e:
+            return self._offline_info(path, e)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['token'] in (None, _token(info)):
+                entry.update(info=info, token=_token(info), checked=time.time())
+        return info
+
+    def exists(self, path, **kwargs):
+        path = path.rstrip('/')
+        mirrored = self._mirrored(path) or self._mirrored(path + '/')
+        with self._lock:
+            known = mirrored and path in self._entries
+        if known:
+            try:
+                self.info(path)
+                return True
+            except FileNotFoundError:
+                return False
+        if mirrored and not self.online:
+            return os.path.exists(self._local(path))
+        try:
+            return self.remote.exists(path, **kwargs)
+        except Exception as e:
+            if not (mirrored and is_offline_error(e)):
+                raise
+            self._set_offline()
+            return os.path.exists(self._local(path))
+
+    def ls(self, path, detail=True, **kwargs):
+        """Lists a folder; queued writes and deletions of mirrored files are reflected."""
+        path = path.rstrip('/')
+        if not self._mirrored(path + '/'):
+            return self.remote.ls(path, detail=detail, **kwargs)
+        listing = None
+        if self.online:
+            try:
+                listing = {e['name'].rstrip('/'): e for e in self.remote.ls(path, detail=True, **kwargs)}
+            except Exception as e:
+                if not is_offline_error(e):
+                    raise
+                self._set_offline()
+        with self._lock:
+            if listing is None:
+                local = self._local(path)
+                if not os.path.isdir(local):
+                    raise FileNotFoundError(path)
+                listing = {posixpath.join(path, name): {'name': posixpath.join(path, name), 'type': 'directory',
+                                                        'size': 0}
+                           for name in os.listdir(local) if os.path.isdir(os.path.join(local, name))}
+                for p, entry in self._entries.items():
+                    if posixpath.dirname(p) == path and not entry.get('deleted'):
+                        listing[p] = self._entry_info(p, entry)
+            for p, entry in self._entries.items():
+                if posixpath.dirname(p) == path and entry['dirty']:
+                    if entry.get('deleted'):
+                        listing.pop(p, None)
+                    else:
+                        listing[p] = self._entry_info(p, entry)
+        entries = sorted(listing.values(), key=lambda e: e['name'])
+        return entries if detail else [e['name'] for e in entries]
+
+    # ---- Writes ----
+
+    def rm(self, path, recursive=False, **kwargs):
+        """Removes a file; for mirrored files the local copy too (queued if the remote is offline)."""
+        path = path.rstrip('/')
+        if not self._mirrored(path) or recursive:
+            with self._lock:
+                for p in [p for p in self._entries if p == path or p.startswith(path + '/')]:
+                    self._drop(p)
+            return self.remote.rm(path, recursive=recursive, **kwargs)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.get('deleted'):
+                raise FileNotFoundError(path)
+            self._remove_local(path)
+            self._entries[path] = {'size': 0, 'info': None, 'token': None, 'checked': time.time(),
+                                   'used': time.time(), 'dirty': True, 'deleted': True}
+        self._push('rm', path)
+
+    rm_file = rm
+
+    def mkdirs(self, path, exist_ok=False):
+        path = path.rstrip('/')
+        if self._mirrored(path + '/'):
+            os.makedirs(self._local(path), exist_ok=True)
+            if not self.online:
+                self._queue('mkdirs', path)
+                return
+            try:
+                return self.remote.mkdirs(path, exist_ok=exist_ok)
+            except Exception as e:
+                if not is_offline_error(e):
+                    raise
+                self._set_offline()
+                self._queue('mkdirs', path)
+                return
+        return self.remote.mkdirs(path, exist_ok=exist_ok)
+
+    makedirs = mkdirs
+
+    def _commit(self, path, tmp):
+        """Moves a written file into the mirror and uploads it (or queues the upload)."""
+        local = self._local(path)
+        with self._lock:
+            os.replace(tmp, local)
+            self._entries[path] = {'size': os.path.getsize(local), 'info': None, 'token': None,
+                                   'checked': time.time(), 'used': time.time(), 'dirty': True}
+            self._save_index()
+        self._push('put', path)
+        self._evict()
+
+    def _push(self, op, path):
+        """Runs a remote write now; queues it if the remote is offline."""
+        if not self.online:
+            self._queue(op, path)
+            return
+        try:
+            self._run(op, path)
+        except Exception as e:
+            if not is_offline_error(e):
+                # The write failed as a whole (e.g. missing folder); keep the mirror consistent
+                self._drop(path)
+                raise
+            self._set_offline()
+            self._queue(op, path)
+
+    def _run(self, op, path):
+        """Performs a queued remote operation and marks the mirrored file as uploaded."""
+        remote = self.remote
+        if op == 'put':
+            remote.put_file(self._local(path), path)
+        elif op == 'rm':
+            try:
+                remote.rm(path)
+            except FileNotFoundError:
+                pass
+        elif op == 'mkdirs':
+            remote.mkdirs(path, exist_ok=True)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                return
+            if entry.get('deleted'):
+                del self._entries[path]
+            else:
+                # The remote token is adopted on the next validation
+                entry.update(dirty=False, token=None, checked=time.time())
+
+    def _queue(self, op, path):
+        with self._lock:
+            # Only the latest operation per path matters; the local copy holds the latest content
+            self._outbox = [item for item in self._outbox if item[1] != path] + [[op, path]]
+            self._save_index()
+
+    # ---- Local copies ----
+
+    def _mirrored(self, path):
+        return self.include is None or bool(self.include.search(path))
+
+    def _local(self, path):
+        return os.path.join(self.local_root, *path.strip('/').split('/'))
+
+    def _servable(self, path, entry):
+        """Whether a copy may be served without asking the remote."""
+        if entry['dirty'] or not self.online:
+            return True
+        if self.revalidate is not None and self.revalidate.search(path):
+            return False
+        return time.time() - entry['checked'] <= self.max_age
+
+    def _entry_info(self, path, entry):
+        if entry.get('deleted'):
+            raise FileNotFoundError(path)
+        if entry['info'] is not None and not entry['dirty']:
+            return dict(entry['info'])
+        stat = os.stat(self._local(path))
+        return {'name': path, 'size': stat.st_size, 'type': 'file', 'etag': None, 'modified': str(stat.st_mtime_ns)}
+
+    def _offline_info(self, path, error):
+        """Answers info() from the mirror if the remote is unreachable, else re-raises error."""
+        if isinstance(error, FileNotFoundError):
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is not None and not entry['dirty']:
+                    self._drop(path)
+            raise error
+        if not is_offline_error(error):
+            raise error
+        self._set_offline()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None:
+                raise error
+            return self._entry_info(path, entry)
+
+    def _open_local(self, path, mode, local_kwargs):
+        """Opens the local copy of a file, downloading it if missing or changed."""
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.get('deleted'):
+                raise FileNotFoundError(path)
+            if entry is not None and self._servable(path, entry):
+                entry['used'] = time.time()
+                return open(self._local(path), mode, **local_kwargs)
+        info = self.info(path)  # answered from the mirror if the remote is offline
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and (not self.online or entry['token'] == _token(info)):
+                entry['used'] = time.time()
+                return open(self._local(path), mode, **local_kwargs)
+        self._download(path, info)
+        with self._lock:
+            self._entries[path]['used'] = time.time()
+            f = open(self._local(path), mode, **local_kwargs)
+        self._evict(keep=path)
+        return f
+
+    def _download(self, path, info):
+        local = self._local(path)
+        os.makedirs(os.path.dirname(local), exist_ok=True)
+        tmp = f"{local}.{uuid.uuid4().hex}.tmp"
+        try:
+            self.remote.get_file(path, tmp)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry['dirty']:
+                os.remove(tmp)  # written locally meanwhile; the local copy is newer
+                return
+            os.replace(tmp, local)
+            self._entries[path] = {'size': os.path.getsize(local), 'info': info, 'token': _token(info),
+                                   'checked': time.time(), 'used': time.time(), 'dirty': False}
+
+    def _drop(self, path):
+        with self._lock:
+            if self._entries.pop(path.rstrip('/'), None) is not None:
+                self._remove_local(path)
+
+    def _remove_local(self, path):
+        try:
+            os.remove(self._local(path))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self, keep=None):
+        """Removes least recently used clean copies until the copies fit into max_bytes."""
+        with self._lock:
+            total = self.current_bytes
+            if total <= self.max_bytes:
+                return
+            clean = sorted((e['used'], p) for p, e in self._entries.items() if not e['dirty'] and p != keep)
+            for _, path in clean:
+                if total <= self.max_bytes:
+                    break
+                total -= self._entries[path]['size']
+                self._drop(path)
+
+    def _set_offline(self):
+        if self.online:
+            logger.warning("Remote storage unreachable; serving mirrored files from %s", self.local_root)
+        self.online = False
+
+    # ---- Background sync ----
+
+    def sync(self):
+        """
+        Replays queued writes, then reconciles the mirror with the remote.
+
+        Copies whose remote ETag, modification time or size changed are downloaded
+        again, copies of files deleted remotely are removed. Needs one listing per
+        mirrored folder.
+
+        Returns:
+            bool: True if the remote was reachable.
+        """
+        with self._lock:
+            outbox = [list(item) for item in self._outbox]
+        for op, path in outbox:
+            try:
+                try:
+                    self._run(op, path)
+                except FileNotFoundError:
+                    if op != 'put':
+                        raise
+                    self.remote.mkdirs(posixpath.dirname(path), exist_ok=True)
+                    self._run(op, path)
+            except Exception as e:
+                if is_offline_error(e):
+                    self._set_offline()
+                    return False
+                logger.error("Mirror: queued %s of %s failed: %s", op, path, e)
+            with self._lock:
+                self._outbox = [item for item in self._outbox if item != [op, path]]
+                self._save_index()
+        with self._lock:
+            folders = sorted({posixpath.dirname(p) for p, e in self._entries.items() if not e['dirty']})
+        for folder in folders:
+            try:
+                listing = {e['name'].rstrip('/'): e for e in self.remote.ls(folder, detail=True)}
+            except FileNotFoundError:
+                listing = {}
+            except Exception as e:
+                if is_offline_error(e):
+                    self._set_offline()
+                    return False
+                raise
+            self._reconcile(folder, listing)
+        if not self.online:
+            logger.info("Remote storage reachable again")
+        self.online = True
+        with self._lock:
+            self._save_index()
+        return True
+
+    def _reconcile(self, folder, listing):
+        with self._lock:
+            paths = [p for p, e in self._entries.items() if posixpath.dirname(p) == folder and not e['dirty']]
+        for path in paths:
+            remote_info = listing.get(path)
+            if remote_info is None:
+                self._drop(path)
+                continue
+            info = _public_info(remote_info, path)
+            with self._lock:
+                entry = self._entries.get(path)
+                if entry is None or entry['dirty']:
+                    continue
+                if entry['token'] in (None, _token(info)):
+                    entry.update(info=info, token=_token(info), checked=time.time())
+                    continue
+            self._download(path, info)
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.sync_interval)
+            try:
+                self.sync()
+            except Exception as e:
+                logger.error("Mirror sync failed: %s", e)
+
+    # ---- Index ----
+
+    def _load_index(self):
+        """Restores the entries and queued writes stored by an earlier process."""
+        try:
+            with open(os.path.join(self.local_root, _INDEX_FILE), encoding='utf-8') as f:
+                index = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        for path, entry in index.get('entries', {}).items():
+            if entry.get('deleted') or os.path.exists(self._local(path)):
+                entry['checked'] = 0.0  # revalidate copies from an earlier process
+                self._entries[path] = entry
+        self._outbox = index.get('outbox', [])
+
+    def _save_index(self):
+        path = os.path.join(self.local_root, _INDEX_FILE)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'entries': self._entries, 'outbox': self._outbox}, f)
+        os.replace(tmp, path)
+
+
+class _MirrorWriteFile:
+    """Local file being written; committed to the mirror on a successful close."""
+
+    def __init__(self, f, commit, discard):
+        self._f = f
+        self._commit = commit
+        self._discard = discard
+        self._closed = False
+
+    def close(self, failed=False):
+        if self._closed:
+            return
+        self._closed = True
+        self._f.close()
+        if failed:
+            self._discard()
+        else:
+            self._commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self.close(failed=exc_type is not None)
+
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+@st.cache_resource(show_spinner=False)
+def get_mirror_filesystem(_pool, local_root, include=None, max_bytes=256 * 1024 * 1024, max_age=60.0,
+                          sync_interval=30.0, revalidate=None):
+    """
+    Returns the process-wide MirrorFileSystem for a local folder, shared by all sessions.
+
+    Args:
+        _pool (FilesystemPool): Provides the remote filesystem (not part of the cache key).
+        local_root (str): Local folder for the copies.
+        include (str, optional): Regex; only matching paths are mirrored.
+        max_bytes (int): Upper bound for the summed size of the local copies.
+        max_age (float): Seconds during which a copy is served without revalidation.
+        sync_interval (float): Seconds between background syncs.
+        revalidate (str, optional): Regex; matching copies are only served while the remote is unreachable.
+
+    Returns:
+        MirrorFileSystem: The shared mirror.
+    """
+    return MirrorFileSystem(_pool.get, local_root, include, max_bytes, max_age, sync_interval, revalidate)
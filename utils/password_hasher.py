@@ -0,0 +1,159 @@
+import re, threading, time
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+
+# bcrypt cost factor: each increment doubles the time per hash
+DEFAULT_ROUNDS = 12
+_BCRYPT_HASH = re.compile(r'^\$2[aby]\$(\d{2})\$.{53}$')
+
+
+class HashingBusyError(RuntimeError):
+    """Raised when too many password hashes are already waiting for a worker."""
+
+
+def _hash(password, rounds):
+    import bcrypt
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds)).decode()
+
+
+def _check(password, hashed_password):
+    import bcrypt
+    return bcrypt.checkpw(password.encode(), hashed_password.encode())
+
+
+def hash_rounds(hashed_password):
+    """Returns the cost factor of a bcrypt hash, or None if it is not a bcrypt hash."""
+    match = _BCRYPT_HASH.match(hashed_password or '')
+    return int(match.group(1)) if match else None
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification in a bounded pool of worker threads.
+
+    bcrypt is CPU-bound and releases the GIL while hashing, so the workers run in
+    parallel to the script threads of all sessions. At most max_workers hashes
+    run at once, which caps the CPU a burst of logins can take from the other
+    sessions. At most max_pending calls may wait or run; further callers wait up
+    to wait_timeout seconds for a slot and then fail with HashingBusyError, so
+    login times stay bounded instead of growing with the queue.
+
+    Threads rather than processes: worker processes started with spawn or
+    forkserver re-run the main module, which in Streamlit is the app script.
+
+    Attributes:
+        rounds (int): bcrypt cost factor for new hashes.
+        max_workers (int): Number of worker threads.
+        max_pending (int): Maximum number of calls waiting for or running in a worker.
+        wait_timeout (float): Seconds a call waits for a free slot.
+        pending (int): Calls currently waiting for or running in a worker (queue depth).
+        peak_pending (int): Highest queue depth seen.
+        rejected (int): Calls that failed with HashingBusyError.
+    """
+
+    def __init__(self, rounds=DEFAULT_ROUNDS, max_workers=2, max_pending=32, wait_timeout=10.0, metrics=None):
+        """
+        Initialize the hasher.
+
+        Args:
+            rounds (int): bcrypt cost factor for new hashes (4-31).
+            max_workers (int): Number of worker threads.
+            max_pending (int): Maximum number of calls waiting for or running in a worker.
+            wait_timeout (float): Seconds a call waits for a free slot.
+            metrics (IOMetrics, optional): Records the duration of every call ('auth' layer)
+                and the queue depth as gauge.
+        """
+        if not 4 <= rounds <= 31:
+            raise ValueError("PasswordHasher: rounds must be between 4 and 31")
+        self.rounds = rounds
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.wait_timeout = wait_timeout
+        self.metrics = metrics
+        self.pending = 0
+        self.peak_pending = 0
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers, thread_name_prefix='password_hasher')
+        if metrics is not None:
+            metrics.add_gauge('password_hash_queue_depth', lambda: self.pending,
+                              'Password hashes waiting for or running in a worker thread.')
+            metrics.add_gauge('password_hash_rejected', lambda: self.rejected,
+                              'Password hashes rejected because the queue was full.')
+
+    def hash(self, password):
+        """Returns a bcrypt hash of password with the configured cost factor."""
+        return self._run('hash', _hash, password, self.rounds)
+
+    def check(self, password, hashed_password):
+        """Returns whether password matches a bcrypt hash."""
+        return self._run('check_pw', _check, password, hashed_password)
+
+    def needs_rehash(self, hashed_password):
+        """Whether a bcrypt hash was made with another cost factor than the configured one."""
+        rounds = hash_rounds(hashed_password)
+        return rounds is not None and rounds != self.rounds
+
+    def _run(self, op, fn, *args):
+        start, error = time.perf_counter(), False
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            with self._lock:
+                self.rejected += 1
+            raise HashingBusyError("Too many logins at the same time, please try again in a moment.")
+        with self._lock:
+            self.pending += 1
+            self.peak_pending = max(self.peak_pending, self.pending)
+        try:
+            return self._executor.submit(fn, *args).result()
+        except Exception:
+            error = True
+            raise
+        finally:
+            with self._lock:
+                self.pending -= 1
+            self._slots.release()
+            if self.metrics is not None:
+                self.metrics.record('auth', op, 'bcrypt', time.perf_counter() - start, error=error)
+
+    def install(self):
+        """
+        Routes streamlit-authenticator's Hasher through this hasher.
+
+        Hasher.hash (registration, password changes) then uses the configured cost
+        factor, and Hasher.check_pw (login) runs in the worker threads. When a
+        login succeeds with a hash of another cost factor, the new hash is stored in
+        st.session_state['password_rehash'] as (old hash, new hash), to be saved by
+        the caller (see LoginManager).
+        """
+        from streamlit_authenticator.utilities import Hasher
+
+        def check_pw(cls, password, hashed_password):
+            valid = self.check(password, hashed_password)
+            if valid and self.needs_rehash(hashed_password):
+                st.session_state['password_rehash'] = (hashed_password, self.hash(password))
+            return valid
+
+        Hasher.hash = classmethod(lambda cls, password: self.hash(password))
+        Hasher.check_pw = classmethod(check_pw)
+
+
+@st.cache_resource(show_spinner=False)
+def get_password_hasher(rounds=DEFAULT_ROUNDS, max_workers=2, max_pending=32, wait_timeout=10.0, _metrics=None):
+    """
+    Returns the process-wide PasswordHasher for a configuration and installs it into
+    streamlit-authenticator.
+
+    Args:
+        rounds (int): bcrypt cost factor for new hashes.
+        max_workers (int): Number of worker threads.
+        max_pending (int): Maximum number of calls waiting for or running in a worker.
+        wait_timeout (float): Seconds a call waits for a free slot.
+        _metrics (IOMetrics, optional): Metrics collector (not part of the cache key).
+
+    Returns:
+        PasswordHasher: The shared hasher.
+    """
+    hasher = PasswordHasher(rounds, max_workers, max_pending, wait_timeout, _metrics)
+    hasher.install()
+    return hasher
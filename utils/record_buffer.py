@@ -0,0 +1,303 @@
+import numpy as np
+import pandas as pd
+
+# Text columns with at most this many, or this share of, distinct values become categorical
+CATEGORY_MAX_DISTINCT = 32
+CATEGORY_MAX_RATIO = 0.5
+
+
+def _fits_seconds(values):
+    """Whether datetime64 values have no sub-second part."""
+    values = np.asarray(values)
+    valid = values[~np.isnat(values)]
+    return bool(np.all(valid.astype('datetime64[s]') == valid))
+
+
+def compact_frame(df):
+    """
+    Returns a copy of a DataFrame with compact dtypes where no information is lost.
+
+    Text columns with few distinct values become categorical and timezone-naive
+    timestamps without sub-second parts datetime64[s]. Floats stay float64: a
+    float32 copy would not give back the decimal values (22.9 becomes
+    22.899999618530273), and frames from the store are saved as they are.
+    Other columns are copied unchanged.
+
+    Args:
+        df (pd.DataFrame): The data.
+
+    Returns:
+        pd.DataFrame: The compacted copy.
+    """
+    data = {}
+    for name in df.columns:
+        column = df[name]
+        if column.dtype.kind == 'M' and isinstance(column.dtype, np.dtype) and _fits_seconds(column.to_numpy()):
+            column = column.astype('datetime64[s]')
+        elif (not isinstance(column.dtype, pd.CategoricalDtype) and len(column)
+              and pd.api.types.infer_dtype(column, skipna=True) == 'string'
+              and column.nunique() <= max(CATEGORY_MAX_DISTINCT, CATEGORY_MAX_RATIO * len(column))):
+            column = column.astype('category')
+        data[name] = column.copy()
+    return pd.DataFrame(data, index=df.index)
+
+
+class RecordBuffer:
+    """
+    A growable, column-oriented store for records with amortized O(1) appends.
+
+    Each column is a preallocated NumPy array whose capacity doubles when it is
+    full, so appending does not copy the existing rows (unlike pd.concat).
+    to_frame() returns a DataFrame backed by read-only views of the arrays; it
+    is cached until the next append. Since appends only write behind the rows of
+    earlier frames (or into reallocated arrays), frames returned before an append
+    stay valid and unchanged, so they can be shared read-only.
+
+    Categorical columns are stored as integer codes, and compact datetime64[s]
+    columns (see compact_frame()) are kept compact as long as the appended
+    values fit.
+
+    Attributes:
+        capacity (int): Number of rows that fit before the arrays are reallocated.
+    """
+
+    def __init__(self, capacity=16):
+        """
+        Initialize an empty buffer.
+
+        Args:
+            capacity (int): Initial number of preallocated rows.
+        """
+        self.capacity = max(1, capacity)
+        self._columns = {}
+        self._dtypes = {}  # pandas dtypes restored by to_frame(); categorical columns hold codes
+        self._length = 0
+        self._frame = None
+
+    @classmethod
+    def from_frame(cls, df):
+        """
+        Create a buffer holding a copy of the rows of a DataFrame.
+
+        Args:
+            df (pd.DataFrame): The initial data.
+
+        Returns:
+            RecordBuffer: The new buffer.
+        """
+        buffer = cls(capacity=max(16, 2 * len(df)))
+        for name in df.columns:
+            column = df[name]
+            values = column.to_numpy()
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                buffer._dtypes[name] = column.dtype
+                values = column.cat.codes.to_numpy()
+            elif not isinstance(column.dtype, np.dtype):
+                buffer._dtypes[name] = column.dtype
+                values = column.to_numpy(dtype=object)
+            buffer._columns[name] = np.empty(buffer.capacity, dtype=values.dtype)
+            buffer._columns[name][:len(df)] = values
+        buffer._length = len(df)
+        return buffer
+
+    def __len__(self):
+        return self._length
+
+    @property
+    def nbytes(self):
+        """int: Bytes allocated by the column arrays, including unused capacity."""
+        return sum(array.nbytes for array in self._columns.values())
+
+    @property
+    def columns(self):
+        """list: The column names in insertion order."""
+        return list(self._columns)
+
+    def append(self, record):
+        """
+        Append one record. Missing columns are filled with NaN, new columns are added.
+
+        Args:
+            record (dict): Column name to value.
+        """
+        self._reserve(self._length + 1)
+        for name in record:
+            self._ensure_column(name, record[name])
+        row = self._length
+        for name in self._columns:
+            if name not in record:
+                self._fill_missing(name, row)
+            elif self._is_categorical(name):
+                self._assign(name, row, self._encode(name, [record[name]])[0])
+            else:
+                self._assign(name, row, record[name])
+        self._length += 1
+        self._frame = None
+
+    def extend(self, records):
+        """
+        Append many records at once.
+
+        Args:
+            records (pd.DataFrame or list of dict): The records to append.
+        """
+        if isinstance(records, pd.DataFrame):
+            if records.empty:
+                return
+            new = RecordBuffer.from_frame(records)
+            self._reserve(self._length + len(new))
+            values_by_name = {}
+            for name, values in new._columns.items():
+                values = values[:len(new)]
+                if name not in self._columns:
+                    self._columns[name] = np.empty(self.capacity, dtype=values.dtype)
+                    if name in new._dtypes:
+                        self._dtypes[name] = new._dtypes[name]
+                    self._fill_missing(name, slice(0, self._length))
+                elif self._is_categorical(name):
+                    values = self._encode(name, records[name])
+                else:
+                    if new._is_categorical(name):
+                        values = records[name].to_numpy(dtype=object)
+                    self._widen(name, values)
+                    if name in new._dtypes and not new._is_categorical(name):
+                        self._dtypes.setdefault(name, new._dtypes[name])
+                values_by_name[name] = values
+            start, end = self._length, self._length + len(new)
+            for name in self._columns:
+                if name in values_by_name:
+                    self._assign(name, slice(start, end), values_by_name[name])
+                else:
+                    self._fill_missing(name, slice(start, end))
+            self._length = end
+            self._frame = None
+        elif len(records) == 1:
+            self.append(records[0])
+        elif records:
+            self.extend(pd.DataFrame(records))
+
+    def to_frame(self):
+        """
+        Returns the records as a DataFrame (cached until the next append).
+
+        Returns:
+            pd.DataFrame: A frame backed by read-only views of the buffer.
+        """
+        if self._frame is None:
+            data = {}
+            for name, array in self._columns.items():
+                view = array[:self._length]
+                view.flags.writeable = False
+                if self._is_categorical(name):
+                    data[name] = pd.Categorical.from_codes(view, dtype=self._dtypes[name])
+                elif name in self._dtypes:
+                    data[name] = pd.Series(view, copy=False).astype(self._dtypes[name])
+                else:
+                    data[name] = view
+            self._frame = pd.DataFrame(data, copy=False)
+        return self._frame
+
+    def _reserve(self, size):
+        """Doubles the capacity until size rows fit."""
+        if size <= self.capacity:
+            return
+        while self.capacity < size:
+            self.capacity *= 2
+        for name, array in self._columns.items():
+            grown = np.empty(self.capacity, dtype=array.dtype)
+            grown[:self._length] = array[:self._length]
+            self._columns[name] = grown
+
+    def _ensure_column(self, name, value):
+        """Adds a missing column or widens its dtype so that value can be stored."""
+        if name not in self._columns:
+            self._columns[name] = np.empty(self.capacity, dtype=self._dtype_for(value))
+            self._fill_missing(name, slice(0, self._length))
+            return
+        array = self._columns[name]
+        target = self._dtype_for(value)
+        if array.dtype == target or array.dtype == object or value is None or self._is_categorical(name):
+            return
+        if array.dtype.kind == 'f' and target.kind in 'fi':
+            if array.dtype == np.float64:
+                return
+            target = np.dtype(np.float64)
+        elif array.dtype.kind == 'M' and target.kind == 'M':
+            if array.dtype != np.dtype('datetime64[s]') or _fits_seconds([np.datetime64(pd.Timestamp(value))]):
+                return
+        if array.dtype.kind in 'iu' and target.kind == 'f':
+            target = np.dtype(np.float64)
+        elif array.dtype.kind != target.kind:
+            target = np.dtype(object)
+        self._astype(name, target)
+
+    def _widen(self, name, values):
+        """Widens a column's dtype so that an array of values can be stored."""
+        array = self._columns[name]
+        if array.dtype == values.dtype or array.dtype == object:
+            return
+        if array.dtype.kind == 'M' and values.dtype.kind == 'M':
+            target = array.dtype if _fits_seconds(values) else np.result_type(array.dtype, values.dtype)
+        elif array.dtype.kind in 'iuf' and values.dtype.kind in 'iuf':
+            target = np.result_type(array.dtype, values.dtype)
+        else:
+            target = np.dtype(object)
+        if target != array.dtype:
+            self._astype(name, target)
+
+    def _astype(self, name, target):
+        self._columns[name] = self._columns[name].astype(target)
+
+    def _is_categorical(self, name):
+        return isinstance(self._dtypes.get(name), pd.CategoricalDtype)
+
+    def _encode(self, name, values):
+        """Returns the category codes of values, adding categories that are new."""
+        dtype = self._dtypes[name]
+        values = pd.Series(np.asarray(values, dtype=object))
+        known = values.isna() | values.isin(dtype.categories)
+        if not known.all():
+            new = pd.Index(values[~known].unique())
+            dtype = pd.CategoricalDtype(dtype.categories.append(new), ordered=dtype.ordered)
+            self._dtypes[name] = dtype
+        codes = pd.Categorical(values, dtype=dtype).codes
+        if codes.dtype.itemsize > self._columns[name].dtype.itemsize:
+            self._columns[name] = self._columns[name].astype(codes.dtype)
+        return codes
+
+    def _assign(self, name, rows, values):
+        try:
+            self._columns[name][rows] = values
+        except (TypeError, ValueError):
+            self._columns[name] = self._columns[name].astype(object)
+            self._columns[name][rows] = values
+
+    def _fill_missing(self, name, rows):
+        """Stores missing values, widening integer columns to float for NaN."""
+        if self._is_categorical(name):
+            self._columns[name][rows] = -1
+            return
+        if self._columns[name].dtype.kind in 'iu':
+            self._columns[name] = self._columns[name].astype(np.float64)
+        array = self._columns[name]
+        array[rows] = self._missing(array)
+
+    @staticmethod
+    def _dtype_for(value):
+        if isinstance(value, (pd.Timestamp, np.datetime64)) or hasattr(value, 'isoformat'):
+            return np.dtype('datetime64[us]')
+        if isinstance(value, (bool, np.bool_)):
+            return np.dtype(object)
+        if isinstance(value, (int, np.integer)):
+            return np.dtype(np.int64)
+        if isinstance(value, (float, np.floating)):
+            return np.dtype(np.float64)
+        return np.dtype(object)
+
+    @staticmethod
+    def _missing(array):
+        if array.dtype.kind == 'M':
+            return np.datetime64('NaT')
+        if array.dtype.kind == 'f':
+            return np.nan
+        return None
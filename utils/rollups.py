@@ -0,0 +1,233 @@
+import math, threading
+import numpy as np
+import pandas as pd
+
+# Bump when the stored format or the aggregation changes; stored rollups are then rebuilt
+ROLLUP_VERSION = 2
+ROLLUP_COLUMNS = ('weight', 'height', 'bmi')
+GRANULARITIES = ('day', 'week', 'month')
+
+
+def period_start(timestamp, granularity):
+    """Returns the first day of the day, ISO week (Monday) or month containing timestamp, as 'YYYY-MM-DD'."""
+    day = pd.Timestamp(timestamp).normalize()
+    if granularity == 'week':
+        day -= pd.Timedelta(days=day.weekday())
+    elif granularity == 'month':
+        day = day.replace(day=1)
+    return day.strftime('%Y-%m-%d')
+
+
+def _mix(h):
+    """splitmix64 finalizer of a uint64 array (wrapping arithmetic)."""
+    with np.errstate(over='ignore'):
+        h = (h ^ (h >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+        h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+        return h ^ (h >> np.uint64(31))
+
+
+def record_hashes(timestamps, columns):
+    """
+    Hashes records by their timestamp (to the second) and values (to 3 decimals).
+
+    The precision makes the hashes independent of how the records were stored,
+    e.g. as text in a CSV file, as Parquet columns or in the session data
+    (see utils.record_buffer.compact_frame).
+
+    Args:
+        timestamps (array-like): The records' timestamps.
+        columns (list of array-like): The records' values, one array per column.
+
+    Returns:
+        np.ndarray: One uint64 hash per record.
+    """
+    times = pd.to_datetime(pd.Series(timestamps), errors='coerce')
+    seconds = times.to_numpy(dtype='datetime64[ns]').view(np.int64) // 10**9
+    h = _mix(seconds.view(np.uint64))
+    for values in columns:
+        values = pd.to_numeric(pd.Series(values), errors='coerce').to_numpy(dtype=np.float64)
+        missing = np.isnan(values)
+        scaled = np.where(missing, 0, np.round(np.where(missing, 0, values) * 1000)).astype(np.int64)
+        h = _mix(h ^ scaled.view(np.uint64) ^ missing.astype(np.uint64))
+    return h
+
+
+def data_fingerprint(df, columns=ROLLUP_COLUMNS):
+    """
+    Order-independent fingerprint of records: the sum of their record_hashes() modulo 2**64.
+
+    Adding a record adds its hash, so rollups update the fingerprint in O(1) and
+    compare it with that of the stored data to detect edits (see TimeRollups.is_current()).
+    """
+    if len(df) == 0:
+        return 0
+    missing = np.full(len(df), np.nan)
+    hashes = record_hashes(df['timestamp'] if 'timestamp' in df.columns else [None] * len(df),
+                           [df[c] if c in df.columns else missing for c in columns])
+    return int(hashes.sum(dtype=np.uint64))
+
+
+class TimeRollups:
+    """
+    Daily, weekly and monthly aggregates (count, sum, min, max) of the numeric record columns.
+
+    Adding a record updates a constant number of aggregates, so the rollups can be
+    kept up to date on every append without scanning the history. Charts over long
+    time ranges read the per-period series instead of the raw records.
+
+    A user's rollups are shared by all of their sessions (see utils.session_data),
+    so add(), extend(), series() and to_dict() hold the rollups' lock. Hold it
+    yourself to make several calls atomic, e.g. adding records and saving them.
+
+    Attributes:
+        columns (tuple): The aggregated columns.
+        n_records (int): Number of records added.
+        fingerprint (int): data_fingerprint() of the records added, used to detect edits of the data.
+        periods (dict): Granularity to {period start: {column: [count, sum, min, max]}}.
+        lock (threading.RLock): Guards n_records, fingerprint and periods.
+    """
+
+    def __init__(self, columns=ROLLUP_COLUMNS):
+        self.columns = tuple(columns)
+        self.n_records = 0
+        self.fingerprint = 0
+        self.periods = {g: {} for g in GRANULARITIES}
+        self.lock = threading.RLock()
+
+    @classmethod
+    def from_frame(cls, df, columns=ROLLUP_COLUMNS):
+        """
+        Builds the rollups of a whole DataFrame.
+
+        Args:
+            df (pd.DataFrame): Records with a 'timestamp' column.
+            columns (tuple): The columns to aggregate; missing columns are skipped.
+
+        Returns:
+            TimeRollups: The rollups of all records.
+        """
+        rollups = cls(columns)
+        rollups.n_records = len(df)
+        rollups.fingerprint = data_fingerprint(df, rollups.columns)
+        if df.empty or 'timestamp' not in df.columns:
+            return rollups
+        days = pd.to_datetime(df['timestamp'], errors='coerce').dt.normalize()
+        starts = {'day': days,
+                  'week': days - pd.to_timedelta(days.dt.weekday, unit='D'),
+                  'month': days - pd.to_timedelta(days.dt.day - 1, unit='D')}
+        for granularity, start in starts.items():
+            keys = start.dt.strftime('%Y-%m-%d')
+            target = rollups.periods[granularity]
+            for column in rollups.columns:
+                if column not in df.columns:
+                    continue
+                values = pd.to_numeric(df[column], errors='coerce')
+                grouped = values.groupby(keys.to_numpy()).agg(['count', 'sum', 'min', 'max'])
+                for key, row in grouped[grouped['count'] > 0].iterrows():
+                    target.setdefault(key, {})[column] = [int(row['count']), float(row['sum']),
+                                                          float(row['min']), float(row['max'])]
+        return rollups
+
+    def add(self, record):
+        """
+        Adds one record (dict or pd.Series with 'timestamp') in O(1).
+
+        Records without a valid timestamp are counted but not aggregated.
+        """
+        timestamp = pd.to_datetime(record.get('timestamp'), errors='coerce')
+        record_hash = int(record_hashes([record.get('timestamp')], [[record.get(c)] for c in self.columns])[0])
+        with self.lock:
+            self.n_records += 1
+            self.fingerprint = (self.fingerprint + record_hash) % 2**64
+            if not pd.isna(timestamp):
+                self._aggregate(record, timestamp)
+
+    def _aggregate(self, record, timestamp):
+        """Adds the values of a record to the periods containing timestamp (lock held)."""
+        for granularity in GRANULARITIES:
+            period = self.periods[granularity].setdefault(period_start(timestamp, granularity), {})
+            for column in self.columns:
+                value = record.get(column)
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if math.isnan(value):
+                    continue
+                stats = period.get(column)
+                if stats is None:
+                    period[column] = [1, value, value, value]
+                else:
+                    stats[0] += 1
+                    stats[1] += value
+                    stats[2] = min(stats[2], value)
+                    stats[3] = max(stats[3], value)
+
+    def extend(self, records):
+        """Adds the rows of a DataFrame or a list of dicts (see add())."""
+        if isinstance(records, pd.DataFrame):
+            records = records.to_dict('records')
+        with self.lock:
+            for record in records:
+                self.add(record)
+
+    def series(self, column, granularity, start=None, end=None):
+        """
+        Returns the aggregates of one column per period.
+
+        Args:
+            column (str): One of columns.
+            granularity (str): 'day', 'week' or 'month'.
+            start, end (datetime-like, optional): Keep periods overlapping [start, end], including
+                the period that contains start.
+
+        Returns:
+            pd.DataFrame: Indexed by period start, with columns count, mean, min and max.
+        """
+        with self.lock:
+            rows = [(key, list(stats[column])) for key, stats in self.periods[granularity].items()
+                    if column in stats]
+        rows.sort()
+        index = pd.DatetimeIndex([key for key, _ in rows], name='timestamp')
+        values = np.array([stats for _, stats in rows], dtype=np.float64).reshape(-1, 4)
+        df = pd.DataFrame({'count': values[:, 0].astype(np.int64), 'mean': values[:, 1] / np.maximum(values[:, 0], 1),
+                           'min': values[:, 2], 'max': values[:, 3]}, index=index)
+        if start is not None:
+            start = period_start(start, granularity)
+        return df.loc[start:end]
+
+    def is_current(self, df, columns=ROLLUP_COLUMNS):
+        """
+        Whether these rollups match the records of df and aggregate the given columns.
+
+        Compares the number of records, then their fingerprint, so records that were
+        edited or replaced (e.g. as many deleted as added) are detected as well.
+        """
+        with self.lock:
+            n_records, fingerprint = self.n_records, self.fingerprint
+        return (self.columns == tuple(columns) and n_records == len(df)
+                and fingerprint == data_fingerprint(df, self.columns))
+
+    def to_dict(self):
+        """Returns a JSON-serializable copy, safe to save in the background while records are added."""
+        with self.lock:
+            periods = {g: {key: {c: list(stats) for c, stats in period.items()} for key, period in by_key.items()}
+                       for g, by_key in self.periods.items()}
+            return {'version': ROLLUP_VERSION, 'columns': list(self.columns), 'n_records': self.n_records,
+                    'fingerprint': self.fingerprint, 'periods': periods}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Restores rollups from to_dict().
+
+        Returns:
+            TimeRollups or None: None if the data was written by another ROLLUP_VERSION.
+        """
+        if not data or data.get('version') != ROLLUP_VERSION:
+            return None
+        rollups = cls(data['columns'])
+        rollups.n_records = data['n_records']
+        rollups.fingerprint = data['fingerprint']
+        rollups.periods = {g: data['periods'].get(g, {}) for g in GRANULARITIES}
+        return rollups
@@ -0,0 +1,155 @@
+import threading, uuid, weakref
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from utils.record_buffer import RecordBuffer, compact_frame
+
+
+class _Lease:
+    """Kept in a session's state; the session references its user's data while the lease is alive."""
+
+    __slots__ = ('username', 'version', '__weakref__')
+
+    def __init__(self, username, version):
+        self.username = username
+        self.version = version
+
+
+class SharedUserData:
+    """
+    Process-wide store of each logged-in user's records, shared by all of that user's sessions.
+
+    Every user has one current version: a read-only DataFrame with compact dtypes
+    (see utils.record_buffer.compact_frame), backed by a RecordBuffer, plus the
+    user's time rollups. Sessions (e.g. several browser tabs) hold the frame of
+    the version they last saw instead of a copy of their own. Appending extends
+    the buffer and publishes a new version; frames of earlier versions stay valid
+    and unchanged (copy-on-write), and are freed once no session references them.
+
+    Sessions register with lease(); a user's entry is dropped when none of their
+    sessions is alive anymore.
+    """
+
+    def __init__(self):
+        self._users = {}  # username -> {'version', 'buffer', 'frame', 'rollups'}
+        self._leases = weakref.WeakValueDictionary()  # session id -> _Lease
+        self._frames = {}  # (username, version) -> (weakref to frame, bytes)
+        self._lock = threading.RLock()
+
+    def current(self, username):
+        """
+        Returns the current version of a user's data.
+
+        Returns:
+            tuple: (version, frame, rollups), or (None, None, None) if the user has no entry.
+        """
+        with self._lock:
+            entry = self._users.get(username)
+            if entry is None:
+                return None, None, None
+            return entry['version'], entry['frame'], entry['rollups']
+
+    def publish(self, username, df, rollups=None):
+        """
+        Replaces a user's data, e.g. after loading it or after a bulk import.
+
+        Args:
+            username (str): The user.
+            df (pd.DataFrame): All records of the user; stored with compact dtypes.
+            rollups (TimeRollups, optional): The user's rollups (see DataManager.load_rollups()).
+
+        Returns:
+            tuple: (version, frame) of the new version.
+        """
+        buffer = RecordBuffer.from_frame(compact_frame(df))
+        with self._lock:
+            self._prune(keep=username)
+            self._users[username] = {'version': None, 'buffer': buffer, 'frame': None, 'rollups': rollups}
+            return self._new_version(username)
+
+    def update(self, username, fn):
+        """
+        Changes a user's data in place and publishes the result as a new version.
+
+        Args:
+            username (str): The user; must have been published before.
+            fn (callable): Called with the user's RecordBuffer, e.g. to append records.
+                Frames of earlier versions are not affected.
+
+        Returns:
+            tuple: (version, frame) of the new version.
+        """
+        with self._lock:
+            entry = self._users[username]
+            was_empty = len(entry['buffer']) == 0
+            fn(entry['buffer'])
+            if was_empty:
+                # The first records define the columns; store them compactly as well
+                entry['buffer'] = RecordBuffer.from_frame(compact_frame(entry['buffer'].to_frame()))
+            return self._new_version(username)
+
+    def lease(self, username, version):
+        """
+        Registers the calling session as a reader of a version of a user's data.
+
+        Keep the returned object in the session state; when the session ends, the
+        lease is garbage collected and the session no longer counts as a reader.
+
+        Returns:
+            _Lease: The session's lease.
+        """
+        ctx = get_script_run_ctx(suppress_warning=True)
+        lease = _Lease(username, version)
+        with self._lock:
+            self._leases[ctx.session_id if ctx is not None else uuid.uuid4().hex] = lease
+        return lease
+
+    def memory_usage(self):
+        """
+        Reports the memory held by shared session data.
+
+        A frame referenced by several sessions is counted once in the total. Frames of
+        the current versions are views of the buffers and counted with them; frames of
+        earlier versions still referenced by a session are added in full, so the total
+        is an upper bound when they share arrays with a buffer.
+
+        Returns:
+            dict: 'total_bytes' of the buffers and live frames, 'users' (number of users
+            with an entry), and 'sessions' mapping session ids to dicts with
+            'username', 'version', 'bytes' of the referenced frame, and 'shared_with'
+            (number of sessions referencing the same frame).
+        """
+        with self._lock:
+            leases = {sid: (lease.username, lease.version) for sid, lease in self._leases.items()}
+            live = {key: nbytes for key, (ref, nbytes) in self._frames.items() if ref() is not None}
+            buffer_bytes = sum(e['buffer'].nbytes for e in self._users.values())
+            current = {(u, e['version']) for u, e in self._users.items()}
+            n_users = len(self._users)
+        readers = {}
+        for key in leases.values():
+            readers[key] = readers.get(key, 0) + 1
+        sessions = {sid: {'username': key[0], 'version': key[1], 'bytes': live.get(key, 0),
+                          'shared_with': readers[key]}
+                    for sid, key in leases.items()}
+        total = buffer_bytes + sum(nbytes for key, nbytes in live.items() if key not in current)
+        return {'total_bytes': int(total), 'users': n_users, 'sessions': sessions}
+
+    def _new_version(self, username):
+        entry = self._users[username]
+        entry['version'] = uuid.uuid4().hex
+        entry['frame'] = entry['buffer'].to_frame()
+        nbytes = int(entry['frame'].memory_usage(index=True, deep=True).sum())
+        self._frames[(username, entry['version'])] = (weakref.ref(entry['frame']), nbytes)
+        self._frames = {key: value for key, value in self._frames.items() if value[0]() is not None}
+        return entry['version'], entry['frame']
+
+    def _prune(self, keep=None):
+        """Drops the entries of users without a live session."""
+        active = {lease.username for lease in self._leases.values()}
+        for username in [u for u in self._users if u not in active and u != keep]:
+            del self._users[username]
+
+
+@st.cache_resource(show_spinner=False)
+def get_shared_user_data():
+    """Returns the process-wide SharedUserData store, shared by all sessions."""
+    return SharedUserData()
@@ -0,0 +1,152 @@
+import atexit, logging, queue, threading, time
+from collections import Counter, deque
+import streamlit as st
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindQueue:
+    """
+    A bounded background queue for storage writes, served by a pool of worker threads.
+
+    Writes are grouped per target path and executed in submission order, one at a
+    time per path. A pending write marked as coalescable (a full save) is replaced
+    by a newer one for the same path, so only the latest content is uploaded.
+    Failed writes are retried with exponential backoff.
+
+    Each write belongs to a group (e.g. a user's data folder), so the pending and
+    failed writes of one group can be counted and waited for without the others.
+
+    Attributes:
+        max_pending (int): Maximum number of queued writes; submit() blocks beyond this.
+        max_retries (int): Attempts per write before it is recorded as failed.
+        backoff (float): Delay before the first retry in seconds (doubles per retry).
+    """
+
+    def __init__(self, max_pending=100, workers=2, max_retries=5, backoff=0.5):
+        """
+        Initialize the queue and start the worker threads.
+
+        Args:
+            max_pending (int): Maximum number of queued writes.
+            workers (int): Number of worker threads.
+            max_retries (int): Attempts per write before it is recorded as failed.
+            backoff (float): Delay before the first retry in seconds.
+        """
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._failed = {}         # group -> deque of the most recent (path, error, time)
+        self._tasks = {}          # path -> deque of [write_fn, coalescable, group]
+        self._scheduled = set()   # paths waiting for or owned by a worker
+        self._pending = 0
+        self._pending_by_group = Counter()
+        self._ready = queue.Queue()
+        self._cond = threading.Condition()
+        for i in range(workers):
+            threading.Thread(target=self._work, name=f"write-behind-{i}", daemon=True).start()
+
+    def submit(self, path, write_fn, coalesce=False, group=None):
+        """
+        Queues a write. Blocks while max_pending writes are already queued.
+
+        Args:
+            path (str): The target path; writes to the same path run in order.
+            write_fn (callable): Performs the write (called without arguments).
+            coalesce (bool): If True and the last queued write for path is also
+                coalescable, it is replaced instead of queuing another write.
+            group (str, optional): The group the write is counted in, e.g. the user's
+                data folder. All writes to a path must use the same group.
+                Ungrouped writes are only included in the totals.
+        """
+        with self._cond:
+            while self._pending >= self.max_pending:
+                self._cond.wait()
+            tasks = self._tasks.setdefault(path, deque())
+            if coalesce and tasks and tasks[-1][1]:
+                tasks[-1] = [write_fn, True, group]
+            else:
+                tasks.append([write_fn, coalesce, group])
+                self._pending += 1
+                self._pending_by_group[group] += 1
+            if path not in self._scheduled:
+                self._scheduled.add(path)
+                self._ready.put(path)
+
+    def pending_count(self, group=None):
+        """Returns the number of writes that have not completed yet, of one group if given."""
+        with self._cond:
+            return self._pending if group is None else self._pending_by_group[group]
+
+    def failed_writes(self, group=None):
+        """Returns the most recent failed writes as (path, error, time), of one group if given."""
+        with self._cond:
+            if group is not None:
+                return list(self._failed.get(group, ()))
+            return sorted((entry for failed in self._failed.values() for entry in failed), key=lambda e: e[2])
+
+    def flush(self, timeout=None, group=None):
+        """
+        Waits until all queued writes, or those of one group, have completed.
+
+        Args:
+            timeout (float, optional): Maximum seconds to wait.
+            group (str, optional): Only wait for the writes of this group.
+
+        Returns:
+            bool: True if no writes are pending anymore, False if the timeout expired.
+        """
+        with self._cond:
+            if group is None:
+                return self._cond.wait_for(lambda: self._pending == 0, timeout)
+            return self._cond.wait_for(lambda: self._pending_by_group[group] == 0, timeout)
+
+    def _work(self):
+        while True:
+            path = self._ready.get()
+            with self._cond:
+                write_fn, _, group = self._tasks[path].popleft()
+            self._run(path, write_fn, group)
+            with self._cond:
+                self._pending -= 1
+                self._pending_by_group[group] -= 1
+                if not self._pending_by_group[group]:
+                    del self._pending_by_group[group]
+                if self._tasks[path]:
+                    self._ready.put(path)
+                else:
+                    del self._tasks[path]
+                    self._scheduled.discard(path)
+                self._cond.notify_all()
+
+    def _run(self, path, write_fn, group):
+        for attempt in range(self.max_retries):
+            try:
+                write_fn()
+                return
+            except Exception as e:
+                if attempt == self.max_retries - 1:
+                    logger.error("Write to %s failed after %d attempts: %s", path, self.max_retries, e)
+                    with self._cond:
+                        self._failed.setdefault(group, deque(maxlen=20)).append((path, str(e), time.time()))
+                    return
+                time.sleep(self.backoff * 2 ** attempt)
+
+
+@st.cache_resource(show_spinner=False)
+def get_write_behind_queue(max_pending=100, workers=2):
+    """
+    Returns the process-wide WriteBehindQueue, shared by all sessions.
+
+    Pending writes are flushed when the process exits.
+
+    Args:
+        max_pending (int): Maximum number of queued writes.
+        workers (int): Number of worker threads.
+
+    Returns:
+        WriteBehindQueue: The shared queue.
+    """
+    write_queue = WriteBehindQueue(max_pending=max_pending, workers=workers)
+    atexit.register(write_queue.flush, 30)
+    return write_queue
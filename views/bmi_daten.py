@@ -1,4 +1,18 @@
+import datetime
+import math
 import streamlit as st
+from functions.data_view import DataView
+
+PAGE_SIZES = (25, 50, 100, 250)
+
+
+def get_data_view(data_df, data_version):
+    """Sorted, indexed view of the data, built once per data version and kept in the session (read-only)."""
+    cached = st.session_state.get('daten_view')
+    if cached is None or cached[0] != data_version:
+        cached = st.session_state['daten_view'] = (data_version, DataView(data_df))
+    return cached[1]
+
 
 st.title('BMI Werte')
 
@@ -7,8 +21,34 @@ if data_df.empty:
     st.info('Keine BMI Daten vorhanden. Berechnen Sie Ihren BMI auf der Startseite.')
     st.stop()
 
-# Sort dataframe by timestamp
-data_df = data_df.sort_values('timestamp', ascending=False)
+view = get_data_view(data_df, st.session_state.get('data_version'))
+
+# Filters
+start, end, categories = None, None, None
+first, last = view.time_range()
+with st.expander('Filter'):
+    if first is not None:
+        date_range = st.date_input('Zeitraum', value=(first.date(), last.date()),
+                                   min_value=first.date(), max_value=last.date(), format='DD.MM.YYYY')
+        # Rows without timestamp are only hidden once the range is narrowed
+        if len(date_range) == 2 and tuple(date_range) != (first.date(), last.date()):
+            start, end = date_range[0], date_range[1] + datetime.timedelta(days=1)
+    if view.categories:
+        selected = st.multiselect('Kategorie', view.categories, default=view.categories)
+        categories = None if len(selected) == len(view.categories) else selected
+
+positions = view.select(start, end, categories)
+if len(positions) == 0:
+    st.info('Keine Einträge für diese Auswahl.')
+    st.stop()
+
+# Only the current page is sent to the browser
+col_size, col_page = st.columns(2)
+page_size = col_size.selectbox('Zeilen pro Seite', PAGE_SIZES, index=1)
+n_pages = math.ceil(len(positions) / page_size)
+page = col_page.number_input('Seite', min_value=1, max_value=n_pages, value=1, step=1)
 
-# Display table
-st.dataframe(data_df)
+st.dataframe(view.page(positions, page, page_size), hide_index=True)
+first_row = (page - 1) * page_size + 1
+st.caption(f'Einträge {first_row}–{min(page * page_size, len(positions))} von {len(positions)} '
+           f'(Seite {page} von {n_pages})')
@@ -1,4 +1,65 @@
 import streamlit as st
+from functions.downsample import downsample_series
+
+DEFAULT_POINT_BUDGET = 1000
+# Chart series kept per session (for the current data version), e.g. for moving the slider back
+SERIES_CACHE_ENTRIES = 16
+AGGREGATIONS = {'Messpunkte': None, 'Tagesmittel': 'day', 'Wochenmittel': 'week', 'Monatsmittel': 'month'}
+
+
+def get_indexed_data(data_df, data_version):
+    """
+    Timestamp-indexed, sorted copy of the data, built once per data version (read-only).
+
+    Kept in the session state rather than in a process-wide cache, so the entries of
+    many active users don't evict each other on every rerun.
+    """
+    cached = st.session_state.get('grafik_indexed')
+    if cached is None or cached[0] != data_version:
+        cached = st.session_state['grafik_indexed'] = (data_version, data_df.set_index('timestamp').sort_index())
+    return cached[1]
+
+
+def cached_series(data_version, key, compute):
+    """
+    Returns compute(), cached in the session state by key for the current data version.
+
+    Like get_indexed_data(), the results stay with the session instead of a
+    process-wide cache that the chart views of all users would share. At most
+    SERIES_CACHE_ENTRIES are kept (least recently used dropped first), and all
+    are dropped when the data version changes.
+    """
+    cached = st.session_state.get('grafik_series')
+    if cached is None or cached[0] != data_version:
+        cached = st.session_state['grafik_series'] = (data_version, {})
+    results = cached[1]
+    if key in results:
+        results[key] = results.pop(key)  # most recently used last
+    else:
+        if len(results) >= SERIES_CACHE_ENTRIES:
+            del results[next(iter(results))]
+        results[key] = compute()
+    return results[key]
+
+
+def get_chart_series(indexed_df, data_version, column, start, end, point_budget):
+    """Downsampled series of one column within [start, end], cached per session and data version."""
+    def compute():
+        series = indexed_df[column].loc[start:end]
+        if point_budget is None:
+            return series
+        return downsample_series(series, point_budget)
+    return cached_series(data_version, ('points', column, start, end, point_budget), compute)
+
+
+def get_rollup_series(rollups, data_version, column, granularity, start, end):
+    """Mean, min and max of one column per period within [start, end], from the stored rollups."""
+    def compute():
+        series = rollups.series(column, granularity, start, end)
+        return series[['mean', 'min', 'max']].rename(columns={'mean': 'Mittelwert', 'min': 'Minimum',
+                                                              'max': 'Maximum'})
+    return cached_series(data_version, ('rollups', column, granularity, start, end), compute)
+
 
 st.title('BMI Verlauf')
 
@@ -7,14 +68,41 @@ if data_df.empty:
     st.info('Keine BMI Daten vorhanden. Berechnen Sie Ihren BMI auf der Startseite.')
     st.stop()
 
+data_version = st.session_state.get('data_version')
+indexed_df = get_indexed_data(data_df, data_version)
+
+first, last = indexed_df.index[0].to_pydatetime(), indexed_df.index[-1].to_pydatetime()
+start, end = first, last
+with st.expander('Darstellung'):
+    if first < last:
+        start, end = st.slider('Zeitraum', min_value=first, max_value=last, value=(first, last),
+                               format='DD.MM.YYYY')
+    full_resolution = st.toggle('Volle Auflösung', value=False,
+                                help='Alle Messpunkte im gewählten Zeitraum anzeigen')
+    point_budget = st.number_input('Maximale Anzahl Punkte pro Grafik', min_value=100, max_value=20000,
+                                   value=DEFAULT_POINT_BUDGET, step=100, disabled=full_resolution)
+    rollups = st.session_state.get('rollups')
+    aggregation = st.radio('Aggregation', list(AGGREGATIONS), horizontal=True, disabled=rollups is None,
+                           help='Vorberechnete Mittelwerte statt einzelner Messpunkte (schnell für lange Zeiträume)')
+point_budget = None if full_resolution else point_budget
+granularity = AGGREGATIONS[aggregation] if rollups is not None else None
+
+
+def chart_data(column):
+    """Pre-aggregated series if an aggregation is selected, else the (downsampled) measurements."""
+    if granularity is None:
+        return get_chart_series(indexed_df, data_version, column, start, end, point_budget)
+    return get_rollup_series(rollups, data_version, column, granularity, start, end)
+
+
 # Weight over time
-st.line_chart(data=data_df.set_index('timestamp')['weight'])
+st.line_chart(data=chart_data('weight'))
 st.caption('Gewicht über Zeit (kg)')
 
 # Height over time
-st.line_chart(data=data_df.set_index('timestamp')['height'])
+st.line_chart(data=chart_data('height'))
 st.caption('Größe über Zeit (m)')
 
 # BMI over time
-st.line_chart(data=data_df.set_index('timestamp')['bmi'])
+st.line_chart(data=chart_data('bmi'))
 st.caption('BMI über Zeit')
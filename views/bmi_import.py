@@ -0,0 +1,55 @@
+import posixpath
+import pandas as pd
+import streamlit as st
+from functions.bulk_import import BulkImport, read_chunks
+from utils.data_manager import DataManager
+from utils.session_data import get_shared_user_data
+
+st.title('BMI Import')
+
+st.write('Importieren Sie frühere Messungen aus einer CSV- oder JSON-Datei. Benötigt werden die Spalten '
+         '**timestamp** (oder Datum), **height** (oder Groesse, in m oder cm) und **weight** (oder Gewicht, in kg). '
+         'BMI und Kategorie werden berechnet; Einträge mit bereits vorhandenem Zeitpunkt werden übersprungen.')
+
+uploaded = st.file_uploader('Datei', type=['csv', 'json', 'jsonl'])
+if uploaded is None or not st.button('Importieren', type='primary'):
+    st.stop()
+
+# The file is read and validated in chunks; only the accepted records are kept
+data_df = st.session_state['data_df']
+importer = BulkImport(data_df['timestamp'] if 'timestamp' in data_df.columns else [])
+file_format = posixpath.splitext(uploaded.name)[1].lstrip('.').lower()
+progress = st.progress(0.0, text='Datei wird gelesen...')
+try:
+    for chunk in read_chunks(uploaded, file_format):
+        importer.add_chunk(chunk)
+        progress.progress(min(uploaded.tell() / max(uploaded.size, 1), 1.0),
+                          text=f'{importer.n_rows} Zeilen gelesen...')
+except ValueError as e:
+    progress.empty()
+    st.error(f'Die Datei konnte nicht importiert werden: {e}')
+    st.stop()
+new_records = importer.finish()
+progress.empty()
+
+if len(new_records) > 0:
+    # Appended as one delta segment instead of one write per record. A full save
+    # would also drop the segments another tab of the user appended meanwhile.
+    dm = DataManager()
+    shared_data = get_shared_user_data()
+    username = st.session_state['username']
+    data_version, data_df = shared_data.update(username, lambda buffer: buffer.extend(new_records))
+    st.session_state['data_df'] = data_df
+    st.session_state['data_version'] = data_version
+    st.session_state['data_lease'] = shared_data.lease(username, data_version)
+    dm.append_user_data(new_records, dm.data_file)
+    dm.append_rollups(st.session_state['rollups'], new_records)
+    st.success(f'{len(new_records)} von {importer.n_rows} Zeilen importiert.')
+else:
+    st.info(f'Keine neuen Einträge in {importer.n_rows} Zeilen.')
+
+if importer.n_duplicates:
+    st.caption(f'{importer.n_duplicates} Zeilen mit bereits vorhandenem Zeitpunkt übersprungen.')
+if importer.n_invalid:
+    st.warning(f'{importer.n_invalid} ungültige Zeilen übersprungen.')
+    st.dataframe(pd.DataFrame(importer.errors, columns=['Zeile', 'Fehler']), hide_index=True)
@@ -1,6 +1,7 @@
 import streamlit as st
 from functions.bmi_calculator import calculate_bmi
 from utils.data_manager import DataManager
+from utils.session_data import get_shared_user_data
 
 st.title('BMI Rechner')
 
@@ -15,5 +16,12 @@ if submitted:
     st.write(f'Kategorie: {result["category"]}')
 
     dm = DataManager()
-    st.session_state['data_df'] = dm.append_record(st.session_state['data_df'], result)
-    dm.save_user_data(st.session_state['data_df'], 'data.csv')
+    shared_data = get_shared_user_data()
+    username = st.session_state['username']
+    data_version, data_df = shared_data.update(username, lambda buffer: dm.append_record(buffer, result))
+    st.session_state['data_df'] = data_df
+    st.session_state['data_version'] = data_version
+    st.session_state['data_lease'] = shared_data.lease(username, data_version)
+    new_record = data_df.tail(1)
+    dm.append_user_data(new_record, dm.data_file)
+    dm.append_rollups(st.session_state['rollups'], new_record)
@@ -0,0 +1,61 @@
+import pandas as pd
+import streamlit as st
+from utils.io_metrics import can_view_metrics, current_scope
+from utils.session_data import get_shared_user_data
+
+st.title('I/O Debug')
+
+if not can_view_metrics(st.session_state.get('username')):
+    st.error('Diese Seite ist nur für Administratoren sichtbar.')
+    st.stop()
+
+# Memory of the session data shared by all sessions of a user (usernames are not shown)
+st.subheader('Sitzungsdaten im Speicher')
+usage = get_shared_user_data().memory_usage()
+session_id, rerun = current_scope()
+own = usage['sessions'].get(session_id, {'bytes': 0, 'shared_with': 1})
+col_own, col_total, col_users = st.columns(3)
+col_own.metric('Diese Sitzung', f"{own['bytes'] / 1024:.1f} KiB",
+               help=f"Geteilt mit {own['shared_with'] - 1} weiteren Sitzungen")
+col_total.metric('Prozess total', f"{usage['total_bytes'] / 1024:.1f} KiB")
+col_users.metric('Benutzer', usage['users'])
+st.dataframe(pd.DataFrame([{'Sitzung': sid[:8], 'Bytes': s['bytes'], 'Sitzungen mit denselben Daten': s['shared_with']}
+                           for sid, s in usage['sessions'].items()]), hide_index=True)
+
+metrics = st.session_state['data_manager'].metrics
+if metrics is None:
+    st.info('I/O-Messung ist deaktiviert (DataManager(..., instrument=True)).')
+    st.stop()
+
+COLUMNS = ['layer', 'op', 'path', 'count', 'errors', 'seconds', 'p50', 'p95', 'bytes_read', 'bytes_written']
+
+# Storage calls of this session, one row per rerun
+st.subheader('Diese Sitzung')
+reruns = [r for r in metrics.session_reruns(session_id) if r['rerun'] != rerun]
+if not reruns:
+    st.info('Noch keine Messungen für diese Sitzung.')
+else:
+    overview = pd.DataFrame([{'rerun': r['rerun'], 'gestartet': pd.Timestamp(r['started'], unit='s'),
+                              'Anfragen': r['calls'], 'Sekunden': r['seconds'], 'Bytes': r['bytes']}
+                             for r in reruns])
+    st.dataframe(overview, hide_index=True)
+    selected = st.selectbox('Rerun', [r['rerun'] for r in reruns])
+    ops = next(r['ops'] for r in reruns if r['rerun'] == selected)
+    st.dataframe(pd.DataFrame(ops, columns=COLUMNS), hide_index=True)
+
+# Process-wide totals over all sessions
+st.subheader('Alle Sitzungen')
+totals = metrics.totals()
+st.caption(f"Seit {pd.Timestamp(metrics.started, unit='s'):%d.%m.%Y %H:%M:%S} (UTC)")
+st.dataframe(pd.DataFrame(totals, columns=COLUMNS), hide_index=True)
+gauges = metrics.gauges()
+if gauges:
+    for col, (name, value) in zip(st.columns(len(gauges)), gauges.items()):
+        col.metric(name, value)
+
+col_prom, col_json, col_reset = st.columns(3)
+col_prom.download_button('Prometheus', metrics.to_prometheus(), file_name='io_metrics.prom', mime='text/plain')
+col_json.download_button('JSON', metrics.to_json(), file_name='io_metrics.json', mime='application/json')
+if col_reset.button('Zurücksetzen'):
+    metrics.reset()
+    st.rerun()